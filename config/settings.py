@@ -9,13 +9,28 @@ AI_MODEL = {
     'fallback': 'gemini',  # Fallback AI service
     'ollama_model': 'llama3',  # Local Ollama model (if used)
     'temperature': 0.7,
-    'max_tokens': 1000
+    'max_tokens': 1000,
+    'openai_model': 'gpt-3.5-turbo',  # Intent classification model
+    'gemini_model': 'gemini-1.5-flash',
+    'request_timeout': 10.0,  # Seconds per LLM call
+    'connect_timeout': 5.0,
+    'max_connections': 20,  # Pooled keep-alive HTTP connections shared by all callers
+    'max_keepalive_connections': 10,
+    'keepalive_expiry': 30.0
 }
 
 # Database Configuration
 DATABASE = {
     'chromadb_path': './chroma_db_flowers',
-    'embedding_model': 'all-MiniLM-L6-v2',
+    # Single embedding model shared by indexing and querying (recorded in collection metadata);
+    # multilingual because product texts and queries are Romanian and Russian
+    'embedding_model': 'paraphrase-multilingual-MiniLM-L12-v2',
+    'query_embedding_cache': {
+        'max_entries': 2048,  # In-memory LRU size
+        'persist_path': None,  # e.g. './cache/query_embeddings' to keep vectors across restarts
+        'disk_capacity': 8192
+    },
+    'ingest_batch_size': 64,  # Products per encode + upsert when populating ChromaDB
     'collections': {
         'bouquets': 'bouquets_collection',
         'boxes': 'boxes_collection', 
@@ -33,7 +48,9 @@ API_CONFIG = {
         'health_path': '/health'
     },
     'telegram': {
-        'polling_interval': 1.0
+        'polling_interval': 1.0,
+        'max_concurrent_messages': 16,  # Messages processed at once across all chats
+        'worker_threads': 8             # Threads running the blocking message pipeline
     }
 }
 
@@ -57,13 +74,69 @@ INTENTS = {
     }
 }
 
+INTENT_CLASSIFIER = {
+    'cache': {
+        'enabled': True,
+        'max_entries': 4096,
+        'ttl_seconds': 6 * 3600,
+        'persist_path': None,  # e.g. './cache/intent_cache.json' to keep classifications across restarts
+        'context_turns': 3  # Recent intents that make up the context fingerprint
+    },
+    # Local keyword stage that answers without the LLM when it is decisive
+    'fast_path': {
+        'enabled': True,
+        # Calibrated with `train_intent_model.py --fast-path` on data/intent_examples.json (136 examples):
+        # one whole-word hit at score 1.0 answered 28 messages at 78.6% precision ('flori' alone sent
+        # complaints and subscriptions to find_product); two distinct hits answer 10 at 90%
+        'min_score': 2.0,  # Weighted keyword score of the best intent (two whole-word hits on a priority-5 intent)
+        'min_hits': 2,  # Distinct whole-word keywords of the best intent
+        'min_ratio': 2.0,  # Best score must be at least this multiple of the runner-up
+        'confidence': 0.85,  # Confidence reported for fast-path answers
+        # Intents whose keywords are unambiguous enough to skip the LLM
+        'intents': ['greeting', 'farewell', 'delivery_info', 'find_product']
+    },
+    # Embedding intent model: train_intent_model.py writes data/intent_model.npz with DATABASE['embedding_model'];
+    # artifacts from another model are refused (retrain after changing the model)
+    'embedding_model': {
+        'enabled': True,  # Used only once the artifact exists
+        'path': 'intent_model.npz',  # In data/ (or an absolute path)
+        'examples': 'intent_examples.json',
+        'mode': 'fallback',  # 'primary': ask it before the LLM; 'fallback': when the LLM is unavailable or unsure
+        'method': 'centroid',  # or 'prototype' (nearest labelled example)
+        'min_similarity': 0.5,
+        'min_margin': 0.05
+    }
+}
+
+# Conversation history and user profile persistence
+CONVERSATION_STORE = {
+    # 'log': append-only contexts.jsonl/profiles.jsonl; 'json': whole-file contexts.json/profiles.json;
+    # 'sqlite': one database shared by the bot processes, users loaded on demand
+    'backend': 'log',
+    'sqlite_path': None,  # Defaults to conversations.db in the storage directory
+    'prune_interval': 300,  # Seconds between deletes of expired turns (sqlite)
+    'compact_ratio': 2.0,  # Compact a log once it holds this many records per live record
+    'compact_min_records': 1000,
+    'flush_interval': 2.0,  # Seconds between background writes; 0 writes on every message
+    'max_pending_turns': 256  # Flush early once this many turns are waiting
+}
+
+# Per-user state kept in memory by the bots and ConversationContext
+SESSION_CACHE = {
+    'max_users': 10000,  # Least recently active users beyond this are dropped from memory
+    'idle_ttl': 2 * 3600  # Seconds without a message after which a user is dropped (reloaded on demand)
+}
+
 # Security Configuration
 SECURITY = {
     'enable_censorship': True,
     'enable_jailbreak_protection': True,
     'rate_limiting': {
         'max_requests_per_minute': 10,
-        'max_requests_per_hour': 100
+        'max_requests_per_hour': 100,
+        'backend': 'memory',  # 'sqlite' shares limits between bot worker processes
+        'sqlite_path': './data/rate_limits.db',
+        'evict_interval': 300  # Seconds between sweeps of idle users
     }
 }
 
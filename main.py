@@ -42,6 +42,11 @@ def main():
         action="store_true",
         help="Enable debug mode"
     )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Load the vector search model and ChromaDB client before serving"
+    )
     
     args = parser.parse_args()
     
@@ -59,6 +64,11 @@ def main():
     print("-" * 50)
     
     try:
+        if args.warmup:
+            print("🔥 Warming up vector search...")
+            from database.vector_search import warm_up
+            warm_up()
+        
         if args.platform == "instagram":
             print("📸 Starting Instagram Bot...")
             from src.api.instagram_app import XOFlowersInstagramBot
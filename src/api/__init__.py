@@ -3,7 +3,8 @@ XOFlowers API Module
 Contains API interfaces for Telegram and Instagram platforms
 """
 
+from .container import AppContainer, get_container
 from .telegram_app import XOFlowersTelegramBot as TelegramApp
 from .instagram_app import XOFlowersInstagramBot as InstagramApp
 
-__all__ = ['TelegramApp', 'InstagramApp']
+__all__ = ['AppContainer', 'get_container', 'TelegramApp', 'InstagramApp']
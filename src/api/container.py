@@ -0,0 +1,143 @@
+"""
+Application Container for XOFlowers bots
+Builds the shared components once per process (conversation context,
+intent classifier, product search, action handler, security filter) and
+hands the same instances to every bot and handler
+"""
+
+import os
+import sys
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from intelligence.action_handler import ActionHandler, HANDLER_KEYWORDS
+from intelligence.context_store import ContextStore
+from intelligence.conversation_context import ConversationContext, get_conversation_context
+from intelligence.intent_classifier import IntentClassifier
+from intelligence.product_search import ProductSearchEngine
+from security.filters import SecurityFilter
+
+
+class AppContainer:
+    """
+    One instance of each shared component, created on first access
+
+    Components can be passed in (e.g. a test store or a preloaded search
+    engine); anything not given is built from the configuration, with its
+    own dependencies taken from the container.
+    """
+
+    def __init__(self, storage_path: str = "data", context_store: Optional[ContextStore] = None,
+                 **components: Any):
+        """
+        Initialize the container
+
+        Args:
+            storage_path: Directory of the conversation store
+            context_store: Store for the conversation context (defaults to CONVERSATION_STORE)
+            **components: Prebuilt components by name (context_manager, intent_classifier,
+                product_search, action_handler, security_filter)
+        """
+        unknown = set(components) - set(self._FACTORIES)
+        if unknown:
+            raise ValueError(f"Unknown components: {', '.join(sorted(unknown))}")
+        self.storage_path = storage_path
+        self.context_store = context_store
+        self._components: Dict[str, Any] = dict(components)
+        self._lock = threading.RLock()
+        self.build_seconds: Dict[str, float] = {}
+
+    def _get(self, name: str) -> Any:
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        with self._lock:
+            if name not in self._components:
+                started = time.perf_counter()
+                self._components[name] = self._FACTORIES[name](self)
+                self.build_seconds[name] = round(time.perf_counter() - started, 3)
+            return self._components[name]
+
+    def _build_context_manager(self) -> ConversationContext:
+        if self.context_store is None:
+            # Same instance as any component built outside the container on this path
+            return get_conversation_context(self.storage_path)
+        return ConversationContext(storage_path=self.storage_path, store=self.context_store)
+
+    def _build_intent_classifier(self) -> IntentClassifier:
+        # The handler's occasion and FAQ tables share the classifier's keyword automaton
+        return IntentClassifier(extra_keywords=HANDLER_KEYWORDS, context_manager=self.context_manager)
+
+    def _build_product_search(self) -> ProductSearchEngine:
+        return ProductSearchEngine()
+
+    def _build_action_handler(self) -> ActionHandler:
+        return ActionHandler(
+            intent_classifier=self.intent_classifier,
+            product_search=self.product_search,
+            context_manager=self.context_manager
+        )
+
+    def _build_security_filter(self) -> SecurityFilter:
+        return SecurityFilter()
+
+    _FACTORIES: Dict[str, Callable[['AppContainer'], Any]] = {
+        'context_manager': _build_context_manager,
+        'intent_classifier': _build_intent_classifier,
+        'product_search': _build_product_search,
+        'action_handler': _build_action_handler,
+        'security_filter': _build_security_filter,
+    }
+
+    @property
+    def context_manager(self) -> ConversationContext:
+        return self._get('context_manager')
+
+    @property
+    def intent_classifier(self) -> IntentClassifier:
+        return self._get('intent_classifier')
+
+    @property
+    def product_search(self) -> ProductSearchEngine:
+        return self._get('product_search')
+
+    @property
+    def action_handler(self) -> ActionHandler:
+        return self._get('action_handler')
+
+    @property
+    def security_filter(self) -> SecurityFilter:
+        return self._get('security_filter')
+
+    def warm_up(self) -> 'AppContainer':
+        """Build every component now (instead of on the first message)"""
+        for name in self._FACTORIES:
+            self._get(name)
+        return self
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Built components and how long each took"""
+        return {'components': sorted(self._components), 'build_seconds': dict(self.build_seconds)}
+
+    def close(self):
+        """Flush and close the conversation store"""
+        context_manager = self._components.get('context_manager')
+        if context_manager is not None:
+            context_manager.close()
+
+
+_container: Optional[AppContainer] = None
+_container_lock = threading.Lock()
+
+
+def get_container() -> AppContainer:
+    """Container shared by everything in this process"""
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = AppContainer()
+    return _container
@@ -0,0 +1,115 @@
+"""
+Message Dispatcher for XOFlowers bots
+Runs the blocking message pipeline (security, intent classification, routing,
+LLM calls, persistence) on a bounded worker pool so the event loop stays free,
+while keeping messages from the same chat in arrival order
+"""
+
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class MessageDispatcher:
+    """
+    Offloads blocking work from asyncio handlers
+
+    - a per-chat asyncio.Lock (FIFO) keeps replies in message order
+    - a semaphore caps how many messages are processed at once
+    - the worker pool bounds the number of threads doing blocking I/O
+    """
+
+    def __init__(self, max_concurrent: int = 16, worker_threads: int = 8, thread_name_prefix: str = 'xoflowers-msg'):
+        """
+        Initialize the dispatcher
+
+        Args:
+            max_concurrent: Messages processed at the same time (across all chats)
+            worker_threads: Threads in the worker pool
+            thread_name_prefix: Name prefix for worker threads
+        """
+        self.max_concurrent = max_concurrent
+        self._executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix=thread_name_prefix)
+        self._semaphore = None
+        self._chat_locks: Dict[str, asyncio.Lock] = {}
+        self._chat_waiters: Dict[str, int] = {}
+
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_seconds = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def offload(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking function in the worker pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def run(self, chat_id: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run the work for a chat without blocking the event loop
+
+        Args:
+            chat_id: Chat the work belongs to (ordering key)
+            func: Blocking function to run in the worker pool, or a coroutine
+                function awaited on the loop (it can offload() its blocking parts)
+            *args, **kwargs: Arguments for func
+
+        Returns:
+            Whatever func returns (exceptions are re-raised)
+        """
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = self._chat_locks[chat_id] = asyncio.Lock()
+        self._chat_waiters[chat_id] = self._chat_waiters.get(chat_id, 0) + 1
+
+        try:
+            async with lock:
+                async with self._get_semaphore():
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    started = time.perf_counter()
+                    try:
+                        if asyncio.iscoroutinefunction(func):
+                            result = await func(*args, **kwargs)
+                        else:
+                            result = await self.offload(func, *args, **kwargs)
+                        self.processed += 1
+                        return result
+                    except Exception:
+                        self.failed += 1
+                        raise
+                    finally:
+                        self.in_flight -= 1
+                        self.total_seconds += time.perf_counter() - started
+        finally:
+            # Drop the lock once nobody is waiting on this chat, so idle chats cost nothing
+            self._chat_waiters[chat_id] -= 1
+            if self._chat_waiters[chat_id] == 0:
+                del self._chat_waiters[chat_id]
+                del self._chat_locks[chat_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dispatcher counters"""
+        finished = self.processed + self.failed
+        return {
+            'processed': self.processed,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'active_chats': len(self._chat_locks),
+            'max_concurrent': self.max_concurrent,
+            'avg_seconds': round(self.total_seconds / finished, 3) if finished else 0.0
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool"""
+        self._executor.shutdown(wait=wait)
@@ -21,11 +21,16 @@ import time
 
 # Adaugă calea către modulele noastre
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
 
 try:
-    from intelligence.intent_classifier import IntentClassifier
-    from intelligence.action_handler import ActionHandler
-    from security.filters import SecurityFilter
+    from .container import AppContainer, get_container
+except ImportError:
+    from container import AppContainer, get_container  # Rulare directă a fișierului
+
+try:
+    from utils.session_cache import SessionCache, memory_report
+    from settings import SESSION_CACHE
 except ImportError as e:
     print(f"❌ Eroare la importul modulelor: {e}")
     print("Asigură-te că toate modulele există în structura nouă")
@@ -44,7 +49,7 @@ class XOFlowersInstagramBot:
     Gestionează webhook-urile de la Meta și conectează cu AI-ul
     """
     
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, container: Optional[AppContainer] = None):
         # Store debug flag
         self.debug = debug
         
@@ -62,17 +67,21 @@ class XOFlowersInstagramBot:
         if not self.app_secret:
             raise ValueError("META_APP_SECRET lipsește din .env")
             
-        # Conversații active pentru context
-        self.active_conversations = {}
+        # Conversații active pentru context (doar utilizatorii activi recent)
+        max_users, idle_ttl = SESSION_CACHE['max_users'], SESSION_CACHE['idle_ttl']
+        self.active_conversations = SessionCache('instagram_active', max_users, idle_ttl)
         
         # Store conversation history for each user (similar to Telegram bot)
-        self.user_conversations = {}
+        self.user_conversations = SessionCache('instagram_conversations', max_users, idle_ttl)
         
-        # Initialize AI components
+        # Componentele AI sunt comune pentru tot procesul (vezi api/container.py)
         try:
-            self.intent_classifier = IntentClassifier()
-            self.action_handler = ActionHandler()
-            self.security_filter = SecurityFilter()
+            self.container = container or get_container()
+            self.intent_classifier = self.container.intent_classifier
+            self.action_handler = self.container.action_handler
+            self.security_filter = self.container.security_filter
+            # Limitele de rată se verifică înainte de orice clasificare
+            self.rate_gate = self.security_filter.rate_limit_gate('instagram')
             logger.info("✅ AI Components inițializate cu succes")
         except Exception as e:
             logger.error(f"❌ Eroare la inițializarea AI: {e}")
@@ -180,9 +189,22 @@ class XOFlowersInstagramBot:
                 'total_messages': self.message_count,
                 'active_users': len(self.user_conversations),
                 'ai_status': 'enhanced_core_logic_active',
-                'instagram_configured': bool(self.access_token and self.verify_token)
+                'instagram_configured': bool(self.access_token and self.verify_token),
+                'rate_limit': self.rate_gate.stats(),
+                'memory': self.get_memory_report()
             })
     
+    def get_memory_report(self) -> Dict[str, Any]:
+        """
+        Memoria procesului și dimensiunea fiecărui cache per utilizator
+        """
+        return memory_report({
+            'user_conversations': self.user_conversations,
+            'active_conversations': self.active_conversations,
+            'conversations': self.action_handler.context_manager.sessions,
+            'rate_limiter': self.security_filter.rate_limiter.get_stats()
+        })
+    
     def _verify_signature(self, payload: bytes, signature: str) -> bool:
         """
         Verifică semnătura webhook-ului pentru securitate
@@ -236,6 +258,12 @@ class XOFlowersInstagramBot:
                 
                 logger.info(f"👤 Mesaj de la {sender_id}: {user_message}")
                 
+                # Peste limită: răspuns pregătit, fără clasificare și fără apel LLM
+                if not self.rate_gate.admit(sender_id):
+                    logger.info(f"⏳ Limită de rată depășită pentru {sender_id}")
+                    self._send_message(sender_id, self.rate_gate.rejection)
+                    return
+                
                 # Initialize conversation history if needed
                 if sender_id not in self.user_conversations:
                     self.user_conversations[sender_id] = []
@@ -301,6 +329,11 @@ class XOFlowersInstagramBot:
                 # Tratează ca mesaj normal cu enhanced core logic
                 postback_message = f"Utilizatorul a apăsat: {postback_payload}"
                 
+                # Postback-urile libere trec prin clasificare, deci și prin limita de rată
+                if not self.rate_gate.admit(sender_id):
+                    self._send_message(sender_id, self.rate_gate.rejection)
+                    return
+                
                 # Verifică securitatea și procesează
                 if not self.security_filter.is_message_safe(postback_message):
                     response = "❌ Acțiunea nu este permisă."
@@ -21,15 +21,24 @@ from telegram.ext import (
 from dotenv import load_dotenv
 import json
 from datetime import datetime
+from typing import Any, Optional, Tuple
 
 # Add path to our modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+
+from settings import API_CONFIG, SESSION_CACHE
+
+try:
+    from .dispatcher import MessageDispatcher
+    from .container import AppContainer, get_container
+except ImportError:
+    # Running this file directly
+    from dispatcher import MessageDispatcher
+    from container import AppContainer, get_container
 
 try:
-    from intelligence.intent_classifier import IntentClassifier
-    from intelligence.action_handler import ActionHandler
-    from intelligence.conversation_context import ConversationContext
-    from security.filters import SecurityFilter
+    from utils.session_cache import SessionCache, memory_report
 except ImportError as e:
     print(f"Error importing modules: {e}")
     print("Make sure all modules exist in the new structure")
@@ -48,8 +57,14 @@ load_dotenv()
 class XOFlowersTelegramBot:
     """Enhanced Telegram Bot with AI-powered conversations and context awareness"""
     
-    def __init__(self, debug: bool = False):
-        """Initialize the enhanced Telegram bot"""
+    def __init__(self, debug: bool = False, container: Optional[AppContainer] = None):
+        """
+        Initialize the enhanced Telegram bot
+        
+        Args:
+            debug: Debug mode
+            container: Shared components (defaults to the process-wide container)
+        """
         self.debug = debug
         
         # Get bot token from environment
@@ -59,16 +74,28 @@ class XOFlowersTelegramBot:
             raise ValueError("TELEGRAM_BOT_TOKEN not found in environment variables")
         
         self.token = token
-        self.application = Application.builder().token(token).build()
         
-        # Initialize AI components
-        self.intent_classifier = IntentClassifier()
-        self.action_handler = ActionHandler()
-        self.context_manager = ConversationContext()
-        self.security_filter = SecurityFilter()
+        # Updates are handled concurrently; the dispatcher keeps each chat in order
+        telegram_config = API_CONFIG.get('telegram', {})
+        max_concurrent = telegram_config.get('max_concurrent_messages', 16)
+        self.dispatcher = MessageDispatcher(
+            max_concurrent=max_concurrent,
+            worker_threads=telegram_config.get('worker_threads', 8),
+            thread_name_prefix='telegram-msg'
+        )
+        self.application = Application.builder().token(token).concurrent_updates(max_concurrent).build()
+        
+        # AI components, shared with the handler through the container
+        self.container = container or get_container()
+        self.intent_classifier = self.container.intent_classifier
+        self.action_handler = self.container.action_handler
+        self.context_manager = self.container.context_manager
+        self.security_filter = self.container.security_filter
+        # Rate limits are checked before any classification work
+        self.rate_gate = self.security_filter.rate_limit_gate('telegram')
         
-        # User statistics
-        self.user_stats = {}
+        # User statistics (bounded: only recently active users)
+        self.user_stats = SessionCache('telegram_users', SESSION_CACHE['max_users'], SESSION_CACHE['idle_ttl'])
         
         # Setup handlers
         self.setup_handlers()
@@ -136,7 +163,17 @@ class XOFlowersTelegramBot:
         user_id = str(user.id)
         message = update.message.text
         
-        # Update user stats
+        # Over the limit: canned reply, no LLM call (a shared backend's hit runs in the worker pool)
+        if self.rate_gate.blocking:
+            admitted = await self.dispatcher.offload(self.rate_gate.admit, user_id)
+        else:
+            admitted = self.rate_gate.admit(user_id)
+        if not admitted:
+            logger.info(f"⏳ Rate limited {user.first_name} (ID: {user_id})")
+            await update.message.reply_text(self.rate_gate.rejection)
+            return
+        
+        # Update user stats (admitted messages only; rejections are counted by the gate)
         if user_id not in self.user_stats:
             self.user_stats[user_id] = {
                 'name': user.first_name,
@@ -146,15 +183,17 @@ class XOFlowersTelegramBot:
         self.user_stats[user_id]['messages_count'] += 1
         
         try:
-            # Security check
-            if not self.security_filter.is_safe_message(message):
+            # Blocking pipeline runs in the worker pool, in order per chat
+            outcome = await self.dispatcher.run(self._chat_key(update), self._aprocess_message, message, user_id)
+            
+            # Security check failed
+            if outcome is None:
                 await update.message.reply_text(
                     "🌸 Îmi pare rău, dar prefer să păstrăm conversația profesională și elegantă. \n\nCum vă pot ajuta cu serviciile XOFlowers?"
                 )
                 return
             
-            # Process message with enhanced AI
-            response, intent, confidence = self.action_handler.handle_message(message, user_id)
+            response, intent, confidence = outcome
             
             # Log interaction
             logger.info(f"📨 Message from {user.first_name}: '{message}' -> Intent: {intent} (confidence: {confidence:.2f})")
@@ -168,6 +207,50 @@ class XOFlowersTelegramBot:
                 "🌸 Îmi pare rău, am întâmpinat o problemă tehnică. Vă rugăm să încercați din nou sau contactați direct +373 22 123 456."
             )
     
+    async def _aprocess_message(self, message: str, user_id: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Security check, intent classification, routing and persistence
+        
+        Only the blocking stages (security check, local classification, routing and
+        persistence) take a worker thread; the LLM classification is awaited on the
+        event loop, so waiting on it holds none.
+        
+        Returns:
+            Optional[Tuple[str, str, float]]: (response, intent, confidence), None if the message is unsafe
+        """
+        if not await self.dispatcher.offload(self.security_filter.is_safe_message, message):
+            return None
+        # One keyword scan for classification and routing (microseconds, fine on the loop)
+        hits = self.intent_classifier.scan_message(message)
+        intent, confidence = await self.intent_classifier.aclassify_intent(
+            message, user_id, offload=self.dispatcher.offload, hits=hits
+        )
+        return await self.dispatcher.offload(self.action_handler.respond, message, user_id, intent, confidence, hits)
+    
+    @staticmethod
+    def _chat_key(update: Update) -> str:
+        """Ordering key for the dispatcher"""
+        if update.effective_chat is not None:
+            return str(update.effective_chat.id)
+        return str(update.effective_user.id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Message counters (rate limit gate, dispatcher) and per-user memory"""
+        return {
+            'users': len(self.user_stats),
+            'rate_limit': self.rate_gate.stats(),
+            'dispatcher': self.dispatcher.get_stats(),
+            'memory': self.get_memory_report()
+        }
+    
+    def get_memory_report(self) -> Dict[str, Any]:
+        """Process RSS and the size of every per-user cache"""
+        return memory_report({
+            'user_stats': self.user_stats,
+            'conversations': self.context_manager.sessions,
+            'rate_limiter': self.security_filter.rate_limiter.get_stats()
+        })
+    
     async def menu_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Main menu command"""
         menu_text = """
@@ -191,12 +274,16 @@ class XOFlowersTelegramBot:
     
     async def offers_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Special offers command"""
-        response = self.action_handler.handle_seasonal_offers("oferte speciale")
+        response = await self.dispatcher.run(
+            self._chat_key(update), self.action_handler.handle_seasonal_offers, "oferte speciale"
+        )
         await update.message.reply_text(response, parse_mode='Markdown')
     
     async def prices_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Prices command"""
-        response = self.action_handler.handle_price_inquiry("prețuri")
+        response = await self.dispatcher.run(
+            self._chat_key(update), self.action_handler.handle_price_inquiry, "prețuri"
+        )
         await update.message.reply_text(response, parse_mode='Markdown')
     
     async def contact_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -0,0 +1,424 @@
+"""
+Product Catalog for XOFlowers AI Agent
+Compact, column-oriented product catalog loaded once from the CSV and shared
+by the keyword search engine and the vector search engine
+"""
+
+import os
+import re
+import csv
+import sys
+import threading
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+CATALOG_FILES = ('final_products_case_standardized.csv', 'chunks_data.csv')
+
+# Terms recognised in product descriptions (used by keyword search)
+FLOWER_TERMS = [
+    'trandafir', 'bujor', 'peony', 'rose', 'hydrangea', 'gerbera', 'crizantema',
+    'lalea', 'narcisă', 'zambile', 'frezii', 'cala', 'orhidee', 'garoafă',
+    'lăcrimioare', 'eucalipt', 'viburnum', 'delphinium', 'scabiosa', 'eustoma',
+    'anthurium', 'mattiola', 'spray', 'alstroemeria', 'solidago', 'lisianthus',
+    'dianthus', 'wax flower', 'gypsophila', 'chrysanthemum', 'freesia', 'tulip'
+]
+
+COLOR_TERMS = [
+    'roșu', 'roz', 'alb', 'galben', 'violet', 'albastru', 'portocaliu',
+    'verde', 'negru', 'cremă', 'pastel', 'coral', 'liliac', 'lavanda'
+]
+
+OCCASION_TERMS = [
+    'nuntă', 'aniversare', 'ziua nașterii', 'valentine', 'mama', 'dragoste',
+    'romantic', 'elegant', 'luxury', 'premium', 'corporate', 'funeral',
+    'primăvară', 'vară', 'toamnă', 'iarnă', 'cadou', 'surpriză'
+]
+
+
+KEYWORD_TERMS = FLOWER_TERMS + COLOR_TERMS + OCCASION_TERMS
+
+
+def extract_product_name(description: str) -> str:
+    """Extract a short product name from its description"""
+    # Look for quoted names or capitalize first part
+    if '"' in description:
+        match = re.search(r'"([^"]+)"', description)
+        if match:
+            return match.group(1)
+
+    # Extract name before first dash or description
+    parts = description.split(' - ')
+    if len(parts) > 1:
+        return parts[0].strip()
+
+    # Take first meaningful part
+    words = description.split()
+    if len(words) > 3:
+        return ' '.join(words[:3])
+
+    return description[:50] + '...' if len(description) > 50 else description
+
+
+def extract_keywords(description: str) -> List[str]:
+    """Flower, color and occasion terms found in a product description"""
+    text = description.lower()
+    return [term for term in KEYWORD_TERMS if term in text]
+
+
+def file_version(path: str) -> str:
+    """Modification time and size of a catalog file, changes whenever the file is rewritten"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def format_price(price: float) -> str:
+    """Price as the catalog shows it: '660' for 660.0, '0' when unknown"""
+    return str(int(price)) if float(price).is_integer() else str(price)
+
+
+def _parse_price(value: str) -> float:
+    try:
+        return float(re.sub(r'[^\d.]', '', str(value or '')))
+    except ValueError:
+        return 0.0
+
+
+class ProductRecord:
+    """
+    Read-only view of one catalog row
+
+    Supports the dict access the search engines already use (record['price'],
+    record.get('url'), record.copy()) without holding a dict per product.
+    """
+
+    __slots__ = ('_catalog', 'index')
+
+    FIELDS = (
+        'id', 'name', 'description', 'price', 'category', 'collection_id',
+        'flower_type', 'url', 'url_fixed', 'original_url', 'keywords',
+        'is_verified', 'url_functional', 'product_exists'
+    )
+
+    def __init__(self, catalog: 'ProductCatalog', index: int):
+        self._catalog = catalog
+        self.index = index
+
+    @property
+    def price_value(self) -> float:
+        return float(self._catalog.prices[self.index])
+
+    def __getitem__(self, key: str):
+        getter = self._catalog._getters.get(key)
+        if getter is None:
+            raise KeyError(key)
+        return getter(self.index)
+
+    def get(self, key: str, default=None):
+        getter = self._catalog._getters.get(key)
+        return default if getter is None else getter(self.index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._catalog._getters
+
+    def keys(self):
+        return self.FIELDS
+
+    def copy(self) -> Dict[str, Any]:
+        """Plain dict copy (callers add fields such as relevance_score)"""
+        return {key: self[key] for key in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"ProductRecord({self['id']!r}, {self['name']!r})"
+
+
+class PriceIndex:
+    """
+    Prices sorted once for logarithmic range lookups, overall and per category
+
+    Positions refer to the arrays the index was built from; products with
+    equal prices keep their original order.
+    """
+
+    def __init__(self, prices: np.ndarray, category_codes: np.ndarray):
+        """
+        Build the index
+
+        Args:
+            prices: Price per position
+            category_codes: Category code per position
+        """
+        self.order = np.argsort(prices, kind='stable')
+        self.sorted_prices = prices[self.order]
+        self._by_category: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for code in np.unique(category_codes):
+            positions = np.flatnonzero(category_codes == code)
+            order = positions[np.argsort(prices[positions], kind='stable')]
+            self._by_category[int(code)] = (order, prices[order])
+
+    @staticmethod
+    def _bounds(sorted_prices: np.ndarray, price_min: Optional[float], price_max: Optional[float]) -> Tuple[int, int]:
+        low = 0 if price_min is None else int(np.searchsorted(sorted_prices, price_min, side='left'))
+        high = len(sorted_prices) if price_max is None else int(np.searchsorted(sorted_prices, price_max, side='right'))
+        return low, max(low, high)
+
+    def range(self, price_min: Optional[float] = None, price_max: Optional[float] = None,
+              category_code: Optional[int] = None) -> np.ndarray:
+        """
+        Positions with price_min <= price <= price_max, cheapest first
+
+        Args:
+            price_min: Lower bound (inclusive), None for no bound
+            price_max: Upper bound (inclusive), None for no bound
+            category_code: Restrict to one category
+        """
+        if category_code is None:
+            order, sorted_prices = self.order, self.sorted_prices
+        else:
+            order, sorted_prices = self._by_category.get(category_code, (self.order[:0], self.sorted_prices[:0]))
+        low, high = self._bounds(sorted_prices, price_min, price_max)
+        return order[low:high]
+
+    def count(self, price_min: Optional[float] = None, price_max: Optional[float] = None,
+              category_codes: Optional[Iterable[int]] = None) -> int:
+        """Number of positions in a price range, optionally within some categories"""
+        if category_codes is None:
+            low, high = self._bounds(self.sorted_prices, price_min, price_max)
+            return high - low
+        total = 0
+        for code in category_codes:
+            entry = self._by_category.get(code)
+            if entry is not None:
+                low, high = self._bounds(entry[1], price_min, price_max)
+                total += high - low
+        return total
+
+
+class ProductCatalog:
+    """
+    Product catalog stored column-wise
+
+    Prices, category codes and flags are NumPy arrays; repeated strings are
+    interned. Category and price aggregates are computed once at load time.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]], source: str = '', version: str = ''):
+        """
+        Build the catalog from CSV product rows
+
+        Args:
+            rows: CSV rows with chunk_type == 'product'
+            source: Path the rows were read from
+            version: Identifies the file contents the rows came from
+        """
+        self.source = source
+        self.version = version
+        size = len(rows)
+        intern = sys.intern
+
+        self.ids = [intern(row.get('chunk_id', '')) for row in rows]
+        self.descriptions = [row.get('primary_text', '') for row in rows]
+        self.names = [extract_product_name(text) for text in self.descriptions]
+        self.flower_types = [intern(row.get('flower_type', '')) for row in rows]
+        self.collection_ids = [intern(row.get('collection_id', '')) for row in rows]
+        self.urls = [row.get('url', '') for row in rows]
+        self.urls_fixed = [row.get('url_fixed', '') for row in rows]
+        self.urls_original = [row.get('original_url', '') for row in rows]
+        self.keywords = [tuple(intern(k) for k in extract_keywords(text)) for text in self.descriptions]
+
+        self.prices = np.array([_parse_price(row.get('price', '')) for row in rows], dtype=np.float64)
+
+        self.category_names: List[str] = []
+        category_codes: Dict[str, int] = {}
+        codes = np.empty(size, dtype=np.int16)
+        for i, row in enumerate(rows):
+            category = row.get('category', '')
+            if category not in category_codes:
+                category_codes[category] = len(self.category_names)
+                self.category_names.append(intern(category))
+            codes[i] = category_codes[category]
+        self.category_codes = codes
+        self._category_index = category_codes
+
+        self.is_verified = np.array([row.get('is_verified') == 'True' for row in rows], dtype=bool)
+        self.url_functional = np.array([row.get('url_functional') == 'True' for row in rows], dtype=bool)
+        self.product_exists = np.array([row.get('product_exists') == 'True' for row in rows], dtype=bool)
+
+        # Products that can be recommended: exist, have text and a price
+        has_text = np.array([bool(text.strip()) for text in self.descriptions], dtype=bool)
+        self.valid_mask = self.product_exists & has_text & (self.prices > 0)
+
+        # First occurrence wins for duplicated ids
+        self.id_index: Dict[str, int] = {}
+        for i, product_id in enumerate(self.ids):
+            self.id_index.setdefault(product_id, i)
+
+        flag = lambda column: (lambda i: 'True' if column[i] else 'False')
+        self._getters = {
+            'id': self.ids.__getitem__,
+            'name': self.names.__getitem__,
+            'description': self.descriptions.__getitem__,
+            'price': lambda i: format_price(self.prices[i]),
+            'category': lambda i: self.category_names[self.category_codes[i]],
+            'collection_id': self.collection_ids.__getitem__,
+            'flower_type': self.flower_types.__getitem__,
+            'url': self.urls.__getitem__,
+            'url_fixed': self.urls_fixed.__getitem__,
+            'original_url': self.urls_original.__getitem__,
+            'keywords': lambda i: list(self.keywords[i]),
+            'is_verified': flag(self.is_verified),
+            'url_functional': flag(self.url_functional),
+            'product_exists': flag(self.product_exists),
+        }
+
+        self.records = [ProductRecord(self, i) for i in range(size)]
+
+        # Price index over the valid products; positions match valid_records()
+        self.valid_indices = np.flatnonzero(self.valid_mask)
+        self.price_index = PriceIndex(self.prices[self.valid_indices], self.category_codes[self.valid_indices])
+        self._aggregates = {True: self._compute_aggregates(self.valid_mask),
+                            False: self._compute_aggregates(np.ones(size, dtype=bool))}
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> 'ProductCatalog':
+        """Load product rows from a CSV file"""
+        version = file_version(csv_path)
+        with open(csv_path, 'r', encoding='utf-8') as file:
+            rows = [row for row in csv.DictReader(file) if row.get('chunk_type') == 'product']
+        return cls(rows, source=csv_path, version=version)
+
+    def _compute_aggregates(self, mask: np.ndarray) -> Dict[str, Any]:
+        codes = self.category_codes[mask]
+        prices = self.prices[mask]
+        counts = np.bincount(codes, minlength=len(self.category_names))
+
+        categories = {}
+        for code, count in enumerate(counts):
+            if not count:
+                continue
+            category_prices = prices[codes == code]
+            priced = category_prices[category_prices > 0]
+            categories[self.category_names[code]] = {
+                'count': int(count),
+                'min_price': float(priced.min()) if priced.size else 0.0,
+                'max_price': float(priced.max()) if priced.size else 0.0,
+                'avg_price': round(float(priced.mean()), 1) if priced.size else 0.0
+            }
+
+        priced = prices[prices > 0]
+        return {
+            'total_products': int(mask.sum()),
+            'verified_products': int((self.is_verified & mask).sum()),
+            'functional_urls': int((self.url_functional & mask).sum()),
+            'categories': categories,
+            'price_min': float(priced.min()) if priced.size else 0.0,
+            'price_max': float(priced.max()) if priced.size else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[ProductRecord]:
+        return iter(self.records)
+
+    def get(self, product_id: str) -> Optional[ProductRecord]:
+        """O(1) lookup by product id"""
+        index = self.id_index.get(product_id)
+        return None if index is None else self.records[index]
+
+    def valid_records(self) -> List[ProductRecord]:
+        """Products that exist, have a description and a positive price"""
+        return [self.records[i] for i in self.valid_indices]
+
+    def by_category(self, category: str, valid_only: bool = True) -> List[ProductRecord]:
+        """Products of a category, in catalog order"""
+        code = self._category_index.get(category)
+        if code is None:
+            return []
+        mask = self.category_codes == code
+        if valid_only:
+            mask &= self.valid_mask
+        return [self.records[i] for i in np.flatnonzero(mask)]
+
+    def category_code(self, category: str) -> Optional[int]:
+        """Numeric code of a category name"""
+        return self._category_index.get(category)
+
+    def count_in_price_range(self, price_min: Optional[float] = None, price_max: Optional[float] = None,
+                             categories: Optional[Iterable[str]] = None) -> int:
+        """
+        Number of valid products in a price range
+
+        Args:
+            price_min: Lower bound (inclusive)
+            price_max: Upper bound (inclusive)
+            categories: Restrict to these category names
+        """
+        codes = None
+        if categories is not None:
+            codes = [code for code in (self._category_index.get(name) for name in categories) if code is not None]
+        return self.price_index.count(price_min, price_max, codes)
+
+    def categories(self, valid_only: bool = True) -> List[str]:
+        """Sorted category names"""
+        return sorted(self._aggregates[valid_only]['categories'])
+
+    def category_stats(self, valid_only: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Per-category product count and price range"""
+        return self._aggregates[valid_only]['categories']
+
+    def summary(self, valid_only: bool = True) -> Dict[str, Any]:
+        """Precomputed totals: products, verified, functional URLs, categories, price range"""
+        aggregates = self._aggregates[valid_only]
+        return {
+            'total_products': aggregates['total_products'],
+            'verified_products': aggregates['verified_products'],
+            'functional_urls': aggregates['functional_urls'],
+            'categories_count': len(aggregates['categories']),
+            'price_min': aggregates['price_min'],
+            'price_max': aggregates['price_max']
+        }
+
+
+_catalogs: Dict[str, ProductCatalog] = {}
+_lock = threading.Lock()
+
+
+def find_catalog_file(filename: Optional[str] = None) -> Optional[str]:
+    """Path of the catalog CSV (the standardized file, falling back to chunks_data.csv)"""
+    candidates = [filename] if filename else []
+    candidates += [name for name in CATALOG_FILES if name != filename]
+    for name in candidates:
+        path = name if os.path.isabs(name) else os.path.join(DATA_DIR, name)
+        if os.path.exists(path):
+            return os.path.abspath(path)
+    return None
+
+
+def get_catalog(filename: Optional[str] = None) -> ProductCatalog:
+    """
+    Get the shared product catalog, loading it on first request
+
+    The file is re-read when it changed on disk since it was loaded (e.g. a
+    price update before a reindex), so callers that ask again get current prices.
+
+    Args:
+        filename: CSV file name in data/ (or an absolute path)
+
+    Returns:
+        ProductCatalog shared by every caller using the same file
+    """
+    path = find_catalog_file(filename)
+    if path is None:
+        raise FileNotFoundError(f"No catalog file found in {os.path.abspath(DATA_DIR)}")
+
+    version = file_version(path)
+    catalog = _catalogs.get(path)
+    if catalog is None or catalog.version != version:
+        with _lock:
+            catalog = _catalogs.get(path)
+            if catalog is None or catalog.version != version:
+                catalog = ProductCatalog.from_csv(path)
+                _catalogs[path] = catalog
+    return catalog
@@ -0,0 +1,200 @@
+"""
+Incremental Catalog Sync for XOFlowers AI Agent
+Brings a ChromaDB collection in line with the catalog without dropping it:
+only new or changed documents are re-embedded, metadata-only changes are
+updated in place and removed products are deleted
+"""
+
+import json
+import time
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+# Metadata keys holding the fingerprints of what was indexed
+CONTENT_HASH_KEY = 'content_hash'
+METADATA_HASH_KEY = 'metadata_hash'
+
+# (id, document, metadata)
+CatalogRecord = Tuple[str, str, Dict[str, Any]]
+
+
+def content_hash(document: str) -> str:
+    """Fingerprint of the text that gets embedded"""
+    return hashlib.sha1(document.encode('utf-8')).hexdigest()
+
+
+def metadata_hash(metadata: Dict[str, Any]) -> str:
+    """Fingerprint of a metadata dict (key order does not matter)"""
+    payload = json.dumps(metadata, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class SyncReport:
+    """Outcome of one sync run"""
+    added: int = 0
+    reembedded: int = 0
+    reused: int = 0
+    metadata_updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+    batch_times: List[float] = field(default_factory=list)
+
+    @property
+    def embedded(self) -> int:
+        return self.added + self.reembedded
+
+    def summary(self) -> str:
+        return (f"+{self.added} new, ~{self.reembedded} re-embedded, {self.reused} vectors reused, "
+                f"{self.metadata_updated} metadata-only, -{self.deleted} removed, "
+                f"{self.unchanged} unchanged in {self.seconds:.2f}s")
+
+
+class CatalogSync:
+    """
+    Syncs catalog records into a collection using content hashes stored in metadata
+    """
+
+    def __init__(self, collection, embed: Callable[[List[str]], List[List[float]]], batch_size: int = 128,
+                 source=None, on_batch: Optional[Callable[[int, int, SyncReport], None]] = None):
+        """
+        Initialize the sync engine
+
+        Args:
+            collection: ChromaDB collection to keep up to date
+            embed: Function embedding a list of documents
+            batch_size: Records per embed + upsert call
+            source: Optional collection to copy vectors from when the content hash
+                matches (used when building a new collection version)
+            on_batch: Progress callback called after each embedded batch with
+                (records written so far, records to write, report so far)
+        """
+        self.collection = collection
+        self.embed = embed
+        self.batch_size = batch_size
+        self.source = source
+        self.on_batch = on_batch
+
+    def _existing_fingerprints(self) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        existing = self.collection.get(include=['metadatas'])
+        fingerprints = {}
+        for product_id, metadata in zip(existing['ids'], existing['metadatas'] or []):
+            metadata = metadata or {}
+            fingerprints[product_id] = (metadata.get(CONTENT_HASH_KEY), metadata.get(METADATA_HASH_KEY))
+        return fingerprints
+
+    def _source_vectors(self, batch) -> Dict[str, Any]:
+        """Vectors from the source collection whose document is unchanged"""
+        if self.source is None:
+            return {}
+        found = self.source.get(ids=[product_id for product_id, _, _, _ in batch],
+                                include=['embeddings', 'metadatas'])
+        wanted = {product_id: metadata[CONTENT_HASH_KEY] for product_id, _, metadata, _ in batch}
+        embeddings = found.get('embeddings')
+        vectors = {}
+        if embeddings is None:
+            return vectors
+        for product_id, vector, metadata in zip(found['ids'], embeddings, found['metadatas']):
+            if (metadata or {}).get(CONTENT_HASH_KEY) == wanted.get(product_id):
+                vectors[product_id] = vector.tolist() if hasattr(vector, 'tolist') else list(vector)
+        return vectors
+
+    def plan(self, records: List[CatalogRecord]) -> Dict[str, Any]:
+        """
+        Work out what a sync would change
+
+        Returns:
+            Dict with 'embed' and 'update' record lists (metadata already
+            fingerprinted), 'delete' ids and the 'unchanged' count
+        """
+        existing = self._existing_fingerprints()
+        to_embed, to_update = [], []
+        unchanged = 0
+
+        # Duplicated ids keep their last occurrence, like a sequence of upserts would
+        incoming = {product_id: (document, metadata) for product_id, document, metadata in records}
+
+        for product_id, (document, metadata) in incoming.items():
+            doc_hash = content_hash(document)
+            meta_hash = metadata_hash(metadata)
+            stored = dict(metadata)
+            stored[CONTENT_HASH_KEY] = doc_hash
+            stored[METADATA_HASH_KEY] = meta_hash
+
+            previous = existing.get(product_id)
+            if previous is None or previous[0] != doc_hash:
+                to_embed.append((product_id, document, stored, previous is None))
+            elif previous[1] != meta_hash:
+                to_update.append((product_id, stored))
+            else:
+                unchanged += 1
+
+        return {
+            'embed': to_embed,
+            'update': to_update,
+            'delete': [product_id for product_id in existing if product_id not in incoming],
+            'unchanged': unchanged
+        }
+
+    def sync(self, records: List[CatalogRecord]) -> SyncReport:
+        """
+        Apply the catalog to the collection
+
+        New and changed documents are written before removed ones are deleted,
+        so live searches never see an empty collection.
+
+        Args:
+            records: Full catalog as (id, document, metadata) tuples
+
+        Returns:
+            SyncReport: What changed
+        """
+        started = time.perf_counter()
+        plan = self.plan(records)
+        report = SyncReport(unchanged=plan['unchanged'])
+
+        to_embed = plan['embed']
+        for start in range(0, len(to_embed), self.batch_size):
+            batch = to_embed[start:start + self.batch_size]
+            batch_started = time.perf_counter()
+            documents = [document for _, document, _, _ in batch]
+
+            vectors = self._source_vectors(batch)
+            missing = [(product_id, document) for product_id, document, _, _ in batch if product_id not in vectors]
+            if missing:
+                computed = self.embed([document for _, document in missing])
+                vectors.update(zip([product_id for product_id, _ in missing], computed))
+            embedded = {product_id for product_id, _ in missing}
+            report.reused += len(batch) - len(missing)
+
+            self.collection.upsert(
+                ids=[product_id for product_id, _, _, _ in batch],
+                embeddings=[vectors[product_id] for product_id, _, _, _ in batch],
+                documents=documents,
+                metadatas=[metadata for _, _, metadata, _ in batch]
+            )
+            report.batch_times.append(time.perf_counter() - batch_started)
+            # Copied vectors count as reused, not as added or re-embedded
+            report.added += sum(1 for product_id, _, _, is_new in batch if is_new and product_id in embedded)
+            report.reembedded += sum(1 for product_id, _, _, is_new in batch if not is_new and product_id in embedded)
+            if self.on_batch:
+                self.on_batch(start + len(batch), len(to_embed), report)
+
+        to_update = plan['update']
+        for start in range(0, len(to_update), self.batch_size):
+            batch = to_update[start:start + self.batch_size]
+            # Vectors are left untouched for metadata-only changes (e.g. price)
+            self.collection.update(
+                ids=[product_id for product_id, _ in batch],
+                metadatas=[metadata for _, metadata in batch]
+            )
+            report.metadata_updated += len(batch)
+
+        if plan['delete']:
+            self.collection.delete(ids=plan['delete'])
+            report.deleted = len(plan['delete'])
+
+        report.seconds = time.perf_counter() - started
+        return report
@@ -0,0 +1,204 @@
+"""
+Collection Aliases for XOFlowers AI Agent
+Maps logical collection names (all_products, flowers_only) to versioned
+physical collections (all_products__v3) so a new version can be built in
+the background and promoted atomically, keeping the previous one for rollback
+"""
+
+import os
+import json
+import threading
+from typing import Dict, Optional, Any, Set
+
+ALIASES_FILENAME = 'collection_aliases.json'
+# One lease file per process listing the versions it is bound to
+READERS_DIRNAME = 'collection_readers'
+
+
+def versioned_name(name: str, version: int) -> str:
+    """
+    Physical collection name for a logical name and version
+
+    Version 0 is the legacy, unversioned collection.
+    """
+    return name if version == 0 else f"{name}__v{version}"
+
+
+class CollectionAliases:
+    """
+    Alias pointers stored as a small JSON file next to the ChromaDB data
+
+    The file is replaced atomically, so readers in any process see either the
+    old or the new pointers, never a partial write.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the alias store
+
+        Args:
+            db_path: ChromaDB directory holding the alias file
+        """
+        self.path = os.path.join(db_path, ALIASES_FILENAME)
+        self.readers_path = os.path.join(db_path, READERS_DIRNAME)
+        self._lock = threading.Lock()
+        self._aliases: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[float] = None
+        self.reload()
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self) -> bool:
+        """
+        Re-read the alias file if it changed on disk
+
+        Returns:
+            bool: True if the pointers changed
+        """
+        mtime = self._file_mtime()
+        if mtime == self._mtime:
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                aliases = json.load(f)
+        except (OSError, ValueError):
+            aliases = {}
+        with self._lock:
+            changed = aliases != self._aliases
+            self._aliases = aliases
+            self._mtime = mtime
+        return changed
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._aliases, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime = self._file_mtime()
+
+    def current(self, name: str) -> int:
+        """Live version of a collection (0 = legacy unversioned collection)"""
+        return self._aliases.get(name, {}).get('current', 0)
+
+    def previous(self, name: str) -> Optional[int]:
+        """Version kept for rollback, if any"""
+        return self._aliases.get(name, {}).get('previous')
+
+    def resolve(self, name: str) -> str:
+        """Physical name of the live collection"""
+        return versioned_name(name, self.current(name))
+
+    def next_version(self, name: str) -> int:
+        """Version number for the next build"""
+        entry = self._aliases.get(name, {})
+        return max(entry.get('current', 0), entry.get('latest', 0)) + 1
+
+    def promote(self, versions: Dict[str, int]):
+        """
+        Point aliases at new versions in one atomic write
+
+        Args:
+            versions: Logical name -> version to make live
+        """
+        with self._lock:
+            for name, version in versions.items():
+                entry = self._aliases.setdefault(name, {})
+                entry['previous'] = entry.get('current', 0)
+                entry['current'] = version
+                entry['latest'] = max(entry.get('latest', 0), version)
+            self._save()
+
+    def rollback(self, names) -> Dict[str, int]:
+        """
+        Swap the live and previous versions back
+
+        Returns:
+            Dict[str, int]: Logical name -> version that is live after the rollback
+        """
+        restored = {}
+        with self._lock:
+            for name in names:
+                entry = self._aliases.get(name, {})
+                if entry.get('previous') is None:
+                    continue
+                entry['current'], entry['previous'] = entry['previous'], entry['current']
+                restored[name] = entry['current']
+            if restored:
+                self._save()
+        return restored
+
+    def register_reader(self, versions: Dict[str, int]):
+        """
+        Record the versions this process is bound to
+
+        Versions listed by a live process are not dropped, so a process keeps
+        its collections until it has refreshed to the promoted ones.
+
+        Args:
+            versions: Logical name -> version this process queries
+        """
+        os.makedirs(self.readers_path, exist_ok=True)
+        lease_path = os.path.join(self.readers_path, f"{os.getpid()}.json")
+        tmp_path = f"{lease_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(versions, f)
+        os.replace(tmp_path, lease_path)
+
+    def unregister_reader(self):
+        """Remove this process' lease"""
+        try:
+            os.remove(os.path.join(self.readers_path, f"{os.getpid()}.json"))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def versions_in_use(self) -> Dict[str, Set[int]]:
+        """
+        Versions still bound by running processes (leases of exited processes are removed)
+
+        Returns:
+            Dict[str, Set[int]]: Logical name -> versions in use
+        """
+        in_use: Dict[str, Set[int]] = {}
+        try:
+            lease_files = os.listdir(self.readers_path)
+        except OSError:
+            return in_use
+        for lease_file in lease_files:
+            pid, extension = os.path.splitext(lease_file)
+            if extension != '.json' or not pid.isdigit():
+                continue
+            lease_path = os.path.join(self.readers_path, lease_file)
+            if not self._process_alive(int(pid)):
+                try:
+                    os.remove(lease_path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(lease_path, 'r', encoding='utf-8') as f:
+                    versions = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, version in versions.items():
+                in_use.setdefault(name, set()).add(version)
+        return in_use
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of all alias pointers"""
+        with self._lock:
+            return json.loads(json.dumps(self._aliases))
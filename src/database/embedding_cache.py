@@ -0,0 +1,260 @@
+"""
+Query Embedding Cache for XOFlowers AI Agent
+Normalized query -> embedding cache with LRU eviction and an optional
+memory-mapped on-disk store that survives restarts
+"""
+
+import os
+import json
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Callable
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different spellings share one cache entry"""
+    return " ".join(unicodedata.normalize('NFC', query).lower().split())
+
+
+class MemmapEmbeddingStore:
+    """
+    Fixed-capacity on-disk embedding store
+
+    Vectors live in a memory-mapped float32 matrix; keys are appended to a
+    line-delimited index. Rows are reused in ring order once capacity is
+    reached, and the index is rewritten when it grows past twice the capacity.
+    """
+
+    def __init__(self, path: str, model_name: str, dim: int, capacity: int = 8192):
+        """
+        Open or create the store
+
+        Args:
+            path: Directory holding the store files
+            model_name: Embedding model the vectors belong to
+            dim: Embedding dimension
+            capacity: Maximum number of stored vectors
+        """
+        self.path = path
+        self.model_name = model_name
+        self.dim = dim
+        self.capacity = capacity
+        self.rows: Dict[str, int] = {}
+        self.keys_by_row: Dict[int, str] = {}
+        self.next_row = 0
+        self.index_lines = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._meta_file = os.path.join(path, 'meta.json')
+        self._vectors_file = os.path.join(path, 'vectors.f32')
+        self._keys_file = os.path.join(path, 'keys.jsonl')
+
+        if not self._meta_matches():
+            self._reset()
+
+        mode = 'r+' if os.path.exists(self._vectors_file) else 'w+'
+        self.vectors = np.memmap(self._vectors_file, dtype=np.float32, mode=mode, shape=(capacity, dim))
+        self._load_index()
+        self._keys_handle = open(self._keys_file, 'a', encoding='utf-8')
+
+    def _meta_matches(self) -> bool:
+        try:
+            with open(self._meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            return meta == {'model_name': self.model_name, 'dim': self.dim, 'capacity': self.capacity}
+        except (OSError, ValueError):
+            return False
+
+    def _reset(self):
+        """Drop stored vectors (new store, or model/shape changed)"""
+        for file_path in (self._vectors_file, self._keys_file):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        with open(self._meta_file, 'w', encoding='utf-8') as f:
+            json.dump({'model_name': self.model_name, 'dim': self.dim, 'capacity': self.capacity}, f)
+
+    def _load_index(self):
+        if not os.path.exists(self._keys_file):
+            return
+        with open(self._keys_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line after a crash
+                self._assign(entry['q'], entry['row'])
+                self.next_row = (entry['row'] + 1) % self.capacity
+                self.index_lines += 1
+
+    def _assign(self, key: str, row: int):
+        previous_key = self.keys_by_row.get(row)
+        if previous_key is not None and self.rows.get(previous_key) == row:
+            del self.rows[previous_key]
+        self.rows[key] = row
+        self.keys_by_row[row] = key
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Get a stored vector"""
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return self.vectors[row].tolist()
+
+    def put(self, key: str, vector: List[float]):
+        """Store a vector, overwriting the oldest row when full"""
+        if key in self.rows:
+            return
+        row = self.next_row
+        self.next_row = (row + 1) % self.capacity
+
+        # Vector first, then the index line, so the index never points at an unwritten row
+        self.vectors[row] = vector
+        self._assign(key, row)
+        self._keys_handle.write(json.dumps({'q': key, 'row': row}, ensure_ascii=False) + "\n")
+        self._keys_handle.flush()
+        self.index_lines += 1
+
+        if self.index_lines > 2 * self.capacity:
+            self._compact_index()
+
+    def _compact_index(self):
+        """Rewrite the key index with only live entries (atomic replace)"""
+        tmp_file = self._keys_file + '.tmp'
+        live = sorted(self.rows.items(), key=lambda item: (item[1] - self.next_row) % self.capacity)
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for key, row in live:
+                f.write(json.dumps({'q': key, 'row': row}, ensure_ascii=False) + "\n")
+        self._keys_handle.close()
+        os.replace(tmp_file, self._keys_file)
+        self._keys_handle = open(self._keys_file, 'a', encoding='utf-8')
+        self.index_lines = len(live)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def close(self):
+        """Flush vectors and close the index"""
+        self.vectors.flush()
+        self._keys_handle.close()
+
+
+class QueryEmbeddingCache:
+    """
+    In-memory LRU of query embeddings, optionally backed by a MemmapEmbeddingStore
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 2048,
+                 persist_path: Optional[str] = None, disk_capacity: int = 8192):
+        """
+        Initialize the cache
+
+        Args:
+            model_name: Embedding model the cached vectors belong to
+            max_entries: Maximum number of in-memory entries
+            persist_path: Directory for the on-disk store (None disables it)
+            disk_capacity: Maximum number of vectors kept on disk
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.disk_capacity = disk_capacity
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._disk: Optional[MemmapEmbeddingStore] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # The store needs the embedding dimension, so an existing one is opened eagerly
+        if persist_path:
+            self._open_existing_store()
+
+    def _open_existing_store(self):
+        meta_file = os.path.join(self.persist_path, 'meta.json')
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('model_name') == self.model_name:
+                self._disk = MemmapEmbeddingStore(self.persist_path, self.model_name,
+                                                  meta['dim'], self.disk_capacity)
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(meta_file):
+                print(f"⚠️ Could not open query embedding store: {e}")
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """Get a cached embedding for a query"""
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self._disk is not None:
+                vector = self._disk.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, vector: List[float]):
+        """Cache an embedding for a query"""
+        key = normalize_query(query)
+        with self._lock:
+            self._remember(key, vector)
+            if self.persist_path:
+                if self._disk is None:
+                    self._disk = MemmapEmbeddingStore(self.persist_path, self.model_name,
+                                                      len(vector), self.disk_capacity)
+                self._disk.put(key, vector)
+
+    def get_or_compute(self, query: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Get a cached embedding, computing and caching it on a miss
+
+        Args:
+            query: Raw search query
+            compute: Function embedding the normalized query text
+
+        Returns:
+            List[float]: Query embedding
+        """
+        vector = self.get(query)
+        if vector is None:
+            vector = compute(normalize_query(query))
+            self.put(query, vector)
+        return vector
+
+    def _remember(self, key: str, vector: List[float]):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizes"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'disk_entries': len(self._disk) if self._disk is not None else 0
+        }
+
+    def close(self):
+        """Flush the on-disk store"""
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
@@ -6,24 +6,20 @@ Manages ChromaDB connections and operations
 import os
 import sys
 import json
+import threading
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
 # Add config to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
 
-try:
-    import chromadb
-    from chromadb.config import Settings
-    from sentence_transformers import SentenceTransformer
-    HAS_CHROMADB = True
-except ImportError:
-    chromadb = None
-    SentenceTransformer = None
-    HAS_CHROMADB = False
-
 from settings import DATABASE
 
+from .resources import (
+    HAS_CHROMADB, embedding_models, get_chroma_client,
+    get_embedding_model, get_or_create_collection
+)
+
 
 class DatabaseManager:
     """
@@ -39,12 +35,12 @@ class DatabaseManager:
             db_path: Path to ChromaDB database
         """
         self.db_path = db_path or DATABASE.get('chromadb_path', './chroma_db_flowers')
-        self.embedding_model_name = DATABASE.get('embedding_model', 'all-MiniLM-L6-v2')
+        self.embedding_model_name = DATABASE.get('embedding_model', 'paraphrase-multilingual-MiniLM-L12-v2')
         self.collections = DATABASE.get('collections', {})
         
         # Initialize components
         self.client = None
-        self.embedding_model = None
+        self._embedding_model = None
         self.initialized = False
         
         # Initialize if ChromaDB is available
@@ -52,13 +48,10 @@ class DatabaseManager:
             self._initialize_database()
     
     def _initialize_database(self):
-        """Initialize ChromaDB client and embedding model"""
+        """Initialize the shared ChromaDB client (the embedding model loads on first use)"""
         try:
-            # Initialize ChromaDB client
-            self.client = chromadb.PersistentClient(path=self.db_path)
-            
-            # Initialize embedding model
-            self.embedding_model = SentenceTransformer(self.embedding_model_name)
+            # Shared ChromaDB client for this path
+            self.client = get_chroma_client(self.db_path)
             
             self.initialized = True
             print(f"✅ Database initialized successfully at {self.db_path}")
@@ -67,18 +60,23 @@ class DatabaseManager:
             print(f"❌ Error initializing database: {e}")
             self.initialized = False
     
+    @property
+    def embedding_model(self):
+        """Shared embedding model, loaded on first access"""
+        if self._embedding_model is None:
+            self._embedding_model = get_embedding_model(self.embedding_model_name)
+        return self._embedding_model
+    
     def get_collection(self, collection_name: str):
-        """Get or create a collection"""
+        """Get or create a collection bound to the configured embedding model"""
         if not self.initialized:
             raise RuntimeError("Database not initialized")
         
-        try:
-            # Try to get existing collection
-            collection = self.client.get_collection(name=collection_name)
-            return collection
-        except Exception:
-            # Create new collection if it doesn't exist
-            return self.client.create_collection(name=collection_name)
+        return get_or_create_collection(self.client, collection_name, self.embedding_model_name)
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the shared embedding model"""
+        return self.embedding_model.encode(texts, show_progress_bar=False).tolist()
     
     def add_documents(self, collection_name: str, documents: List[Dict[str, Any]]):
         """
@@ -105,6 +103,7 @@ class DatabaseManager:
         
         # Add to collection
         collection.add(
+            embeddings=self._embed(texts),
             documents=texts,
             metadatas=metadatas,
             ids=ids
@@ -131,7 +130,7 @@ class DatabaseManager:
         
         # Perform search
         results = collection.query(
-            query_texts=[query],
+            query_embeddings=self._embed([query]),
             n_results=n_results
         )
         
@@ -193,6 +192,7 @@ class DatabaseManager:
             'chromadb_available': HAS_CHROMADB,
             'db_path': self.db_path,
             'embedding_model': self.embedding_model_name,
+            'embedding_models': embedding_models.stats(),
             'timestamp': datetime.now().isoformat()
         }
         
@@ -211,10 +211,23 @@ class DatabaseManager:
         return health_status
 
 
-# Global database instance
-db_manager = DatabaseManager()
+# Global database instance, created on first use
+_db_manager = None
+_db_manager_lock = threading.Lock()
 
 
 def get_database() -> DatabaseManager:
     """Get the global database manager instance"""
-    return db_manager
+    global _db_manager
+    if _db_manager is None:
+        with _db_manager_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager()
+    return _db_manager
+
+
+def __getattr__(name):
+    # Backward compatibility: `db_manager` without constructing it at import time
+    if name == 'db_manager':
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,210 @@
+"""
+Shared Resources for XOFlowers AI Agent
+Process-wide ChromaDB clients and embedding models, created lazily and only once
+"""
+
+import os
+import time
+import threading
+import importlib.util
+from typing import Dict, List, Optional, Any, Callable
+
+# Heavy libraries are imported only when a client or model is actually requested
+HAS_CHROMADB = importlib.util.find_spec('chromadb') is not None
+HAS_SENTENCE_TRANSFORMERS = importlib.util.find_spec('sentence_transformers') is not None
+
+# Collection metadata key recording which model produced the stored vectors
+EMBEDDING_MODEL_KEY = 'embedding_model'
+
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_chroma_client(db_path: str):
+    """
+    Get the shared ChromaDB client for a database path
+
+    Args:
+        db_path: Path to the ChromaDB database
+
+    Returns:
+        chromadb.PersistentClient shared by every caller using the same path
+    """
+    if not HAS_CHROMADB:
+        raise RuntimeError("chromadb is not installed")
+
+    key = os.path.abspath(db_path)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                import chromadb
+                client = chromadb.PersistentClient(path=db_path)
+                _clients[key] = client
+    return client
+
+
+class EmbeddingModelMismatchError(RuntimeError):
+    """Raised when a collection is queried with a different model than it was indexed with"""
+
+
+class EmbeddingModelRegistry:
+    """
+    Loads each embedding model once, keyed by name, and tracks its memory footprint
+    """
+    
+    def __init__(self, loader: Optional[Callable[[str], Any]] = None):
+        """
+        Initialize the registry
+        
+        Args:
+            loader: Function that loads a model by name (defaults to SentenceTransformer)
+        """
+        self._loader = loader or self._load_sentence_transformer
+        self._models: Dict[str, Any] = {}
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _load_sentence_transformer(model_name: str):
+        if not HAS_SENTENCE_TRANSFORMERS:
+            raise RuntimeError("sentence-transformers is not installed")
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    
+    def get(self, model_name: str):
+        """Get a model by name, loading it on first request"""
+        model = self._models.get(model_name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(model_name)
+                if model is None:
+                    started = time.perf_counter()
+                    model = self._loader(model_name)
+                    self._info[model_name] = {
+                        'memory_bytes': self._measure_footprint(model),
+                        'load_seconds': round(time.perf_counter() - started, 3)
+                    }
+                    self._models[model_name] = model
+        return model
+    
+    def is_loaded(self, model_name: str) -> bool:
+        """Check if a model is already resident"""
+        return model_name in self._models
+    
+    def loaded_models(self) -> List[str]:
+        """Names of all resident models"""
+        return sorted(self._models.keys())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Memory footprint and load time for every resident model"""
+        models = {name: dict(info) for name, info in self._info.items()}
+        return {
+            'models': models,
+            'model_count': len(models),
+            'total_memory_mb': round(sum(info['memory_bytes'] for info in models.values()) / (1024 * 1024), 1)
+        }
+    
+    @staticmethod
+    def _measure_footprint(model) -> int:
+        """Bytes held by the model's parameters and buffers (0 if unknown)"""
+        total = 0
+        try:
+            for tensor in list(model.parameters()) + list(model.buffers()):
+                total += tensor.numel() * tensor.element_size()
+        except (AttributeError, TypeError):
+            return 0
+        return total
+
+
+# Registry shared by DatabaseManager, ChromaDBPopulator and UniversalXOFlowersSearch
+embedding_models = EmbeddingModelRegistry()
+
+
+def get_embedding_model(model_name: str):
+    """
+    Get the shared embedding model by name
+    
+    Args:
+        model_name: SentenceTransformer model name
+        
+    Returns:
+        Model loaded at most once per process
+    """
+    return embedding_models.get(model_name)
+
+
+def get_or_create_collection(client, name: str, model_name: str, metadata: Optional[Dict[str, Any]] = None):
+    """
+    Get or create a collection bound to an embedding model
+    
+    New collections record the model in their metadata; existing ones are
+    checked so they are never queried with vectors from another model.
+    
+    Args:
+        client: ChromaDB client
+        name: Collection name
+        model_name: Embedding model used for documents and queries
+        metadata: Extra collection metadata for new collections
+        
+    Returns:
+        ChromaDB collection
+    """
+    try:
+        collection = client.get_collection(name=name)
+    except Exception:
+        collection_metadata = dict(metadata or {})
+        collection_metadata[EMBEDDING_MODEL_KEY] = model_name
+        return client.create_collection(name=name, metadata=collection_metadata)
+    
+    check_collection_model(collection, model_name)
+    return collection
+
+
+def check_collection_model(collection, model_name: str):
+    """
+    Ensure a collection was indexed with the given embedding model
+    
+    Raises:
+        EmbeddingModelMismatchError: If the collection records a different model,
+            or records none (legacy collections must be rebuilt or stamped)
+    """
+    indexed_with = (collection.metadata or {}).get(EMBEDDING_MODEL_KEY)
+    if indexed_with is None:
+        raise EmbeddingModelMismatchError(
+            f"Collection '{collection.name}' has no '{EMBEDDING_MODEL_KEY}' metadata; "
+            f"rebuild it, or call stamp_collection_model() if it is known to be indexed with '{model_name}'"
+        )
+    if indexed_with != model_name:
+        raise EmbeddingModelMismatchError(
+            f"Collection '{collection.name}' was indexed with '{indexed_with}' "
+            f"but is being used with '{model_name}'; rebuild it or change the model"
+        )
+
+
+def stamp_collection_model(collection, model_name: str):
+    """
+    Record the embedding model of a legacy collection that has none
+    
+    Only for collections known to be indexed with model_name; a collection
+    that already records a model is checked instead of overwritten.
+    
+    Args:
+        collection: ChromaDB collection
+        model_name: Model the collection's vectors were produced with
+    """
+    metadata = dict(collection.metadata or {})
+    if EMBEDDING_MODEL_KEY in metadata:
+        check_collection_model(collection, model_name)
+        return
+    metadata[EMBEDDING_MODEL_KEY] = model_name
+    collection.modify(metadata=metadata)
+
+
+def loaded_resources() -> Dict[str, Any]:
+    """Describe which shared resources are currently loaded"""
+    return {
+        'chroma_clients': sorted(_clients.keys()),
+        'embedding_models': embedding_models.loaded_models()
+    }
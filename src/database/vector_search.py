@@ -4,30 +4,73 @@
 """
 
 import os
-import csv
-import chromadb
-from sentence_transformers import SentenceTransformer
+import sys
+import re
+import atexit
+import threading
+from typing import Any, NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Add config to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+
+from settings import DATABASE
+
+from .resources import (
+    EMBEDDING_MODEL_KEY, embedding_models, get_chroma_client,
+    get_embedding_model, get_or_create_collection
+)
+from .embedding_cache import QueryEmbeddingCache
+from .catalog_sync import CatalogSync
+from .collection_aliases import CollectionAliases, versioned_name
+from .catalog import get_catalog, find_catalog_file
+
+# Логические имена коллекций; физические версии - "<имя>__v<n>"
+COLLECTION_NAMES = ("all_products", "flowers_only")
+
+# Метаданные коллекции: версия файла каталога, по которому она построена
+CATALOG_VERSION_KEY = 'catalog_version'
+
+
+class BoundCollections(NamedTuple):
+    """Активные версии обеих коллекций; заменяются целиком одним присваиванием"""
+    flowers: Any
+    all_products: Any
+
 
 class UniversalXOFlowersSearch:
-    def __init__(self):
-        # Создаем базу данных ChromaDB
-        self.client = chromadb.PersistentClient(path="./chroma_db_flowers")
-        
-        # Загружаем модель для создания векторов
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, db_path=None, model_name=None):
+        # Общий клиент ChromaDB (один на процесс)
+        self.db_path = db_path or DATABASE.get('chromadb_path', './chroma_db_flowers')
+        self.client = get_chroma_client(self.db_path)
+        
+        # Модель из общего реестра, загружается лениво при первом обращении
+        self.model_name = model_name or DATABASE.get('embedding_model', 'paraphrase-multilingual-MiniLM-L12-v2')
+        self._model = None
+        
+        # Пул потоков для параллельных запросов к коллекциям
+        self._query_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='xoflowers-search')
+        
+        # Пересборка коллекций и удаление старых версий идут в отдельном потоке
+        self._rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='xoflowers-reindex')
+        
+        # Каталог товаров загружается лениво при первом обращении
+        self._catalog = None
+        self._catalog_file = None
+        
+        # Кэш векторов запросов (LRU в памяти + опционально на диске)
+        cache_config = DATABASE.get('query_embedding_cache', {})
+        self.query_cache = QueryEmbeddingCache(
+            self.model_name,
+            max_entries=cache_config.get('max_entries', 2048),
+            persist_path=cache_config.get('persist_path'),
+            disk_capacity=cache_config.get('disk_capacity', 8192)
+        )
         
-        # Создаем ДВЕ коллекции
-        try:
-            # Коллекция только для цветов
-            self.flowers_collection = self.client.create_collection("flowers_only")
-        except:
-            self.flowers_collection = self.client.get_collection("flowers_only")
-            
-        try:
-            # Коллекция для ВСЕХ товаров
-            self.all_products_collection = self.client.create_collection("all_products")
-        except:
-            self.all_products_collection = self.client.get_collection("all_products")
+        # ДВЕ коллекции (только цветы и ВСЕ товары), через алиасы на активные версии
+        self.aliases = CollectionAliases(self.db_path)
+        self._bind_collections()
+        atexit.register(self.aliases.unregister_reader)
         
         # Категории товаров
         self.flower_categories = {
@@ -60,64 +103,199 @@ class UniversalXOFlowersSearch:
         
         print("✅ Universal XOFlowers search system initialized")
     
-    def load_products_from_csv(self, csv_filename="final_products_case_standardized.csv"):
-        """Загружаем ВСЕ продукты в обе коллекции"""
-        csv_path = f"data/{csv_filename}"
+    @property
+    def model(self):
+        """Общая модель SentenceTransformer, загружается при первом обращении"""
+        if self._model is None:
+            self._model = get_embedding_model(self.model_name)
+        return self._model
+    
+    def _embed(self, texts):
+        """Векторизуем тексты той же моделью, что записана в метаданных коллекции"""
+        return self.model.encode(list(texts), show_progress_bar=False).tolist()
+    
+    def _embed_query(self, query):
+        """Вектор для поискового запроса (сначала смотрим в кэш)"""
+        return self.query_cache.get_or_compute(query, lambda text: self._embed([text])[0])
+    
+    @property
+    def flowers_collection(self):
+        return self._bound.flowers
+    
+    @property
+    def all_products_collection(self):
+        return self._bound.all_products
+    
+    def _bind_collections(self):
+        """Открываем активные версии коллекций, на которые указывают алиасы"""
+        versions = {name: self.aliases.current(name) for name in COLLECTION_NAMES}
+        # Сначала записываем аренду, чтобы эти версии не удалили, пока мы их открываем
+        self.aliases.register_reader(versions)
+        bound = BoundCollections(
+            flowers=get_or_create_collection(
+                self.client, versioned_name("flowers_only", versions["flowers_only"]), self.model_name
+            ),
+            all_products=get_or_create_collection(
+                self.client, versioned_name("all_products", versions["all_products"]), self.model_name
+            )
+        )
+        # Поиск видит либо обе старые, либо обе новые версии
+        self._bound = bound
+    
+    def _collections(self):
+        """Активные коллекции; если алиасы обновил другой процесс - сначала переключаемся"""
+        if self.aliases.reload():
+            self._bind_collections()
+            print(f"🔁 Коллекции переключены: {self._bound.all_products.name}, {self._bound.flowers.name}")
+            # Новые версии построены по новому каталогу - ценовой индекс берём оттуда же
+            self._catalog = None
+            # Версии, которые больше никто не читает, удаляем в фоне
+            self._rebuild_executor.submit(self._drop_stale_versions)
+        return self._bound
+    
+    def rebuild_collections(self, products_by_name, catalog_version=None):
+        """
+        Строим новые версии коллекций в фоне и атомарно переключаем алиасы
         
-        if not os.path.exists(csv_path):
-            csv_path = "data/chunks_data.csv"
-            if not os.path.exists(csv_path):
-                print("❌ Файлы данных не найдены!")
-                return
+        Пока идёт построение, поиск продолжает работать по текущим версиям;
+        предыдущая версия сохраняется для мгновенного отката.
+        
+        Args:
+            products_by_name: логическое имя коллекции -> список продуктов
+            catalog_version: версия каталога, из которого взяты продукты
+                (без неё ценовой индекс каталога для этих версий не используется)
+            
+        Returns:
+            Future: по завершении - dict логическое имя -> новая активная версия
+        """
+        return self._rebuild_executor.submit(self._rebuild_collections, products_by_name, catalog_version)
+    
+    def _rebuild_collections(self, products_by_name, catalog_version):
+        live = self._bound
+        versions = {}
+        for name, products in products_by_name.items():
+            version = self.aliases.next_version(name)
+            physical_name = versioned_name(name, version)
+            
+            # Остатки прерванной сборки с тем же номером версии не используются
+            try:
+                self.client.delete_collection(physical_name)
+            except Exception:
+                pass
+            metadata = {EMBEDDING_MODEL_KEY: self.model_name}
+            if catalog_version:
+                metadata[CATALOG_VERSION_KEY] = catalog_version
+            collection = self.client.create_collection(physical_name, metadata=metadata)
+            
+            # Векторы неизменённых товаров копируются из активной версии
+            source = live.flowers if name == "flowers_only" else live.all_products
+            self._add_products_to_collection(products, collection, physical_name, source=source)
+            
+            expected = len({p['id'] for p in products})
+            if collection.count() != expected:
+                raise RuntimeError(f"Коллекция '{physical_name}' содержит {collection.count()} "
+                                   f"документов вместо {expected}; алиас не переключён")
+            versions[name] = version
+        
+        self.aliases.promote(versions)
+        self._bind_collections()
+        self._drop_stale_versions()
+        print(f"🔁 Активные версии: {versions}")
+        return versions
+    
+    def rollback_collections(self):
+        """Мгновенный откат на предыдущие версии коллекций"""
+        restored = self.aliases.rollback(COLLECTION_NAMES)
+        self._bind_collections()
+        print(f"↩️ Откат коллекций: {restored}")
+        return restored
+    
+    def _drop_stale_versions(self):
+        """
+        Удаляем версии, которые не являются ни активной, ни предыдущей
+        
+        Версии, к которым ещё привязан работающий процесс (по его аренде),
+        остаются до тех пор, пока он не переключится.
+        """
+        in_use = self.aliases.versions_in_use()
+        for collection in self.client.list_collections():
+            collection_name = getattr(collection, 'name', collection)
+            for name in COLLECTION_NAMES:
+                match = re.fullmatch(rf"{name}(?:__v(\d+))?", collection_name)
+                if not match:
+                    continue
+                version = int(match.group(1) or 0)
+                keep = {self.aliases.current(name), self.aliases.previous(name)} | in_use.get(name, set())
+                if version not in keep:
+                    self.client.delete_collection(collection_name)
+                    print(f"🗑️ Удалена устаревшая версия '{collection_name}'")
+    
+    @property
+    def catalog(self):
+        """
+        Общий каталог товаров
+        
+        Загружается один раз и перечитывается после переключения версий
+        коллекций (если файл каталога изменился)
+        """
+        if self._catalog is None:
+            self._catalog = get_catalog(self._catalog_file)
+        return self._catalog
+    
+    def load_products_from_csv(self, csv_filename="final_products_case_standardized.csv", wait=True):
+        """
+        Загружаем ВСЕ продукты в обе коллекции
+        
+        Args:
+            csv_filename: файл каталога в data/
+            wait: дождаться переключения на новые версии (False - вернуть Future,
+                поиск тем временем работает по текущим версиям)
+        """
+        csv_path = find_catalog_file(csv_filename)
+        
+        if csv_path is None:
+            print("❌ Файлы данных не найдены!")
+            return
+        elif os.path.basename(csv_path) != os.path.basename(csv_filename):
             print(f"⚠️ Используем старый файл: {csv_path}")
         else:
             print(f"✅ Используем новый файл: {csv_path}")
         
+        self._catalog_file = csv_path
+        self._catalog = get_catalog(csv_path)
+        
         all_products = []
         flower_products = []
-        total_rows = 0
-        valid_products = 0
         
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
+        # Только существующие товары с описанием и ценой
+        for record in self._catalog.valid_records():
+            # Создаем базовый продукт
+            product = self._create_product_object(record)
             
-            for row in reader:
-                total_rows += 1
-                
-                # Проверяем что это продукт
-                if row.get('chunk_type') != 'product':
-                    continue
-                
-                # Фильтруем только существующие продукты
-                if not self._is_valid_product(row):
-                    continue
-                
-                valid_products += 1
-                category = row.get('category', '')
-                
-                # Создаем базовый продукт
-                product = self._create_product_object(row, valid_products)
-                
-                # Добавляем ВСЕ валидные продукты в общую коллекцию
-                all_products.append(product)
-                
-                # Добавляем только цветы в цветочную коллекцию
-                if category in self.flower_categories:
-                    flower_product = product.copy()
-                    flower_product['search_text'] = self._create_flower_search_text(row)
-                    flower_product['is_flower'] = 'True'
-                    flower_products.append(flower_product)
-        
-        print(f"📊 Обработано строк: {total_rows}")
+            # Добавляем ВСЕ валидные продукты в общую коллекцию
+            all_products.append(product)
+            
+            # Добавляем только цветы в цветочную коллекцию
+            if record['category'] in self.flower_categories:
+                flower_product = product.copy()
+                flower_product['search_text'] = self._create_flower_search_text(record)
+                flower_product['is_flower'] = 'True'
+                flower_products.append(flower_product)
+        
+        print(f"📊 Обработано строк: {len(self._catalog)}")
         print(f"✅ Всего товаров: {len(all_products)}")
         print(f"🌸 Из них цветов: {len(flower_products)}")
         
-        # Загружаем в обе коллекции
+        # Строим новые версии обеих коллекций и переключаем алиасы
+        products_by_name = {}
         if all_products:
-            self._add_products_to_collection(all_products, self.all_products_collection, "all_products")
-        
+            products_by_name["all_products"] = all_products
         if flower_products:
-            self._add_products_to_collection(flower_products, self.flowers_collection, "flowers_only")
+            products_by_name["flowers_only"] = flower_products
+        
+        if products_by_name:
+            future = self.rebuild_collections(products_by_name, catalog_version=self._catalog.version)
+            return future.result() if wait else future
     
     # Методы обратной совместимости со старым интерфейсом
     def search(self, query, limit=5, only_verified=False, only_functional=False):
@@ -127,15 +305,7 @@ class UniversalXOFlowersSearch:
     def get_categories(self):
         """Обратная совместимость - получаем все категории"""
         try:
-            all_results = self.all_products_collection.get()
-            categories = set()
-            
-            if all_results['metadatas']:
-                for metadata in all_results['metadatas']:
-                    if metadata.get('category'):
-                        categories.add(metadata['category'])
-            
-            return sorted(list(categories))
+            return self.catalog.categories()
         except Exception as e:
             print(f"❌ Ошибка получения категорий: {e}")
             return []
@@ -184,9 +354,36 @@ class UniversalXOFlowersSearch:
                 print(f"🔍 Комбинированный поиск с фильтром цены для: '{query}'")
                 return self.combined_search(query, limit, price_min, price_max)
     
-    def search_flowers_only(self, query, limit=5, price_min=None, price_max=None, verified_only=False):
-        """Поиск ТОЛЬКО по цветам с фильтром цены"""
+    def _count_in_price_range(self, collection, price_min, price_max, categories=None):
+        """
+        Сколько товаров каталога попадает в ценовой диапазон (логарифмический поиск)
+        
+        Считаем только если коллекция построена по той же версии каталога,
+        иначе цены в каталоге и в метаданных коллекции могут расходиться.
+        
+        Returns:
+            int или None, если фильтра по цене нет или каталог недоступен/не совпадает
+        """
+        if price_min is None and price_max is None:
+            return None
+        try:
+            catalog = self.catalog
+            if (collection.metadata or {}).get(CATALOG_VERSION_KEY) != catalog.version:
+                return None
+            return catalog.count_in_price_range(price_min, price_max, categories)
+        except Exception:
+            return None
+    
+    def search_flowers_only(self, query, limit=5, price_min=None, price_max=None, verified_only=False,
+                            query_embedding=None, collections=None):
+        """
+        Поиск ТОЛЬКО по цветам с фильтром цены
+        
+        query_embedding - готовый вектор запроса, collections - уже выбранные
+        активные коллекции (combined_search передаёт одну пару в оба поиска)
+        """
         try:
+            collections = collections or self._collections()
             where_conditions = {"is_flower": "True"}
             
             additional_filters = []
@@ -204,9 +401,17 @@ class UniversalXOFlowersSearch:
                     "$and": [where_conditions] + additional_filters
                 }
             
-            results = self.flowers_collection.query(
-                query_texts=[query],
-                n_results=limit,
+            # Ценовой индекс каталога: пустой диапазон - без запроса к ChromaDB
+            in_range = self._count_in_price_range(collections.flowers, price_min, price_max, self.flower_categories)
+            if in_range == 0:
+                return []
+            
+            if query_embedding is None:
+                query_embedding = self._embed_query(query)
+            
+            results = collections.flowers.query(
+                query_embeddings=[query_embedding],
+                n_results=limit if in_range is None else min(limit, in_range),
                 where=where_conditions
             )
             
@@ -216,9 +421,11 @@ class UniversalXOFlowersSearch:
             print(f"❌ Ошибка поиска цветов: {e}")
             return []
     
-    def search_all_products(self, query, limit=5, category_filter=None, price_min=None, price_max=None):
-        """Поиск по ВСЕМ товарам с фильтром цены"""
+    def search_all_products(self, query, limit=5, category_filter=None, price_min=None, price_max=None,
+                            query_embedding=None, collections=None):
+        """Поиск по ВСЕМ товарам с фильтром цены (параметры как у search_flowers_only)"""
         try:
+            collections = collections or self._collections()
             where_conditions = {}
             additional_filters = []
             
@@ -231,18 +438,31 @@ class UniversalXOFlowersSearch:
             if price_max is not None:
                 additional_filters.append({"price": {"$lte": price_max}})
             
-            if additional_filters:
+            # ChromaDB принимает $and только для двух и более условий
+            if len(additional_filters) == 1:
+                where_conditions = additional_filters[0]
+            elif additional_filters:
                 where_conditions = {"$and": additional_filters}
             
+            # Ценовой индекс каталога: пустой диапазон - без запроса к ChromaDB
+            in_range = self._count_in_price_range(
+                collections.all_products, price_min, price_max, [category_filter] if category_filter else None
+            )
+            if in_range == 0:
+                return []
+            
+            if query_embedding is None:
+                query_embedding = self._embed_query(query)
+            
             search_params = {
-                'query_texts': [query],
-                'n_results': limit
+                'query_embeddings': [query_embedding],
+                'n_results': limit if in_range is None else min(limit, in_range)
             }
             
             if where_conditions:
                 search_params['where'] = where_conditions
             
-            results = self.all_products_collection.query(**search_params)
+            results = collections.all_products.query(**search_params)
             
             return self._format_results(results, "🛍️ ВСЕ ТОВАРЫ")
             
@@ -255,11 +475,42 @@ class UniversalXOFlowersSearch:
         flower_limit = max(1, limit // 2)
         other_limit = limit - flower_limit
         
-        flowers = self.search_flowers_only(query, flower_limit, price_min, price_max)
-        others = self.search_all_products(query, other_limit, price_min=price_min, price_max=price_max)
+        collections = self._collections()
+        
+        # В ценовом диапазоне нет ни одного товара - не считаем вектор вовсе
+        if self._count_in_price_range(collections.all_products, price_min, price_max) == 0:
+            return []
+        
+        # Вектор запроса считаем один раз и используем для обеих коллекций
+        query_embedding = self._embed_query(query)
+        
+        # Запросы к двум коллекциям выполняются параллельно
+        flowers_future = self._query_executor.submit(
+            self.search_flowers_only, query, flower_limit, price_min, price_max,
+            query_embedding=query_embedding, collections=collections
+        )
+        others = []
+        if other_limit > 0:
+            # Цветы есть в обеих коллекциях, поэтому берем запас на дубликаты
+            others = self.search_all_products(
+                query, other_limit + flower_limit, price_min=price_min, price_max=price_max,
+                query_embedding=query_embedding, collections=collections
+            )
+        flowers = flowers_future.result()
+        
+        # Объединяем без дубликатов по id и сортируем по релевантности
+        seen_ids = {product['id'] for product in flowers}
+        all_results = list(flowers)
+        added_others = 0
+        for product in others:
+            if added_others >= other_limit:
+                break
+            if product['id'] in seen_ids:
+                continue
+            seen_ids.add(product['id'])
+            all_results.append(product)
+            added_others += 1
         
-        # Объединяем и сортируем по релевантности
-        all_results = flowers + others
         all_results.sort(key=lambda x: x.get('score', 0), reverse=True)
         
         return all_results[:limit]
@@ -383,58 +634,56 @@ class UniversalXOFlowersSearch:
         else:
             return "mixed"
     
-    def _create_product_object(self, row, product_id):
+    def _create_product_object(self, record):
         """Создаем объект продукта"""
         return {
-            'id': row.get('chunk_id', f'product_{product_id}'),
-            'search_text': self._create_universal_search_text(row),
-            'name': row.get('primary_text', '')[:150],
-            'price': self._parse_price(row.get('price', '0')),
-            'category': row.get('category', ''),
-            'flowers': row.get('flower_type', ''),
-            'url': self._get_best_url(row),
-            'collection_id': row.get('collection_id', ''),
-            'is_verified': row.get('is_verified', 'False'),
-            'url_functional': row.get('url_functional', 'False'),
-            'product_exists': row.get('product_exists', 'False')
+            'id': record['id'] or f"product_{record.index + 1}",
+            'search_text': self._create_universal_search_text(record),
+            'name': record['description'][:150],
+            'price': record.price_value,
+            'category': record['category'],
+            'flowers': record['flower_type'],
+            'url': self._get_best_url(record),
+            'collection_id': record['collection_id'],
+            'is_verified': record['is_verified'],
+            'url_functional': record['url_functional'],
+            'product_exists': record['product_exists']
         }
     
-    def _create_universal_search_text(self, row):
+    def _create_universal_search_text(self, record):
         """Создаем универсальный поисковый текст"""
         parts = []
         
         # Основной текст
-        if row.get('primary_text'):
-            parts.append(row['primary_text'])
+        if record['description']:
+            parts.append(record['description'])
         
         # Категория
-        if row.get('category'):
-            parts.append(f"Категория: {row['category']}")
+        if record['category']:
+            parts.append(f"Категория: {record['category']}")
         
         # Тип продукта
-        if row.get('flower_type'):
-            parts.append(f"Тип: {row['flower_type']}")
+        if record['flower_type']:
+            parts.append(f"Тип: {record['flower_type']}")
         
-        # Цена
-        price = self._parse_price(row.get('price', '0'))
-        if price > 0:
-            parts.append(f"Цена: {price} MDL")
+        # Цена не входит в текст: она фильтруется по метаданным, и её изменение
+        # не должно требовать пересчёта векторов
         
         return " | ".join(parts)
     
-    def _create_flower_search_text(self, row):
+    def _create_flower_search_text(self, record):
         """Создаем поисковый текст с акцентом на цветы"""
         parts = []
         
-        if row.get('primary_text'):
-            parts.append(row['primary_text'])
+        if record['description']:
+            parts.append(record['description'])
         
         # Цветочные ключевые слова
-        flower_type = row.get('flower_type', '')
+        flower_type = record['flower_type']
         if flower_type and 'Difuzor' not in flower_type:
             parts.append(f"Цветы: {flower_type}")
         
-        category = row.get('category', '')
+        category = record['category']
         if 'Bouquet' in category:
             parts.append("Букет цветов flori buchet")
         elif 'Rose' in category:
@@ -442,10 +691,6 @@ class UniversalXOFlowersSearch:
         elif 'Peonies' in category:
             parts.append("Пионы bujori peonies")
         
-        price = self._parse_price(row.get('price', '0'))
-        if price > 0:
-            parts.append(f"Цена: {price} MDL")
-        
         return " | ".join(parts)
     
     def _format_results(self, results, source_label):
@@ -473,25 +718,9 @@ class UniversalXOFlowersSearch:
         products.sort(key=lambda x: x['score'], reverse=True)
         return products
     
-    def _add_products_to_collection(self, products, collection, collection_name):
-        """Добавляем продукты в коллекцию"""
-        try:
-            # Очищаем коллекцию
-            self.client.delete_collection(collection_name)
-            collection = self.client.create_collection(collection_name)
-            
-            # Обновляем ссылку
-            if collection_name == "flowers_only":
-                self.flowers_collection = collection
-            else:
-                self.all_products_collection = collection
-        except:
-            pass
-        
-        # Подготавливаем данные
-        ids = [p['id'] for p in products]
-        documents = [p['search_text'] for p in products]
-        metadatas = [{
+    def _add_products_to_collection(self, products, collection, collection_name, source=None):
+        """Синхронизируем коллекцию с каталогом без её пересоздания"""
+        records = [(p['id'], p['search_text'], {
             'name': p['name'],
             'price': p['price'],
             'category': p['category'],
@@ -502,128 +731,115 @@ class UniversalXOFlowersSearch:
             'url_functional': p['url_functional'],
             'product_exists': p['product_exists'],
             'is_flower': p.get('is_flower', 'False')
-        } for p in products]
+        }) for p in products]
         
-        # Добавляем в ChromaDB
-        collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        # Векторы считаются только для новых и изменённых документов
+        report = CatalogSync(collection, self._embed, source=source).sync(records)
         
-        print(f"✅ Загружено {len(products)} продуктов в коллекцию '{collection_name}'")
+        print(f"✅ Коллекция '{collection_name}' синхронизирована: {report.summary()}")
+        return report
     
     # Вспомогательные методы (те же что и раньше)
-    def _is_valid_product(self, row):
-        if row.get('product_exists', 'False') != 'True':
-            return False
-        if not row.get('primary_text', '').strip():
-            return False
-        price = self._parse_price(row.get('price', '0'))
-        if price <= 0:
-            return False
-        return True
-    
-    def _get_best_url(self, row):
-        if row.get('url_fixed') and row.get('url_fixed').strip():
-            return row['url_fixed']
-        elif row.get('url') and row.get('url').strip():
-            return row['url']
-        elif row.get('original_url') and row.get('original_url').strip():
-            return row['original_url']
-        else:
-            return ""
-    
-    def _parse_price(self, price_str):
-        if not price_str:
-            return 0
-        import re
-        clean_price = re.sub(r'[^\d.]', '', str(price_str))
-        try:
-            return float(clean_price)
-        except:
-            return 0
+    def _get_best_url(self, record):
+        for key in ('url_fixed', 'url', 'original_url'):
+            url = record.get(key, '')
+            if url and url.strip():
+                return url
+        return ""
     
     def get_stats(self):
         """Получаем статистику по обеим коллекциям (обратная совместимость)"""
         try:
-            all_results = self.all_products_collection.get()
-            flower_results = self.flowers_collection.get()
-            
-            total_count = len(all_results['ids']) if all_results['ids'] else 0
-            flower_count = len(flower_results['ids']) if flower_results['ids'] else 0
-            
-            verified_count = 0
-            functional_count = 0
-            categories = set()
-            
-            # Анализируем метаданные всех продуктов
-            if all_results['metadatas']:
-                for metadata in all_results['metadatas']:
-                    if metadata.get('is_verified') == 'True':
-                        verified_count += 1
-                    if metadata.get('url_functional') == 'True':
-                        functional_count += 1
-                    if metadata.get('category'):
-                        categories.add(metadata['category'])
+            # Агрегаты берём из каталога, а не выгружаем все записи из ChromaDB
+            summary = self.catalog.summary()
+            collections = self._collections()
             
             return {
-                'total_products': total_count,
-                'verified_products': verified_count,
-                'functional_urls': functional_count,
-                'categories_count': len(categories),
-                'categories': sorted(list(categories)),
-                'flower_products': flower_count,
-                'collections': ['all_products', 'flowers_only']
+                'total_products': collections.all_products.count(),
+                'verified_products': summary['verified_products'],
+                'functional_urls': summary['functional_urls'],
+                'categories_count': summary['categories_count'],
+                'categories': self.catalog.categories(),
+                'flower_products': collections.flowers.count(),
+                'catalog_products': summary['total_products'],
+                'price_range': (summary['price_min'], summary['price_max']),
+                'collections': list(COLLECTION_NAMES),
+                'collection_versions': self.aliases.snapshot(),
+                'embedding_model': self.model_name,
+                'embedding_models': embedding_models.stats(),
+                'query_cache': self.query_cache.stats()
             }
             
         except Exception as e:
             print(f"❌ Ошибка получения статистики: {e}")
             return {'error': str(e)}
 
-# Создаем глобальный экземпляр универсального поиска
-universal_search = UniversalXOFlowersSearch()
+# Глобальный экземпляр создается лениво при первом использовании
+_universal_search = None
+_universal_search_lock = threading.Lock()
+
+
+def get_universal_search():
+    """Получить общий экземпляр поиска (создается один раз, потокобезопасно)"""
+    global _universal_search
+    if _universal_search is None:
+        with _universal_search_lock:
+            if _universal_search is None:
+                _universal_search = UniversalXOFlowersSearch()
+    return _universal_search
+
+
+def warm_up():
+    """Заранее загрузить клиент ChromaDB и модель (вызывается из main.py)"""
+    search = get_universal_search()
+    search.model
+    return search
+
+
+def __getattr__(name):
+    # Обратная совместимость: universal_search / vector_search без создания при импорте
+    if name in ('universal_search', 'vector_search'):
+        return get_universal_search()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Удобные функции для использования с поддержкой цены
 def smart_search(query, limit=5, budget=None, price_min=None, price_max=None):
     """Умный поиск - автоматически определяет тип с поддержкой цены"""
-    return universal_search.smart_search(query, limit, budget=budget, price_min=price_min, price_max=price_max)
+    return get_universal_search().smart_search(query, limit, budget=budget, price_min=price_min, price_max=price_max)
 
 def search_flowers_only(query, limit=5, budget=None, price_min=None, price_max=None):
     """Поиск только цветов с фильтром цены"""
-    return universal_search.search_flowers_only(query, limit, price_min, price_max or budget)
+    return get_universal_search().search_flowers_only(query, limit, price_min, price_max or budget)
 
 def search_all_products(query, limit=5, budget=None, price_min=None, price_max=None):
     """Поиск по всем товарам с фильтром цены"""
-    return universal_search.search_all_products(query, limit, price_min=price_min, price_max=price_max or budget)
+    return get_universal_search().search_all_products(query, limit, price_min=price_min, price_max=price_max or budget)
 
 def search_gifts_and_accessories(query, limit=5, budget=None):
     """Поиск подарков и аксессуаров с бюджетом"""
-    return universal_search.search_all_products(query, limit, price_max=budget)
+    return get_universal_search().search_all_products(query, limit, price_max=budget)
 
 def search_budget_flowers(budget, query="flori frumoase", limit=10):
     """Поиск цветов в бюджете"""
-    return universal_search.search_budget_flowers(budget, query, limit)
+    return get_universal_search().search_budget_flowers(budget, query, limit)
 
 def search_budget_gifts(budget, query="cadou frumos", limit=10):
     """Поиск подарков в бюджете"""
-    return universal_search.search_budget_gifts(budget, query, limit)
+    return get_universal_search().search_budget_gifts(budget, query, limit)
 
 def search_by_price_range(price_min, price_max, query="", limit=10, flowers_only=False):
     """Поиск в ценовом диапазоне"""
-    return universal_search.search_by_price_range(price_min, price_max, query, limit, flowers_only)
+    return get_universal_search().search_by_price_range(price_min, price_max, query, limit, flowers_only)
 
 def get_price_suggestions(query="", flowers_only=False):
     """Получить предложения по ценовым категориям"""
-    return universal_search.get_price_suggestions(query, flowers_only)
-
-# Обратная совместимость
-vector_search = universal_search
+    return get_universal_search().get_price_suggestions(query, flowers_only)
 
 def search_flowers(query, limit=5, budget=None):
     """Обратная совместимость с поддержкой бюджета"""
-    return universal_search.search_flowers_only(query, limit, price_max=budget)
+    return get_universal_search().search_flowers_only(query, limit, price_max=budget)
 
 def search_flowers_in_budget(query, max_price, limit=5):
     """Поиск цветов в бюджете (обратная совместимость)"""
-    return universal_search.search_budget_flowers(max_price, query, limit)
\ No newline at end of file
+    return get_universal_search().search_budget_flowers(max_price, query, limit)
\ No newline at end of file
@@ -25,7 +25,29 @@ from .prompts import (
 )
 from .intent_classifier import IntentClassifier
 from .product_search import ProductSearchEngine
-from .conversation_context import ConversationContext
+from .conversation_context import ConversationContext, get_conversation_context
+
+# Occasion keywords, checked in this order (first match wins)
+OCCASION_KEYWORDS = {
+    'birthday': ['aniversar', 'ziua', 'birthday', 'sărbător'],
+    'wedding': ['nuntă', 'căsător', 'wedding', 'mireasă'],
+    'romantic': ['valentine', 'dragoste', 'iubire', 'romantic'],
+    'mother': ['mamă', 'mama', 'mother', '8 martie'],
+    'funeral': ['înmormântare', 'condoleanțe', 'funeral', 'coroană'],
+    'congratulations': ['felicitări', 'congratulations', 'succes', 'promovare'],
+    'apology': ['scuze', 'iertare', 'sorry', 'apologize']
+}
+
+# FAQ topics (keys of ENHANCED_FAQ_RESPONSES), checked in this order
+FAQ_KEYWORDS = {
+    'working_hours': ['program', 'orar', 'ore', 'deschis'],
+    'delivery': ['livrare', 'transport', 'livrat'],
+    'location': ['unde', 'locație', 'adresă'],
+    'return_policy': ['returnare', 'schimb', 'retur']
+}
+
+# Keyword groups this handler needs in the classifier's matcher
+HANDLER_KEYWORDS = {'occasion': OCCASION_KEYWORDS, 'faq': FAQ_KEYWORDS}
 
 
 class ActionHandler:
@@ -33,11 +55,30 @@ class ActionHandler:
     Enhanced action handler with context awareness and personalization
     """
     
-    def __init__(self):
-        """Initialize the enhanced action handler"""
-        self.intent_classifier = IntentClassifier()
-        self.product_search = ProductSearchEngine()
-        self.context_manager = ConversationContext()
+    def __init__(self, intent_classifier: Optional[IntentClassifier] = None,
+                 product_search: Optional[ProductSearchEngine] = None,
+                 context_manager: Optional[ConversationContext] = None):
+        """
+        Initialize the enhanced action handler
+        
+        Args:
+            intent_classifier: Shared classifier (built with HANDLER_KEYWORDS if omitted)
+            product_search: Shared product search engine
+            context_manager: Shared conversation context (defaults to the classifier's)
+        """
+        if context_manager is None:
+            context_manager = intent_classifier.context_manager if intent_classifier else get_conversation_context()
+        if intent_classifier is None:
+            intent_classifier = IntentClassifier(extra_keywords=HANDLER_KEYWORDS, context_manager=context_manager)
+        self.intent_classifier = intent_classifier
+        self.keyword_matcher = intent_classifier.keyword_matcher
+        missing = [group for group in HANDLER_KEYWORDS if not self.keyword_matcher.has_group(group)]
+        if missing:
+            for group in missing:
+                self.keyword_matcher.add_group(group, HANDLER_KEYWORDS[group])
+            self.keyword_matcher.build()
+        self.product_search = product_search or ProductSearchEngine()
+        self.context_manager = context_manager
         self.business_info = BUSINESS_INFO
         
     def handle_message(self, message: str, user_id: str) -> Tuple[str, str, float]:
@@ -51,15 +92,34 @@ class ActionHandler:
         Returns:
             Tuple[str, str, float]: (response, intent, confidence)
         """
+        # One keyword scan serves the classifier and the FAQ/occasion lookups
+        hits = self.intent_classifier.scan_message(message)
+        
         # Classify intent with context
-        intent, confidence = self.intent_classifier.classify_intent(message, user_id)
+        intent, confidence = self.intent_classifier.classify_intent(message, user_id, hits=hits)
+        return self.respond(message, user_id, intent, confidence, hits=hits)
+    
+    def respond(self, message: str, user_id: str, intent: str, confidence: float,
+                hits: Optional[Dict[str, bool]] = None) -> Tuple[str, str, float]:
+        """
+        Build the reply for an already classified message and record the turn
         
+        Args:
+            message (str): User message
+            user_id (str): User identifier
+            intent (str): Classified intent
+            confidence (float): Classification confidence
+            hits: IntentClassifier.scan_message() result, if the message was already scanned
+            
+        Returns:
+            Tuple[str, str, float]: (response, intent, confidence)
+        """
         # Handle special cases
         if intent == "jailbreak":
             response = self._handle_jailbreak()
         else:
             # Route to appropriate handler
-            response = self._route_to_handler(intent, message, user_id)
+            response = self._route_to_handler(intent, message, user_id, hits)
             
             # Personalize response based on context
             response = self._personalize_response(response, user_id, intent)
@@ -75,11 +135,12 @@ class ActionHandler:
         
         return response, intent, confidence
     
-    def _route_to_handler(self, intent: str, message: str, user_id: str) -> str:
-        """Route message to appropriate handler"""
+    def _route_to_handler(self, intent: str, message: str, user_id: str,
+                          hits: Optional[Dict[str, bool]] = None) -> str:
+        """Route message to appropriate handler (hits: keyword scan of the message, if already made)"""
         handlers = {
-            'find_product': lambda: self.handle_find_product(message, user_id),
-            'ask_question': lambda: self.handle_ask_question(message, user_id),
+            'find_product': lambda: self.handle_find_product(message, user_id, hits),
+            'ask_question': lambda: self.handle_ask_question(message, user_id, hits),
             'subscribe': lambda: self.handle_subscribe(message, user_id),
             'pay_for_product': lambda: self.handle_pay_for_product(message, user_id),
             'greeting': lambda: self.handle_greeting(message, user_id),
@@ -129,7 +190,7 @@ class ActionHandler:
         else:
             return ENHANCED_GREETING_RESPONSES["first_time"]
     
-    def handle_find_product(self, message: str, user_id: str) -> str:
+    def handle_find_product(self, message: str, user_id: str, hits: Optional[Dict[str, bool]] = None) -> str:
         """Handle product search requests with conversational and empathetic approach"""
         # Extract search query from message
         query = self._extract_search_query(message)
@@ -138,7 +199,7 @@ class ActionHandler:
         budget_amount = self._extract_budget_from_message(message)
         
         # Analyze the context and occasion
-        occasion_context = self._analyze_occasion_context(message)
+        occasion_context = self._analyze_occasion_context(message, hits)
         
         # Get user preferences for personalized search
         user_profile = self.context_manager.get_user_profile(user_id)
@@ -210,19 +271,14 @@ Vă rugăm să îmi spuneți mai multe despre:
         
         return response
     
-    def handle_ask_question(self, message: str, user_id: str = None) -> str:
+    def handle_ask_question(self, message: str, user_id: str = None, hits: Optional[Dict[str, bool]] = None) -> str:
         """Handle general questions about business"""
         message_lower = message.lower()
         
         # Check for specific FAQ topics
-        if any(word in message_lower for word in ['program', 'orar', 'ore', 'deschis']):
-            return ENHANCED_FAQ_RESPONSES["working_hours"]
-        elif any(word in message_lower for word in ['livrare', 'transport', 'livrat']):
-            return ENHANCED_FAQ_RESPONSES["delivery"]
-        elif any(word in message_lower for word in ['unde', 'locație', 'adresă']):
-            return ENHANCED_FAQ_RESPONSES["location"]
-        elif any(word in message_lower for word in ['returnare', 'schimb', 'retur']):
-            return ENHANCED_FAQ_RESPONSES["return_policy"]
+        topic = self.keyword_matcher.first_label(message_lower, 'faq', FAQ_KEYWORDS, hits)
+        if topic:
+            return ENHANCED_FAQ_RESPONSES[topic]
         else:
             return """
 🌸 **Informații XOFlowers:**
@@ -544,27 +600,12 @@ Pentru a verifica statusul comenzii dumneavoastră, vă rugăm să ne furnizați
         
         return None
 
-    def _analyze_occasion_context(self, message: str) -> str:
+    def _analyze_occasion_context(self, message: str, hits: Optional[Dict[str, bool]] = None) -> str:
         """Analyze the occasion context from the message"""
         message_lower = message.lower()
         
         # Check for specific occasions
-        if any(word in message_lower for word in ['aniversar', 'ziua', 'birthday', 'sărbător']):
-            return "birthday"
-        elif any(word in message_lower for word in ['nuntă', 'căsător', 'wedding', 'mireasă']):
-            return "wedding"
-        elif any(word in message_lower for word in ['valentine', 'dragoste', 'iubire', 'romantic']):
-            return "romantic"
-        elif any(word in message_lower for word in ['mamă', 'mama', 'mother', '8 martie']):
-            return "mother"
-        elif any(word in message_lower for word in ['înmormântare', 'condoleanțe', 'funeral', 'coroană']):
-            return "funeral"
-        elif any(word in message_lower for word in ['felicitări', 'congratulations', 'succes', 'promovare']):
-            return "congratulations"
-        elif any(word in message_lower for word in ['scuze', 'iertare', 'sorry', 'apologize']):
-            return "apology"
-        else:
-            return "general"
+        return self.keyword_matcher.first_label(message_lower, 'occasion', OCCASION_KEYWORDS, hits) or "general"
     
     def _generate_contextual_response(self, occasion_context: str, message: str) -> str:
         """Generate contextual response based on occasion"""
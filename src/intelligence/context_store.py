@@ -0,0 +1,843 @@
+"""
+Conversation Context Storage
+Persistence backends behind ConversationContext. Stores exchange plain
+JSON-ready dicts (the serialized turns and profiles), so they do not depend
+on the dataclasses and can be swapped through configuration
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # No flock (Windows): keep one process per log store directory
+    HAS_FCNTL = False
+
+Record = Dict[str, Any]
+
+
+def _dumps(data: Any) -> str:
+    """Compact JSON, non-ASCII kept as is"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class ContextStore(ABC):
+    """
+    Storage for conversation turns and user profiles
+
+    write() receives only what changed since the previous write: the current
+    turn window of every user whose context changed, every changed profile,
+    and the new turns in arrival order. Each backend uses the parts it needs.
+
+    ConversationContext reads users one at a time with load_user(), when a
+    user is first seen and again after they were evicted from memory.
+    Backends must implement both; the bulk loaders, stats and close are optional.
+    """
+
+    @abstractmethod
+    def load_user(self, user_id: str) -> Tuple[List[Record], Optional[Record]]:
+        """Live turns (oldest first) and profile of one user"""
+
+    def load_contexts(self) -> Dict[str, List[Record]]:
+        """Stored turns per user, oldest first"""
+        return {}
+
+    def load_profiles(self) -> Dict[str, Record]:
+        """Stored profiles per user"""
+        return {}
+
+    @abstractmethod
+    def write(self, contexts: Dict[str, List[Record]], profiles: Dict[str, Record], turns: List[Record]):
+        """Persist the changes since the previous write"""
+
+    def forget(self, user_ids: List[str]):
+        """Drop any per-user state kept for users ConversationContext evicted"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self):
+        pass
+
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _object_member_spans(data: bytes) -> Dict[str, Tuple[int, int]]:
+    """
+    Byte span of every '"key":value' member of a top-level JSON object, in file order
+
+    The bytes are decoded as Latin-1 so character positions are byte positions;
+    JSON syntax is ASCII, so multi-byte UTF-8 only ever lands inside strings.
+    """
+    text = data.decode('latin-1')
+    decoder = json.JSONDecoder()
+    spans: Dict[str, Tuple[int, int]] = {}
+
+    def skip(position: int) -> int:
+        return _JSON_WHITESPACE.match(text, position).end()
+
+    position = skip(0)
+    if text[position:position + 1] != '{':
+        raise ValueError("expected a JSON object")
+    position = skip(position + 1)
+    if text[position:position + 1] == '}':
+        return spans
+    while True:
+        start = position
+        key, position = decoder.raw_decode(text, position)
+        position = skip(position)
+        if text[position:position + 1] != ':':
+            raise ValueError(f"expected ':' at byte {position}")
+        _, position = decoder.raw_decode(text, skip(position + 1))
+        try:
+            key = key.encode('latin-1').decode('utf-8')
+        except UnicodeError:
+            pass  # Escaped (\uXXXX) keys are already decoded
+        spans[key] = (start, position)
+        position = skip(position)
+        if text[position:position + 1] == '}':
+            return spans
+        if text[position:position + 1] != ',':
+            raise ValueError(f"expected ',' at byte {position}")
+        position = skip(position + 1)
+
+
+class JsonFileStore(ContextStore):
+    """
+    contexts.json and profiles.json in the storage directory
+
+    Memory holds only the byte span of each user's '"user_id":{...}' member
+    in the files; load_user reads that member back. A write JSON-encodes only
+    the changed users and copies every other member byte for byte from the
+    current file. The file itself is still rewritten whole (atomically, and
+    only when its part changed), so each flush costs I/O proportional to the
+    total number of users; the log and SQLite backends avoid that.
+    """
+
+    def __init__(self, storage_path: str = "data"):
+        """
+        Initialize the store
+
+        Args:
+            storage_path: Directory holding contexts.json and profiles.json
+        """
+        self.storage_path = storage_path
+        self.context_file = os.path.join(storage_path, "contexts.json")
+        self.profile_file = os.path.join(storage_path, "profiles.json")
+        os.makedirs(storage_path, exist_ok=True)
+        # file -> user_id -> (start, end) byte span of the user's member; swapped with the file
+        self._spans: Dict[str, Dict[str, Tuple[int, int]]] = {
+            self.context_file: self._index(self.context_file, "contexts"),
+            self.profile_file: self._index(self.profile_file, "profiles")
+        }
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.serialized = 0
+
+    @staticmethod
+    def _read(path: str, what: str) -> Dict:
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"❌ Error loading {what}: {e}")
+        return {}
+
+    @staticmethod
+    def _index(path: str, what: str) -> Dict[str, Tuple[int, int]]:
+        """Byte spans of the members of the file's top-level object"""
+        try:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return _object_member_spans(f.read())
+        except Exception as e:
+            print(f"❌ Error loading {what}: {e}")
+        return {}
+
+    def _read_member(self, path: str, user_id: str) -> Any:
+        span = self._spans[path].get(user_id)
+        if span is None:
+            return None
+        with open(path, 'rb') as f:
+            f.seek(span[0])
+            member = f.read(span[1] - span[0])
+        return next(iter(json.loads(b'{' + member + b'}').values()))
+
+    def load_user(self, user_id: str) -> Tuple[List[Record], Optional[Record]]:
+        with self._lock:
+            return self._read_member(self.context_file, user_id) or [], self._read_member(self.profile_file, user_id)
+
+    def load_contexts(self) -> Dict[str, List[Record]]:
+        with self._lock:
+            return self._read(self.context_file, "contexts")
+
+    def load_profiles(self) -> Dict[str, Record]:
+        with self._lock:
+            return self._read(self.profile_file, "profiles")
+
+    def write(self, contexts: Dict[str, List[Record]], profiles: Dict[str, Record], turns: List[Record]):
+        for changed, path in ((contexts, self.context_file), (profiles, self.profile_file)):
+            if changed:
+                self._rewrite(path, changed)
+                self.serialized += len(changed)
+                self.writes += 1
+
+    def _rewrite(self, path: str, changed: Dict[str, Any]):
+        """Write the file with the changed members encoded and the others copied, then swap it in"""
+        spans = self._spans[path]
+        new_spans: Dict[str, Tuple[int, int]] = {}
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # Only the flusher writes, so the current file and its spans stay put while copying
+            with open(tmp_path, 'wb') as out, open(path if spans else os.devnull, 'rb') as current:
+                out.write(b'{')
+                position = 1
+                for user_id in list(spans) + [user_id for user_id in changed if user_id not in spans]:
+                    if user_id in changed:
+                        member = f"{_dumps(user_id)}:{_dumps(changed[user_id])}".encode('utf-8')
+                    else:
+                        start, end = spans[user_id]
+                        current.seek(start)
+                        member = current.read(end - start)
+                    if new_spans:
+                        out.write(b',')
+                        position += 1
+                    out.write(member)
+                    new_spans[user_id] = (position, position + len(member))
+                    position += len(member)
+                out.write(b'}')
+            with self._lock:
+                os.replace(tmp_path, path)
+                self._spans[path] = new_spans
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'json',
+            'users': len(self._spans[self.context_file]),
+            'profiles': len(self._spans[self.profile_file]),
+            'writes': self.writes,
+            'serialized': self.serialized
+        }
+
+
+_TIMESTAMP_PREFIX = '{"timestamp":"'
+
+
+def _turn_line(record: Record) -> str:
+    """One log line per turn; the timestamp goes first so loading can skip old lines unparsed"""
+    return json.dumps({'timestamp': record['timestamp'], **record}, ensure_ascii=False, separators=(',', ':'))
+
+
+def _line_timestamp(line: str) -> str:
+    if line.startswith(_TIMESTAMP_PREFIX):
+        end = line.find('"', len(_TIMESTAMP_PREFIX))
+        if end != -1:
+            return line[len(_TIMESTAMP_PREFIX):end]
+    return json.loads(line).get('timestamp', '')
+
+
+class _FileLock:
+    """
+    Exclusive flock on a lock file, shared by every process using the directory
+
+    Re-entrant within the owning process; callers serialize their threads
+    with their own lock first (flock does not exclude threads sharing a file).
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, 'a')
+        self._depth = 0
+
+    def __enter__(self):
+        if self._depth == 0 and HAS_FCNTL:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and HAS_FCNTL:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        self._file.close()
+
+
+class LogFileStore(ContextStore):
+    """
+    Append-only JSON-lines logs: contexts.jsonl (one record per turn) and
+    profiles.jsonl (one record per profile change, the last one wins)
+
+    A write appends only the new turns and changed profiles. Memory holds no
+    records, only the byte offsets of every user's last max_turns turns and
+    of their latest profile line; load_user seeks to them and parses just
+    that user. Startup reads only turns inside the context window: ISO
+    timestamps sort as strings, so older lines are skipped without being
+    parsed. A log is compacted (rewritten atomically with only live records)
+    once it holds compact_ratio times more records than are live. Existing
+    contexts.json / profiles.json files are imported on first start and left
+    in place.
+
+    Several processes may share the directory: appends, compactions and
+    reads hold an flock on store.lock. Before each read or write the store
+    indexes the lines other processes appended since it last looked (and
+    re-indexes a log another process compacted and replaced), and compaction
+    rebuilds the logs from what is on disk, not from this process's memory.
+    A changed profile is merged into the one other processes wrote since this
+    process loaded it (see merge_profile), so neither overwrites the other's
+    increments.
+    """
+
+    def __init__(self, storage_path: str = "data", context_window: timedelta = timedelta(hours=2),
+                 max_turns: int = 20, compact_ratio: float = 2.0, compact_min_records: int = 1000):
+        """
+        Open (or create) the logs
+
+        Args:
+            storage_path: Directory holding the logs
+            context_window: Turns older than this are not loaded and are dropped by compaction
+            max_turns: Turns kept per user
+            compact_ratio: Compact once the log holds this many records per live record
+            compact_min_records: Never compact logs smaller than this
+        """
+        self.storage_path = storage_path
+        self.context_window = context_window
+        self.max_turns = max_turns
+        self.compact_ratio = compact_ratio
+        self.compact_min_records = compact_min_records
+        self.context_log = os.path.join(storage_path, "contexts.jsonl")
+        self.profile_log = os.path.join(storage_path, "profiles.jsonl")
+        os.makedirs(storage_path, exist_ok=True)
+
+        # user_id -> byte offsets of their latest turns (trimmed to max_turns) / latest profile line
+        self._turn_offsets: Dict[str, List[int]] = {}
+        self._profile_offsets: Dict[str, int] = {}
+        # Inode and byte size each index was built from: another process may replace or extend the log
+        self._indexed_inodes: Dict[str, int] = {}
+        self._indexed_sizes: Dict[str, int] = {}
+        # user_id -> profile JSON as this process last loaded or wrote it (the merge base)
+        self._profile_bases: Dict[str, str] = {}
+        # load_user runs on message threads while the flusher writes
+        self._lock = threading.RLock()
+        self._context_records = 0
+        self._profile_records = 0
+        self.compactions = 0
+        self.skipped_on_load = 0
+        self.loads = 0
+        self.merged = 0
+
+        self._file_lock = _FileLock(os.path.join(storage_path, "store.lock"))
+        with self._file_lock:
+            self._migrate()
+            self._context_file = self._open_log(self.context_log)
+            self._profile_file = self._open_log(self.profile_log)
+            self._index_turns()
+            self._index_profiles()
+
+    def _cutoff(self) -> str:
+        return (datetime.now() - self.context_window).isoformat()
+
+    def _migrate(self):
+        """Import the whole-file JSON stores once"""
+        legacy_contexts = os.path.join(self.storage_path, "contexts.json")
+        if not os.path.exists(self.context_log) and os.path.exists(legacy_contexts):
+            contexts = JsonFileStore._read(legacy_contexts, "contexts")
+            cutoff = self._cutoff()
+            turns = sorted(
+                (turn for user_turns in contexts.values() for turn in user_turns if turn['timestamp'] >= cutoff),
+                key=lambda turn: turn['timestamp']
+            )
+            self._rewrite(self.context_log, (_turn_line(turn) for turn in turns))
+            print(f"📦 Migrated {len(turns)} live turns of {len(contexts)} users to {self.context_log}")
+
+        legacy_profiles = os.path.join(self.storage_path, "profiles.json")
+        if not os.path.exists(self.profile_log) and os.path.exists(legacy_profiles):
+            profiles = JsonFileStore._read(legacy_profiles, "profiles")
+            self._rewrite(self.profile_log, (self._profile_line(user_id, profile) for user_id, profile in profiles.items()))
+            print(f"📦 Migrated {len(profiles)} profiles to {self.profile_log}")
+
+    @staticmethod
+    def _profile_line(user_id: str, profile: Record) -> str:
+        return json.dumps({'key': user_id, 'profile': profile}, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def _rewrite(path: str, lines: Iterator[str]):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for line in lines:
+                f.write(line.encode('utf-8'))
+                f.write(b'\n')
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _terminate_torn_line(handle, path: str):
+        """A torn last line from a crash is terminated so the next record starts clean"""
+        if handle.seek(0, os.SEEK_END):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+            if torn:
+                handle.write(b'\n')
+                handle.flush()
+
+    @classmethod
+    def _open_log(cls, path: str):
+        """Append handle on a log"""
+        handle = open(path, 'ab')
+        cls._terminate_torn_line(handle, path)
+        return handle
+
+    @staticmethod
+    def _read_lines(path: str, start: int = 0) -> Iterator[Tuple[int, str]]:
+        """(byte offset, line) of every non-empty line from byte start on"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                line = raw.strip()
+                if line:
+                    yield offset, line.decode('utf-8', errors='replace')
+                offset += len(raw)
+
+    @staticmethod
+    def _read_records(path: str, offsets: List[int]) -> List[Record]:
+        """Parse the lines starting at the given offsets"""
+        records = []
+        if offsets:
+            with open(path, 'rb') as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    records.append(json.loads(f.readline()))
+        return records
+
+    def _add_turn_offset(self, user_id: str, offset: int):
+        offsets = self._turn_offsets.get(user_id)
+        if offsets is None:
+            offsets = self._turn_offsets[user_id] = []
+        offsets.append(offset)
+        if len(offsets) > 2 * self.max_turns:
+            del offsets[:-self.max_turns]
+
+    def _index_turns(self, start: int = 0):
+        """Offsets of the live turns in contexts.jsonl, from byte start on (0 rebuilds the index)"""
+        if not start:
+            self._turn_offsets = {}
+            self._context_records = 0
+        cutoff = self._cutoff()
+        for offset, line in self._read_lines(self.context_log, start):
+            self._context_records += 1
+            try:
+                if _line_timestamp(line) < cutoff:
+                    self.skipped_on_load += 1
+                    continue
+                self._add_turn_offset(json.loads(line)['user_id'], offset)
+            except ValueError:
+                # A torn line from a crash mid-append
+                self.skipped_on_load += 1
+        self._mark_indexed(self.context_log)
+
+    def _index_profiles(self, start: int = 0):
+        """Offset of the latest line of every profile in profiles.jsonl, from byte start on (0 rebuilds the index)"""
+        if not start:
+            self._profile_offsets = {}
+            self._profile_records = 0
+        for offset, line in self._read_lines(self.profile_log, start):
+            self._profile_records += 1
+            try:
+                self._profile_offsets[json.loads(line)['key']] = offset
+            except ValueError:
+                continue
+        self._mark_indexed(self.profile_log)
+
+    def _mark_indexed(self, path: str):
+        # Called under the file lock, so nobody has appended since the read
+        stat = os.stat(path)
+        self._indexed_inodes[path] = stat.st_ino
+        self._indexed_sizes[path] = stat.st_size
+
+    def _catch_up(self):
+        """Index what other processes appended since the last look; reopen logs they compacted and replaced"""
+        for attribute, path, index in (('_context_file', self.context_log, self._index_turns),
+                                       ('_profile_file', self.profile_log, self._index_profiles)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+            indexed_size = self._indexed_sizes.get(path, 0)
+            if stat is None or stat.st_ino != self._indexed_inodes.get(path) or stat.st_size < indexed_size:
+                getattr(self, attribute).close()
+                setattr(self, attribute, self._open_log(path))
+                index()
+            elif stat.st_size > indexed_size:
+                self._terminate_torn_line(getattr(self, attribute), path)
+                index(indexed_size)
+
+    def load_user(self, user_id: str) -> Tuple[List[Record], Optional[Record]]:
+        cutoff = self._cutoff()
+        with self._lock, self._file_lock:
+            self._catch_up()
+            turns = self._read_records(self.context_log, self._turn_offsets.get(user_id, [])[-self.max_turns:])
+            profile_offset = self._profile_offsets.get(user_id)
+            profiles = self._read_records(self.profile_log, [] if profile_offset is None else [profile_offset])
+            if profiles:
+                self._profile_bases[user_id] = _dumps(profiles[0]['profile'])
+            self.loads += 1
+        return [turn for turn in turns if turn['timestamp'] >= cutoff], profiles[0]['profile'] if profiles else None
+
+    def load_contexts(self) -> Dict[str, List[Record]]:
+        with self._lock:
+            user_ids = list(self._turn_offsets)
+        contexts = {user_id: self.load_user(user_id)[0] for user_id in user_ids}
+        return {user_id: turns for user_id, turns in contexts.items() if turns}
+
+    def load_profiles(self) -> Dict[str, Record]:
+        with self._lock:
+            user_ids = list(self._profile_offsets)
+        return {user_id: self.load_user(user_id)[1] for user_id in user_ids}
+
+    def write(self, contexts: Dict[str, List[Record]], profiles: Dict[str, Record], turns: List[Record]):
+        with self._lock, self._file_lock:
+            self._catch_up()
+            self._append(profiles, turns)
+            self._maybe_compact()
+
+    def _append(self, profiles: Dict[str, Record], turns: List[Record]):
+        # Under the file lock nobody else appends, so the end of the file is where our lines start
+        if turns:
+            lines = [(turn['user_id'], (_turn_line(turn) + '\n').encode('utf-8')) for turn in turns]
+            offset = self._context_file.seek(0, os.SEEK_END)
+            self._context_file.write(b''.join(data for _, data in lines))
+            self._context_file.flush()
+            for user_id, data in lines:
+                self._add_turn_offset(user_id, offset)
+                offset += len(data)
+            self._context_records += len(turns)
+            self._indexed_sizes[self.context_log] = offset
+        if profiles:
+            lines = [(user_id, (self._profile_line(user_id, profile) + '\n').encode('utf-8'))
+                     for user_id, profile in self._merge_stored(profiles).items()]
+            offset = self._profile_file.seek(0, os.SEEK_END)
+            self._profile_file.write(b''.join(data for _, data in lines))
+            self._profile_file.flush()
+            for user_id, data in lines:
+                self._profile_offsets[user_id] = offset
+                offset += len(data)
+            self._profile_records += len(profiles)
+            self._indexed_sizes[self.profile_log] = offset
+            self._profile_bases.update((user_id, _dumps(profile)) for user_id, profile in profiles.items())
+
+    def _merge_stored(self, profiles: Dict[str, Record]) -> Dict[str, Record]:
+        """The changed profiles, merged into the stored ones other processes wrote since our last load or write"""
+        stored_ids = [user_id for user_id in profiles if user_id in self._profile_offsets]
+        stored = self._read_records(self.profile_log, [self._profile_offsets[user_id] for user_id in stored_ids])
+        merged = dict(profiles)
+        for user_id, record in zip(stored_ids, stored):
+            base = self._profile_bases.get(user_id)
+            if _dumps(record['profile']) != base:
+                merged[user_id] = merge_profile(json.loads(base) if base else None, profiles[user_id], record['profile'])
+                self.merged += 1
+        return merged
+
+    def _live_turns(self) -> int:
+        return sum(min(len(offsets), self.max_turns) for offsets in self._turn_offsets.values())
+
+    def _maybe_compact(self):
+        threshold = max(self.compact_min_records, 1)
+        if self._context_records >= threshold and self._context_records > self.compact_ratio * self._live_turns():
+            self.compact_contexts()
+        if self._profile_records >= threshold and self._profile_records > self.compact_ratio * len(self._profile_offsets):
+            self.compact_profiles()
+
+    def compact_contexts(self):
+        """Rewrite contexts.jsonl with only the live tail of every user, including other processes' users"""
+        with self._lock, self._file_lock:
+            cutoff = self._cutoff()
+            tails: Dict[str, Deque[str]] = {}
+            for _, line in self._read_lines(self.context_log):
+                try:
+                    if _line_timestamp(line) < cutoff:
+                        continue
+                    user_id = json.loads(line)['user_id']
+                except ValueError:
+                    continue
+                tail = tails.get(user_id)
+                if tail is None:
+                    tail = tails[user_id] = deque(maxlen=self.max_turns)
+                tail.append(line)
+            lines = sorted((line for tail in tails.values() for line in tail), key=_line_timestamp)
+
+            self._context_file.close()
+            self._rewrite(self.context_log, iter(lines))
+            self._context_file = self._open_log(self.context_log)
+            self._index_turns()
+            self.compactions += 1
+
+    def compact_profiles(self):
+        """Rewrite profiles.jsonl with the latest record of every user, including other processes' users"""
+        with self._lock, self._file_lock:
+            latest: Dict[str, str] = {}
+            for _, line in self._read_lines(self.profile_log):
+                try:
+                    latest[json.loads(line)['key']] = line
+                except ValueError:
+                    continue
+
+            self._profile_file.close()
+            self._rewrite(self.profile_log, iter(latest.values()))
+            self._profile_file = self._open_log(self.profile_log)
+            self._index_profiles()
+            self.compactions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'log',
+            'users': len(self._turn_offsets),
+            'live_turns': self._live_turns(),
+            'log_records': self._context_records,
+            'profiles': len(self._profile_offsets),
+            'profile_records': self._profile_records,
+            'compactions': self.compactions,
+            'skipped_on_load': self.skipped_on_load,
+            'loads': self.loads,
+            'merged': self.merged
+        }
+
+    def forget(self, user_ids: List[str]):
+        with self._lock:
+            for user_id in user_ids:
+                self._profile_bases.pop(user_id, None)
+
+    def close(self):
+        self._context_file.close()
+        self._profile_file.close()
+        self._file_lock.close()
+
+
+def _merge_value(before: Any, local: Any, stored: Any) -> Any:
+    """Three-way merge of one profile value: this process changed before -> local, stored may hold others' changes"""
+    if local == before:
+        return stored
+    if stored is None or stored == before:
+        return local
+    if isinstance(local, list) and isinstance(stored, list):
+        return stored + [item for item in local if item not in stored]
+    if isinstance(local, dict) and isinstance(stored, dict):
+        before = before if isinstance(before, dict) else {}
+        merged = dict(stored)
+        for key, value in local.items():
+            merged[key] = _merge_value(before.get(key), value, stored.get(key))
+        return merged
+    if isinstance(local, int) and isinstance(stored, int) and not isinstance(local, bool):
+        # Counters: add this process's increment to the stored total
+        return stored + local - (before if isinstance(before, int) else 0)
+    return local
+
+
+def merge_profile(before: Optional[Record], local: Record, stored: Optional[Record]) -> Record:
+    """
+    Merge a profile this process changed into the copy stored by other processes
+
+    Args:
+        before: The profile as this process last loaded or wrote it (None if never)
+        local: The profile as this process has it now
+        stored: The profile currently in the store (None if absent)
+
+    Returns:
+        Record: Counters add up, lists and dicts keep both sides' additions,
+        interaction times widen, other fields take this process's change
+    """
+    if stored is None:
+        return local
+    before = before or {}
+    merged = dict(stored)
+    for field, value in local.items():
+        if field in ('first_interaction', 'last_interaction') and value and stored.get(field):
+            merged[field] = min(value, stored[field]) if field == 'first_interaction' else max(value, stored[field])
+        else:
+            merged[field] = _merge_value(before.get(field), value, stored.get(field))
+    return merged
+
+
+class SQLiteContextStore(ContextStore):
+    """
+    Turns and profiles in a SQLite database (WAL mode), loaded per user on demand
+
+    Turns are indexed by (user_id, timestamp), so loading a user reads only
+    their live tail. Each write is one transaction with batched inserts and
+    profile upserts; the SQL strings are constant, so sqlite3 reuses the
+    prepared statements. WAL lets the Telegram and Instagram processes read
+    while the other one writes; turns older than the context window are
+    pruned every prune_interval seconds.
+
+    Both processes may update the same user's profile. A write re-reads the
+    stored profile inside its transaction and merges in only what this
+    process changed since it loaded or last wrote that profile (see
+    merge_profile), so neither process overwrites the other's increments.
+    """
+
+    def __init__(self, path: str, context_window: timedelta = timedelta(hours=2),
+                 max_turns: int = 20, prune_interval: float = 300.0):
+        """
+        Open (or create) the database
+
+        Args:
+            path: SQLite database file
+            context_window: Turns older than this are not loaded and get pruned
+            max_turns: Turns loaded per user
+            prune_interval: Seconds between deletes of expired turns
+        """
+        self.path = path
+        self.context_window = context_window
+        self.max_turns = max_turns
+        self.prune_interval = prune_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, timestamp TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_user_time ON turns (user_id, timestamp)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_time ON turns (timestamp)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " user_id TEXT PRIMARY KEY, updated TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._next_prune = time.monotonic()
+        # user_id -> profile JSON as this process last loaded or wrote it (the merge base)
+        self._profile_bases: Dict[str, str] = {}
+        self.loads = 0
+        self.pruned = 0
+        self.merged = 0
+
+    def _cutoff(self) -> str:
+        return (datetime.now() - self.context_window).isoformat()
+
+    def load_user(self, user_id: str) -> Tuple[List[Record], Optional[Record]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM turns WHERE user_id = ? AND timestamp >= ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (user_id, self._cutoff(), self.max_turns)
+            ).fetchall()
+            profile = self._conn.execute("SELECT record FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+            if profile:
+                self._profile_bases[user_id] = profile[0]
+            self.loads += 1
+        return [json.loads(record) for record, in reversed(rows)], json.loads(profile[0]) if profile else None
+
+    def write(self, contexts: Dict[str, List[Record]], profiles: Dict[str, Record], turns: List[Record]):
+        turn_rows = [
+            (turn['user_id'], turn['timestamp'], json.dumps(turn, ensure_ascii=False, separators=(',', ':')))
+            for turn in turns
+        ]
+        updated = datetime.now().isoformat()
+        local_records = {user_id: _dumps(profile) for user_id, profile in profiles.items()}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if turn_rows:
+                    self._conn.executemany(
+                        "INSERT INTO turns (user_id, timestamp, record) VALUES (?, ?, ?)", turn_rows
+                    )
+                profile_rows = []
+                for user_id, profile in profiles.items():
+                    record = local_records[user_id]
+                    stored = self._conn.execute("SELECT record FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+                    if stored and stored[0] != self._profile_bases.get(user_id):
+                        # Another process wrote this profile since we read it
+                        base = self._profile_bases.get(user_id)
+                        record = _dumps(merge_profile(json.loads(base) if base else None, profile, json.loads(stored[0])))
+                        self.merged += 1
+                    profile_rows.append((user_id, updated, record))
+                if profile_rows:
+                    self._conn.executemany(
+                        "INSERT INTO profiles (user_id, updated, record) VALUES (?, ?, ?) "
+                        "ON CONFLICT (user_id) DO UPDATE SET updated = excluded.updated, record = excluded.record",
+                        profile_rows
+                    )
+                if time.monotonic() >= self._next_prune:
+                    self.pruned += self._conn.execute(
+                        "DELETE FROM turns WHERE timestamp < ?", (self._cutoff(),)
+                    ).rowcount
+                    self._next_prune = time.monotonic() + self.prune_interval
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._profile_bases.update(local_records)
+
+    def forget(self, user_ids: List[str]):
+        # load_user reads the base again when the user comes back
+        with self._lock:
+            for user_id in user_ids:
+                self._profile_bases.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            turns = self._conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+            profiles = self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+        return {
+            'backend': 'sqlite', 'path': self.path, 'turns': turns, 'profiles': profiles,
+            'loads': self.loads, 'pruned': self.pruned, 'merged': self.merged
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_context_store(storage_path: str = "data", config: Optional[Dict[str, Any]] = None,
+                         context_window: timedelta = timedelta(hours=2), max_turns: int = 20) -> ContextStore:
+    """
+    Build the store selected in CONVERSATION_STORE['backend']
+
+    Args:
+        storage_path: Data directory
+        config: Store settings (CONVERSATION_STORE)
+        context_window: Conversation context lifetime
+        max_turns: Turns kept per user
+
+    Returns:
+        ContextStore: 'log' (default), 'json' or 'sqlite'
+    """
+    config = config or {}
+    backend = config.get('backend', 'log')
+    if backend == 'json':
+        return JsonFileStore(storage_path)
+    if backend == 'sqlite':
+        return SQLiteContextStore(
+            config.get('sqlite_path') or os.path.join(storage_path, "conversations.db"),
+            context_window=context_window,
+            max_turns=max_turns,
+            prune_interval=config.get('prune_interval', 300.0)
+        )
+    if backend != 'log':
+        print(f"⚠️ Unknown conversation store '{backend}', using log")
+    return LogFileStore(
+        storage_path,
+        context_window=context_window,
+        max_turns=max_turns,
+        compact_ratio=config.get('compact_ratio', 2.0),
+        compact_min_records=config.get('compact_min_records', 1000)
+    )
@@ -4,11 +4,22 @@ Manages conversation history, context, and memory for personalized interactions
 """
 
 import os
-import json
+import sys
 import time
-from typing import Dict, List, Optional, Any
+import atexit
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+
+# Add config and src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from settings import CONVERSATION_STORE, SESSION_CACHE
+from utils.session_cache import SessionCache
+from .context_store import ContextStore, create_context_store
 
 
 @dataclass
@@ -38,30 +49,145 @@ class UserProfile:
     special_occasions: List[str] = None
 
 
+NO_CONTEXT = "No previous conversation context."
+
+
+class TurnHistory:
+    """
+    Recent turns of one user, oldest first
+    
+    Turns sit in a bounded deque next to their monotonic arrival times, so
+    expiry pops from the left and never compares datetimes. Rendered context
+    strings are cached per limit until the history changes.
+    """
+    
+    __slots__ = ('turns', '_times', '_window', '_rendered')
+    
+    def __init__(self, max_turns: int, window_seconds: float):
+        """
+        Initialize an empty history
+        
+        Args:
+            max_turns (int): Turns kept (older ones fall off the left)
+            window_seconds (float): Turns older than this expire
+        """
+        self.turns: Deque[ConversationTurn] = deque(maxlen=max_turns)
+        self._times: Deque[float] = deque(maxlen=max_turns)
+        self._window = window_seconds
+        self._rendered: Dict[int, str] = {}
+    
+    def __len__(self) -> int:
+        return len(self.turns)
+    
+    def __iter__(self):
+        return iter(self.turns)
+    
+    def append(self, turn: ConversationTurn, at: Optional[float] = None):
+        """
+        Add a turn
+        
+        Args:
+            turn (ConversationTurn): The turn
+            at (float): Monotonic time of the turn (now by default; loaded turns pass their age)
+        """
+        self.turns.append(turn)
+        self._times.append(time.monotonic() if at is None else at)
+        self._rendered.clear()
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop turns older than the window; returns how many were dropped"""
+        cutoff = (time.monotonic() if now is None else now) - self._window
+        times = self._times
+        dropped = 0
+        while times and times[0] <= cutoff:
+            times.popleft()
+            self.turns.popleft()
+            dropped += 1
+        if dropped:
+            self._rendered.clear()
+        return dropped
+    
+    def recent(self, limit: int) -> List[ConversationTurn]:
+        """Last limit live turns, oldest first"""
+        self.expire()
+        turns = self.turns
+        count = len(turns)
+        return [turns[index] for index in range(max(count - limit, 0), count)]
+    
+    def render(self, limit: int) -> str:
+        """Context string of the last limit live turns (cached)"""
+        self.expire()
+        rendered = self._rendered.get(limit)
+        if rendered is None:
+            lines = []
+            for turn in self.recent(limit):
+                lines.append(f"User: {turn.user_message}")
+                lines.append(f"Bot: {turn.bot_response}")
+                lines.append(f"Intent: {turn.intent}")
+                lines.append("---")
+            rendered = self._rendered[limit] = "\n".join(lines) if lines else NO_CONTEXT
+        return rendered
+
+
 class ConversationContext:
     """
     Manages conversation context and user profiles
+    
+    Users are loaded from the store the first time they are seen and kept in
+    a bounded session cache; idle and least recently used users are dropped
+    from memory after their changes have been flushed, and reloaded on demand.
     """
     
-    def __init__(self, storage_path: str = "data"):
+    def __init__(self, storage_path: str = "data", store: Optional[ContextStore] = None,
+                 flush_interval: Optional[float] = None):
         """
         Initialize conversation context manager
         
         Args:
             storage_path (str): Path to store conversation data
+            store (ContextStore): Persistence backend (defaults to the one selected in
+                CONVERSATION_STORE, kept in storage_path)
+            flush_interval (float): Seconds between background writes; 0 writes on every
+                change (defaults to CONVERSATION_STORE['flush_interval'])
         """
         self.storage_path = storage_path
-        self.contexts: Dict[str, List[ConversationTurn]] = {}
+        self.contexts: Dict[str, TurnHistory] = {}
         self.user_profiles: Dict[str, UserProfile] = {}
         self.max_context_length = 20  # Keep last 20 turns
         self.context_window = timedelta(hours=2)  # Context expires after 2 hours
         
-        # Ensure storage directory exists
-        os.makedirs(storage_path, exist_ok=True)
+        # Messages from different chats are processed on worker threads
+        self._lock = threading.RLock()
         
-        # Load existing data
-        self._load_contexts()
-        self._load_user_profiles()
+        # Write-behind state: what changed since the last flush
+        self._dirty_contexts = set()
+        self._dirty_profiles = set()
+        self._pending_turns: List[ConversationTurn] = []
+        self._flush_lock = threading.Lock()
+        self.flushes = 0
+        
+        self.store = store or create_context_store(
+            storage_path, CONVERSATION_STORE, self.context_window, self.max_context_length
+        )
+        # Users currently held in memory
+        self.sessions = SessionCache(
+            'conversations',
+            max_users=SESSION_CACHE.get('max_users', 10000),
+            idle_ttl=SESSION_CACHE.get('idle_ttl', 7200),
+            auto_evict=False
+        )
+        if flush_interval is None:
+            flush_interval = CONVERSATION_STORE.get('flush_interval', 2.0)
+        self.flush_interval = flush_interval
+        self.max_pending_turns = CONVERSATION_STORE.get('max_pending_turns', 256)
+        
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        if self.flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='context-flush', daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
     
     def add_turn(self, user_id: str, user_message: str, bot_response: str, 
                  intent: str, confidence: float = 0.0, metadata: Dict[str, Any] = None):
@@ -86,20 +212,26 @@ class ConversationContext:
             metadata=metadata or {}
         )
         
-        if user_id not in self.contexts:
-            self.contexts[user_id] = []
-        
-        self.contexts[user_id].append(turn)
-        
-        # Maintain context window
-        self._cleanup_old_context(user_id)
-        
-        # Update user profile
-        self._update_user_profile(user_id, turn)
+        self._ensure_user(user_id)
+        with self._lock:
+            history = self.contexts.get(user_id)
+            if history is None:
+                history = self.contexts[user_id] = self._new_history()
+            
+            # Maintain context window
+            history.append(turn)
+            history.expire()
+            
+            # Update user profile
+            self._update_user_profile(user_id, turn)
+            
+            # Persisted by the flusher
+            self._dirty_contexts.add(user_id)
+            self._dirty_profiles.add(user_id)
+            self._pending_turns.append(turn)
+            pending = len(self._pending_turns)
         
-        # Persist data
-        self._save_contexts()
-        self._save_user_profiles()
+        self._schedule_flush(pending)
     
     def get_context(self, user_id: str, limit: int = 5) -> List[ConversationTurn]:
         """
@@ -112,17 +244,10 @@ class ConversationContext:
         Returns:
             List[ConversationTurn]: Recent conversation turns
         """
-        if user_id not in self.contexts:
-            return []
-        
-        # Filter recent context within time window
-        now = datetime.now()
-        recent_turns = [
-            turn for turn in self.contexts[user_id]
-            if now - turn.timestamp < self.context_window
-        ]
-        
-        return recent_turns[-limit:] if recent_turns else []
+        self._ensure_user(user_id)
+        with self._lock:
+            history = self.contexts.get(user_id)
+            return history.recent(limit) if history else []
     
     def get_context_string(self, user_id: str, limit: int = 5) -> str:
         """
@@ -135,19 +260,10 @@ class ConversationContext:
         Returns:
             str: Formatted context string
         """
-        context = self.get_context(user_id, limit)
-        
-        if not context:
-            return "No previous conversation context."
-        
-        context_lines = []
-        for turn in context:
-            context_lines.append(f"User: {turn.user_message}")
-            context_lines.append(f"Bot: {turn.bot_response}")
-            context_lines.append(f"Intent: {turn.intent}")
-            context_lines.append("---")
-        
-        return "\n".join(context_lines)
+        self._ensure_user(user_id)
+        with self._lock:
+            history = self.contexts.get(user_id)
+            return history.render(limit) if history else NO_CONTEXT
     
     def get_user_profile(self, user_id: str) -> Optional[UserProfile]:
         """
@@ -159,6 +275,7 @@ class ConversationContext:
         Returns:
             Optional[UserProfile]: User profile if exists
         """
+        self._ensure_user(user_id)
         return self.user_profiles.get(user_id)
     
     def update_user_preferences(self, user_id: str, preferences: Dict[str, Any]):
@@ -169,15 +286,19 @@ class ConversationContext:
             user_id (str): User identifier
             preferences (Dict): User preferences to update
         """
-        if user_id not in self.user_profiles:
-            self.user_profiles[user_id] = UserProfile(user_id=user_id)
-        
-        profile = self.user_profiles[user_id]
-        if profile.preferences is None:
-            profile.preferences = {}
+        self._ensure_user(user_id)
+        with self._lock:
+            if user_id not in self.user_profiles:
+                self.user_profiles[user_id] = UserProfile(user_id=user_id)
+            
+            profile = self.user_profiles[user_id]
+            if profile.preferences is None:
+                profile.preferences = {}
+            
+            profile.preferences.update(preferences)
+            self._dirty_profiles.add(user_id)
         
-        profile.preferences.update(preferences)
-        self._save_user_profiles()
+        self._schedule_flush()
     
     def get_user_intent_history(self, user_id: str, limit: int = 10) -> List[str]:
         """
@@ -228,21 +349,8 @@ class ConversationContext:
         
         return f"🌸 Bună ziua{name_part}! Îmi pare bine să vă revăd! Cum vă pot ajuta astăzi?"
     
-    def _cleanup_old_context(self, user_id: str):
-        """Clean up old context entries"""
-        if user_id not in self.contexts:
-            return
-        
-        # Remove entries older than context window
-        now = datetime.now()
-        self.contexts[user_id] = [
-            turn for turn in self.contexts[user_id]
-            if now - turn.timestamp < self.context_window
-        ]
-        
-        # Limit to max context length
-        if len(self.contexts[user_id]) > self.max_context_length:
-            self.contexts[user_id] = self.contexts[user_id][-self.max_context_length:]
+    def _new_history(self) -> TurnHistory:
+        return TurnHistory(self.max_context_length, self.context_window.total_seconds())
     
     def _update_user_profile(self, user_id: str, turn: ConversationTurn):
         """Update user profile with new turn"""
@@ -296,96 +404,231 @@ class ConversationContext:
                 if occasion not in profile.special_occasions:
                     profile.special_occasions.append(occasion)
     
-    def _load_contexts(self):
-        """Load conversation contexts from storage"""
-        context_file = os.path.join(self.storage_path, "contexts.json")
-        try:
-            if os.path.exists(context_file):
-                with open(context_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for user_id, turns_data in data.items():
-                        self.contexts[user_id] = [
-                            ConversationTurn(
-                                user_message=turn['user_message'],
-                                bot_response=turn['bot_response'],
-                                intent=turn['intent'],
-                                timestamp=datetime.fromisoformat(turn['timestamp']),
-                                user_id=turn['user_id'],
-                                confidence=turn.get('confidence', 0.0),
-                                metadata=turn.get('metadata', {})
-                            )
-                            for turn in turns_data
-                        ]
-        except Exception as e:
-            print(f"❌ Error loading contexts: {e}")
-    
-    def _save_contexts(self):
-        """Save conversation contexts to storage"""
-        context_file = os.path.join(self.storage_path, "contexts.json")
-        try:
-            data = {}
-            for user_id, turns in self.contexts.items():
-                data[user_id] = [
-                    {
-                        'user_message': turn.user_message,
-                        'bot_response': turn.bot_response,
-                        'intent': turn.intent,
-                        'timestamp': turn.timestamp.isoformat(),
-                        'user_id': turn.user_id,
-                        'confidence': turn.confidence,
-                        'metadata': turn.metadata
-                    }
-                    for turn in turns
-                ]
-            
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"❌ Error saving contexts: {e}")
-    
-    def _load_user_profiles(self):
-        """Load user profiles from storage"""
-        profile_file = os.path.join(self.storage_path, "profiles.json")
-        try:
-            if os.path.exists(profile_file):
-                with open(profile_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for user_id, profile_data in data.items():
-                        self.user_profiles[user_id] = UserProfile(
-                            user_id=profile_data['user_id'],
-                            name=profile_data.get('name'),
-                            preferences=profile_data.get('preferences', {}),
-                            purchase_history=profile_data.get('purchase_history', []),
-                            conversation_count=profile_data.get('conversation_count', 0),
-                            first_interaction=datetime.fromisoformat(profile_data['first_interaction']) if profile_data.get('first_interaction') else None,
-                            last_interaction=datetime.fromisoformat(profile_data['last_interaction']) if profile_data.get('last_interaction') else None,
-                            favorite_products=profile_data.get('favorite_products', []),
-                            budget_range=profile_data.get('budget_range'),
-                            special_occasions=profile_data.get('special_occasions', [])
-                        )
-        except Exception as e:
-            print(f"❌ Error loading profiles: {e}")
-    
-    def _save_user_profiles(self):
-        """Save user profiles to storage"""
-        profile_file = os.path.join(self.storage_path, "profiles.json")
-        try:
-            data = {}
-            for user_id, profile in self.user_profiles.items():
-                data[user_id] = {
-                    'user_id': profile.user_id,
-                    'name': profile.name,
-                    'preferences': profile.preferences,
-                    'purchase_history': profile.purchase_history,
-                    'conversation_count': profile.conversation_count,
-                    'first_interaction': profile.first_interaction.isoformat() if profile.first_interaction else None,
-                    'last_interaction': profile.last_interaction.isoformat() if profile.last_interaction else None,
-                    'favorite_products': profile.favorite_products,
-                    'budget_range': profile.budget_range,
-                    'special_occasions': profile.special_occasions
+    def _ensure_user(self, user_id: str):
+        """
+        Bring a user's turns and profile into memory (loaded from the store once per session)
+        
+        The store is read outside the lock so one slow load does not stall
+        every other user. If a flush ran meanwhile, the user may have been
+        loaded, changed, written and evicted by another thread, so the load
+        is repeated rather than inserting what may now be stale.
+        """
+        while True:
+            with self._lock:
+                if self.sessions.touch(user_id):
+                    return
+                flushes = self.flushes
+            try:
+                turns_data, profile_data = self.store.load_user(user_id)
+            except Exception as e:
+                print(f"❌ Error loading user {user_id}: {e}")
+                return
+            with self._lock:
+                if self.sessions.touch(user_id):
+                    return
+                if self.flushes != flushes:
+                    continue
+                if turns_data and user_id not in self.contexts:
+                    self.contexts[user_id] = self._history_from_dicts(turns_data)
+                if profile_data and user_id not in self.user_profiles:
+                    self.user_profiles[user_id] = self._profile_from_dict(profile_data)
+                self.sessions[user_id] = True
+                over_capacity = len(self.sessions) > self.sessions.max_users > 0
+            break
+        
+        # Evicting needs a flush first
+        if over_capacity:
+            self._schedule_flush(self.max_pending_turns)
+    
+    def evict_idle_users(self) -> List[str]:
+        """
+        Drop idle and least recently used users from memory
+        
+        Users with unflushed changes are kept until the next flush has written them.
+        
+        Returns:
+            List[str]: Evicted user ids
+        """
+        with self._lock:
+            evicted = self.sessions.evict(
+                lambda user_id: user_id not in self._dirty_contexts and user_id not in self._dirty_profiles
+            )
+            for user_id in evicted:
+                self.contexts.pop(user_id, None)
+                self.user_profiles.pop(user_id, None)
+        if evicted:
+            self.store.forget(evicted)
+        return evicted
+    
+    def _history_from_dicts(self, turns_data: List[Dict[str, Any]]) -> TurnHistory:
+        """History of stored turns, placed on the monotonic clock by their age"""
+        history = self._new_history()
+        now, wall_now = time.monotonic(), datetime.now()
+        for turn_data in turns_data:
+            turn = self._turn_from_dict(turn_data)
+            history.append(turn, now - (wall_now - turn.timestamp).total_seconds())
+        history.expire(now)
+        return history
+    
+    @staticmethod
+    def _turn_to_dict(turn: ConversationTurn) -> Dict[str, Any]:
+        return {
+            'user_message': turn.user_message,
+            'bot_response': turn.bot_response,
+            'intent': turn.intent,
+            'timestamp': turn.timestamp.isoformat(),
+            'user_id': turn.user_id,
+            'confidence': turn.confidence,
+            'metadata': turn.metadata
+        }
+    
+    @staticmethod
+    def _turn_from_dict(turn: Dict[str, Any]) -> ConversationTurn:
+        return ConversationTurn(
+            user_message=turn['user_message'],
+            bot_response=turn['bot_response'],
+            intent=turn['intent'],
+            timestamp=datetime.fromisoformat(turn['timestamp']),
+            user_id=turn['user_id'],
+            confidence=turn.get('confidence', 0.0),
+            metadata=turn.get('metadata', {})
+        )
+    
+    @staticmethod
+    def _profile_to_dict(profile: UserProfile) -> Dict[str, Any]:
+        return {
+            'user_id': profile.user_id,
+            'name': profile.name,
+            'preferences': profile.preferences,
+            'purchase_history': profile.purchase_history,
+            'conversation_count': profile.conversation_count,
+            'first_interaction': profile.first_interaction.isoformat() if profile.first_interaction else None,
+            'last_interaction': profile.last_interaction.isoformat() if profile.last_interaction else None,
+            'favorite_products': profile.favorite_products,
+            'budget_range': profile.budget_range,
+            'special_occasions': profile.special_occasions
+        }
+    
+    @staticmethod
+    def _profile_from_dict(profile_data: Dict[str, Any]) -> UserProfile:
+        return UserProfile(
+            user_id=profile_data['user_id'],
+            name=profile_data.get('name'),
+            preferences=profile_data.get('preferences', {}),
+            purchase_history=profile_data.get('purchase_history', []),
+            conversation_count=profile_data.get('conversation_count', 0),
+            first_interaction=datetime.fromisoformat(profile_data['first_interaction']) if profile_data.get('first_interaction') else None,
+            last_interaction=datetime.fromisoformat(profile_data['last_interaction']) if profile_data.get('last_interaction') else None,
+            favorite_products=profile_data.get('favorite_products', []),
+            budget_range=profile_data.get('budget_range'),
+            special_occasions=profile_data.get('special_occasions', [])
+        )
+    
+    def _schedule_flush(self, pending: int = 0):
+        """Write now (no flusher), or wake the flusher early when many turns are waiting"""
+        if self._flusher is None or self._stop.is_set():
+            self.flush()
+        elif pending >= self.max_pending_turns:
+            self._wakeup.set()
+    
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def flush(self) -> int:
+        """
+        Write everything changed since the last flush to the store, then
+        evict idle users
+        
+        Only dirty users are serialized (under the lock, so it is a consistent
+        snapshot); the store is written outside it, so messages keep flowing.
+        
+        Returns:
+            int: Number of users whose context or profile was written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not (self._dirty_contexts or self._dirty_profiles or self._pending_turns):
+                    self.evict_idle_users()
+                    return 0
+                dirty_contexts, self._dirty_contexts = self._dirty_contexts, set()
+                dirty_profiles, self._dirty_profiles = self._dirty_profiles, set()
+                pending_turns, self._pending_turns = self._pending_turns, []
+                contexts = {
+                    user_id: [self._turn_to_dict(turn) for turn in self.contexts.get(user_id, ())]
+                    for user_id in dirty_contexts
+                }
+                profiles = {
+                    user_id: self._profile_to_dict(self.user_profiles[user_id])
+                    for user_id in dirty_profiles if user_id in self.user_profiles
                 }
+                turns = [self._turn_to_dict(turn) for turn in pending_turns]
             
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"❌ Error saving profiles: {e}")
+            try:
+                self.store.write(contexts, profiles, turns)
+            except Exception as e:
+                print(f"❌ Error saving conversation data: {e}")
+                # Keep the changes for the next attempt
+                with self._lock:
+                    self._dirty_contexts |= dirty_contexts
+                    self._dirty_profiles |= dirty_profiles
+                    self._pending_turns[:0] = pending_turns
+                return 0
+            
+            self.flushes += 1
+            # Written users can now leave memory
+            self.evict_idle_users()
+            return len(dirty_contexts | dirty_profiles)
+    
+    def close(self):
+        """Stop the flusher and write pending changes (also runs at exit)"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wakeup.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=5)
+        self.flush()
+        self.store.close()
+    
+    def get_storage_stats(self) -> Dict[str, Any]:
+        """Write-behind counters and store state"""
+        with self._lock:
+            pending = len(self._pending_turns)
+            dirty = len(self._dirty_contexts | self._dirty_profiles)
+        return {
+            'flush_interval': self.flush_interval,
+            'flushes': self.flushes,
+            'pending_turns': pending,
+            'dirty_users': dirty,
+            'sessions': self.sessions.stats(),
+            'store': self.store.stats()
+        }
+
+
+_shared_contexts: Dict[str, ConversationContext] = {}
+_shared_contexts_lock = threading.Lock()
+
+
+def get_conversation_context(storage_path: str = "data") -> ConversationContext:
+    """
+    Get the conversation context shared by everything in this process for a storage path
+    
+    Two ConversationContext instances on the same files would each keep their
+    own copy of the users and overwrite each other's writes.
+    
+    Args:
+        storage_path (str): Path to store conversation data
+        
+    Returns:
+        ConversationContext: The same instance for every caller using this path
+    """
+    key = os.path.abspath(storage_path)
+    with _shared_contexts_lock:
+        context = _shared_contexts.get(key)
+        # A closed context has stopped its flusher and closed its store
+        if context is None or context._stop.is_set():
+            context = _shared_contexts[key] = ConversationContext(storage_path=storage_path)
+        return context
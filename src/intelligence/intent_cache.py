@@ -0,0 +1,173 @@
+"""
+Intent Classification Cache for XOFlowers AI Agent
+(normalized message, recent-intent fingerprint) -> (intent, confidence)
+with TTL and LRU eviction, optionally persisted to a JSON file
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple, Any
+
+# Trailing punctuation does not change what a short message asks for
+_STRIP_CHARS = " \t\n.,;:!?…\"'«»„“”"
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a message so trivially different spellings share one cache entry"""
+    text = " ".join(unicodedata.normalize('NFC', message).lower().split())
+    return text.strip(_STRIP_CHARS)
+
+
+def context_fingerprint(intents: Iterable[str]) -> str:
+    """Compact fingerprint of the conversation context (the recent intents, oldest first)"""
+    return ">".join(intents)
+
+
+class IntentCache:
+    """
+    Thread-safe TTL + LRU cache of intent classifications
+
+    Entries expire after ttl_seconds (wall clock, so they stay valid across a
+    restart when persisted); the least recently used entry is evicted once
+    max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 6 * 3600,
+                 persist_path: Optional[str] = None, save_every: int = 50):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached classifications
+            ttl_seconds: Lifetime of an entry
+            persist_path: JSON file the cache is loaded from and saved to (None disables it)
+            save_every: Save after this many new entries (and at exit)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.save_every = save_every
+        self._entries: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        if persist_path:
+            self._load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def make_key(message: str, fingerprint: str = "") -> str:
+        return f"{fingerprint}|{normalize_message(message)}"
+
+    def get(self, message: str, fingerprint: str = "") -> Optional[Tuple[str, float]]:
+        """
+        Get a cached classification
+
+        Args:
+            message: Raw user message
+            fingerprint: Context fingerprint (see context_fingerprint)
+
+        Returns:
+            Optional[Tuple[str, float]]: (intent, confidence), or None on a miss
+        """
+        key = self.make_key(message, fingerprint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            intent, confidence, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return intent, confidence
+
+    def put(self, message: str, fingerprint: str, intent: str, confidence: float):
+        """Cache a classification"""
+        key = self.make_key(message, fingerprint)
+        with self._lock:
+            self._entries[key] = (intent, confidence, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._unsaved += 1
+            should_save = self.persist_path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._unsaved += 1
+
+    def _load(self):
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load intent cache: {e}")
+            return
+
+        now = time.time()
+        # Stored oldest first, so the LRU order survives the round trip
+        for key, (intent, confidence, expires_at) in stored.items():
+            if expires_at > now:
+                self._entries[key] = (intent, confidence, expires_at)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Write live entries to persist_path (atomic replace)"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+            now = time.time()
+            live = {key: list(entry) for key, entry in self._entries.items() if entry[2] > now}
+            self._unsaved = 0
+
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.persist_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(live, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            print(f"⚠️ Could not save intent cache: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries
+        }
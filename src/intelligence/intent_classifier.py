@@ -7,43 +7,42 @@ import os
 import sys
 import re
 import json
-from typing import Dict, List, Optional, Tuple
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime
 
 # Add config to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from settings import INTENTS, AI_MODEL
+from settings import INTENTS, AI_MODEL, INTENT_CLASSIFIER, DATABASE
+from security.jailbreak import get_jailbreak_detector
 from .prompts import ENHANCED_INTENT_RECOGNITION_PROMPT, JAILBREAK_RESPONSE
-from .conversation_context import ConversationContext
+from .conversation_context import ConversationContext, get_conversation_context
 
-# Import AI libraries
-try:
-    from openai import OpenAI
-    from dotenv import load_dotenv
-    load_dotenv()
-    api_key = os.getenv('OPENAI_API_KEY')
-    if api_key:
-        openai_client = OpenAI(api_key=api_key)
-        HAS_OPENAI = True
-    else:
-        openai_client = None
-        HAS_OPENAI = False
-except ImportError:
-    openai_client = None
-    HAS_OPENAI = False
-except Exception as e:
-    print(f"OpenAI client initialization error: {e}")
-    openai_client = None
-    HAS_OPENAI = False
+# Shared, pooled OpenAI/Gemini clients
+from .llm_client import LLMClient, get_llm_client
+from .intent_cache import IntentCache, context_fingerprint
+from .intent_model import IntentEmbeddingModel, data_path
+from .keyword_matcher import KeywordMatcher
 
-try:
-    import google.generativeai as genai
-    genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-    HAS_GEMINI = True
-except ImportError:
-    genai = None
-    HAS_GEMINI = False
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+# Words in the recent conversation that boost related intents
+CONTEXT_BOOSTS = {
+    'find_product': ['product', 'flori', 'buchet', 'cadou'],
+    'pay_for_product': ['plată', 'cumpăr', 'comanda'],
+    'order_status': ['comandă', 'status', 'livrat'],
+    'complaint': ['problemă', 'reclamație', 'nemulțumit'],
+    'delivery_info': ['livrare', 'transport']
+}
+
+
+class KeywordScan(NamedTuple):
+    """Keyword hits of one message and the intents boosted by its conversation context"""
+    hits: Dict[str, bool]
+    boosts: set
 
 
 class IntentClassifier:
@@ -51,8 +50,17 @@ class IntentClassifier:
     Advanced AI-powered intent classifier with context awareness
     """
     
-    def __init__(self):
-        """Initialize the enhanced intent classifier"""
+    def __init__(self, extra_keywords: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 context_manager: Optional[ConversationContext] = None, llm: Optional[LLMClient] = None):
+        """
+        Initialize the enhanced intent classifier
+        
+        Args:
+            extra_keywords: Other keyword tables (group -> label -> keywords) compiled into
+                the same keyword matcher, e.g. the occasion and FAQ tables of ActionHandler
+            context_manager: Conversation context (defaults to the process-wide one)
+            llm: LLM client (defaults to the process-wide client)
+        """
         self.intents = {
             # Core business intents
             'find_product': {
@@ -144,54 +152,347 @@ class IntentClassifier:
             }
         }
         
+        # One automaton for the intent, context and caller keyword tables
+        self.keyword_matcher = KeywordMatcher()
+        self.keyword_matcher.add_group('intent', {intent: config['keywords'] for intent, config in self.intents.items()})
+        self.keyword_matcher.add_group('context_boost', CONTEXT_BOOSTS)
+        for group, table in (extra_keywords or {}).items():
+            self.keyword_matcher.add_group(group, table)
+        self.keyword_matcher.build()
+        
         self.ai_config = AI_MODEL
-        self.context_manager = ConversationContext()
+        self.llm = llm or get_llm_client()
+        self.context_manager = context_manager or get_conversation_context()
         self.confidence_threshold = 0.6
         
-    def classify_intent(self, message: str, user_id: str = None) -> Tuple[str, float]:
+        cache_config = INTENT_CLASSIFIER.get('cache', {})
+        self.context_turns = cache_config.get('context_turns', 3)
+        self.cache = None
+        if cache_config.get('enabled', True):
+            self.cache = IntentCache(
+                max_entries=cache_config.get('max_entries', 4096),
+                ttl_seconds=cache_config.get('ttl_seconds', 6 * 3600),
+                persist_path=cache_config.get('persist_path')
+            )
+        
+        fast_path_config = INTENT_CLASSIFIER.get('fast_path', {})
+        self.fast_path_enabled = fast_path_config.get('enabled', True)
+        self.fast_path_min_score = fast_path_config.get('min_score', 2.0)
+        self.fast_path_min_hits = fast_path_config.get('min_hits', 2)
+        self.fast_path_min_ratio = fast_path_config.get('min_ratio', 2.0)
+        self.fast_path_confidence = fast_path_config.get('confidence', 0.85)
+        self.fast_path_intents = set(fast_path_config.get('intents', ['greeting', 'farewell', 'delivery_info', 'find_product']))
+        
+        # Embedding intent model, loaded on first use
+        model_config = INTENT_CLASSIFIER.get('embedding_model', {})
+        self.embedding_mode = model_config.get('mode', 'fallback') if model_config.get('enabled', True) else None
+        self.embedding_model_path = data_path(model_config.get('path', 'intent_model.npz'))
+        self.embedding_method = model_config.get('method', 'centroid')
+        self.embedding_min_similarity = model_config.get('min_similarity', 0.5)
+        self.embedding_min_margin = model_config.get('min_margin', 0.05)
+        # The artifact must come from the model the rest of the agent embeds with
+        self.embedding_model_name = DATABASE.get('embedding_model', 'paraphrase-multilingual-MiniLM-L12-v2')
+        self.intent_model = None
+        self._encoder = None
+        self._intent_model_lock = threading.Lock()
+        
+        # Where each classification was answered (several bot threads share the classifier)
+        # Stage hits after the LLM: embedding_fallback, hybrid, keyword, unclassified (they add up to local_fallback)
+        self.counters = {
+            'classified': 0, 'cache_hits': 0, 'fast_path': 0, 'embedding': 0, 'llm_calls': 0, 'local_fallback': 0,
+            'embedding_fallback': 0, 'hybrid': 0, 'keyword': 0, 'unclassified': 0
+        }
+        self._counters_lock = threading.Lock()
+        
+    def classify_intent(self, message: str, user_id: str = None,
+                        hits: Optional[Dict[str, bool]] = None) -> Tuple[str, float]:
         """
         Enhanced intent classification with context awareness
         
         Args:
             message (str): User message to classify
             user_id (str): User identifier for context
+            hits: scan_message() result when the caller already scanned the message
+            
+        Returns:
+            Tuple[str, float]: (intent, confidence_score)
+        """
+        early_result, message_lower, context, fingerprint, scan = self._prepare(message, user_id, hits)
+        if early_result:
+            return early_result
+        
+        # Try AI classification first (most accurate)
+        if self.llm.available:
+            self._count('llm_calls')
+            ai_result = self._classify_by_ai(message, context)
+            if ai_result[1] >= self.confidence_threshold:
+                return self._remember(message, fingerprint, ai_result)
+        
+        self._count('local_fallback')
+        return self._classify_locally(message_lower, context, scan)
+    
+    async def aclassify_intent(self, message: str, user_id: str = None,
+                               offload: Optional[Callable[..., Awaitable]] = None,
+                               hits: Optional[Dict[str, bool]] = None) -> Tuple[str, float]:
+        """
+        Async version of classify_intent for asyncio handlers
+        
+        The LLM call is awaited on the event loop; the local stages (context
+        lookup, keyword scoring, embedding model) run through offload.
+        
+        Args:
+            message (str): User message to classify
+            user_id (str): User identifier for context
+            offload: Runs a blocking function off the event loop (defaults to asyncio.to_thread)
+            hits: scan_message() result when the caller already scanned the message
             
         Returns:
             Tuple[str, float]: (intent, confidence_score)
         """
+        offload = offload or asyncio.to_thread
+        early_result, message_lower, context, fingerprint, scan = await offload(self._prepare, message, user_id, hits)
+        if early_result:
+            return early_result
+        
+        if self.llm.available:
+            self._count('llm_calls')
+            ai_result = await self._aclassify_by_ai(message, context)
+            if ai_result[1] >= self.confidence_threshold:
+                return self._remember(message, fingerprint, ai_result)
+        
+        self._count('local_fallback')
+        return await offload(self._classify_locally, message_lower, context, scan)
+    
+    def _prepare(self, message: str, user_id: str = None, hits: Optional[Dict[str, bool]] = None
+                 ) -> Tuple[Optional[Tuple[str, float]], str, str, str, Optional[KeywordScan]]:
+        """
+        Checks that settle a message before any AI call
+        
+        Returns:
+            Tuple: (result or None, lowercase message, context string, context fingerprint,
+            keyword scan shared by the local stages)
+        """
         message_lower = message.lower().strip()
         
         # Handle empty messages
         if not message_lower:
-            return "fallback", 0.0
+            return ("fallback", 0.0), message_lower, "", "", None
         
         # Check for jailbreak attempts first
         if self.is_jailbreak_attempt(message):
-            return "jailbreak", 1.0
+            return ("jailbreak", 1.0), message_lower, "", "", None
+        
+        fingerprint = ""
+        if user_id:
+            fingerprint = context_fingerprint(
+                turn.intent for turn in self.context_manager.get_context(user_id, limit=self.context_turns)
+            )
+        
+        self._count('classified')
+        
+        # Repeated messages in the same context skip the AI call
+        if self.cache is not None and self.llm.available:
+            cached = self.cache.get(message, fingerprint)
+            if cached:
+                self._count('cache_hits')
+                return cached, message_lower, "", fingerprint, None
         
         # Get conversation context if user_id provided
         context = ""
         if user_id:
             context = self.context_manager.get_context_string(user_id, limit=3)
         
-        # Try AI classification first (most accurate)
-        if HAS_OPENAI or HAS_GEMINI:
-            ai_result = self._classify_by_ai(message, context)
-            if ai_result[1] >= self.confidence_threshold:
-                return ai_result
+        # One scan of the message (and of its context) for every keyword stage below
+        scan = self.scan_keywords(message_lower, context, hits)
+        
+        # Decisive keyword matches skip the AI call too
+        if self.fast_path_enabled and self.llm.available:
+            fast_result = self._classify_fast_path(message_lower, context, scan)
+            if fast_result:
+                self._count('fast_path')
+                return fast_result, message_lower, context, fingerprint, scan
+        
+        if self.embedding_mode == 'primary':
+            embedding_result = self._classify_by_embedding(message)
+            if embedding_result:
+                self._count('embedding')
+                return embedding_result, message_lower, context, fingerprint, scan
         
-        # Fallback to hybrid approach
-        hybrid_result = self._classify_hybrid(message_lower, context)
+        return None, message_lower, context, fingerprint, scan
+    
+    def scan_message(self, message: str) -> Dict[str, bool]:
+        """
+        Keyword hits of a message, shared by the classifier stages and the action handler
+        
+        Punctuation counts as a word boundary, so 'salut!' is a whole-word hit.
+        
+        Args:
+            message (str): User message
+            
+        Returns:
+            Dict[str, bool]: Keyword -> whole-word flag, from KeywordMatcher.scan
+        """
+        return self.keyword_matcher.scan(" ".join(_PUNCTUATION.sub(' ', message.lower()).split()))
+    
+    def scan_keywords(self, message: str, context: str = "",
+                      hits: Optional[Dict[str, bool]] = None) -> KeywordScan:
+        """
+        Message hits plus the intents boosted by the conversation context
+        
+        Args:
+            message (str): User message
+            context (str): Conversation context
+            hits: scan_message() result, if the message was already scanned
+            
+        Returns:
+            KeywordScan: (hits, boosts)
+        """
+        if hits is None:
+            hits = self.scan_message(message)
+        boosts = self.keyword_matcher.labels(context.lower(), 'context_boost') if context else set()
+        return KeywordScan(hits, boosts)
+    
+    def _classify_fast_path(self, message: str, context: str = "",
+                            scan: Optional[KeywordScan] = None) -> Optional[Tuple[str, float]]:
+        """
+        Cheap local stage: answer from keyword scores when they are decisive
+        
+        The best intent must be on the fast-path list, reach min_score, beat the
+        runner-up by min_ratio and have at least min_hits distinct whole-word
+        keyword hits (substring hits such as 'pa' inside 'pachet' are too noisy,
+        and a single word such as 'flori' also appears in complaints).
+        
+        Args:
+            message (str): Lowercase message
+            context (str): Conversation context
+            scan (KeywordScan): Keyword hits of the message, if already scanned
+            
+        Returns:
+            Optional[Tuple[str, float]]: (intent, confidence), or None to ask the LLM
+        """
+        scan = scan or self.scan_keywords(message, context)
+        hits = scan.hits
+        scores = self._score_keyword_hits(hits)
+        if not scores:
+            return None
+        scores = self._boost_scores(scores, scan.boosts)
+        
+        ranked = sorted(scores.values(), reverse=True)
+        best_intent = max(scores, key=scores.get)
+        runner_up = ranked[1] if len(ranked) > 1 else 0.0
+        
+        if best_intent not in self.fast_path_intents or ranked[0] < self.fast_path_min_score:
+            return None
+        if runner_up and ranked[0] < runner_up * self.fast_path_min_ratio:
+            return None
+        
+        whole_word_hits = sum(1 for keyword in set(self.intents[best_intent]['keywords']) if hits.get(keyword))
+        if whole_word_hits < self.fast_path_min_hits:
+            return None
+        
+        return best_intent, self.fast_path_confidence
+    
+    def _count(self, name: str):
+        with self._counters_lock:
+            self.counters[name] += 1
+    
+    def get_stats(self) -> Dict:
+        """
+        Where classifications were answered
+        
+        Returns:
+            Dict: Counters, the share of messages that avoided the LLM, cache and LLM latency stats
+        """
+        with self._counters_lock:
+            counters = dict(self.counters)
+        classified = counters['classified']
+        return {
+            **counters,
+            # Cache, fast path, primary embedding and local answers while the LLM was unavailable
+            'llm_avoided_rate': round(1 - counters['llm_calls'] / classified, 3) if classified else 0.0,
+            'cache': self.get_cache_stats(),
+            'llm': self.llm.get_stats() if hasattr(self.llm, 'get_stats') else {}
+        }
+    
+    def _remember(self, message: str, fingerprint: str, result: Tuple[str, float]) -> Tuple[str, float]:
+        """Cache an AI classification (local keyword results are cheap and not cached)"""
+        if self.cache is not None:
+            self.cache.put(message, fingerprint, *result)
+        return result
+    
+    def get_cache_stats(self) -> Dict:
+        """Intent cache hit-rate metrics"""
+        return self.cache.stats() if self.cache is not None else {'enabled': False}
+    
+    def _classify_locally(self, message_lower: str, context: str = "",
+                          scan: Optional[KeywordScan] = None) -> Tuple[str, float]:
+        """Embedding, hybrid and keyword fallbacks used when AI is unavailable or unsure"""
+        scan = scan or self.scan_keywords(message_lower, context)
+        if self.embedding_mode == 'fallback':
+            embedding_result = self._classify_by_embedding(message_lower)
+            if embedding_result:
+                self._count('embedding_fallback')
+                return embedding_result
+        
+        hybrid_result = self._classify_hybrid(message_lower, context, scan)
         if hybrid_result[1] >= self.confidence_threshold:
+            self._count('hybrid')
             return hybrid_result
         
         # Final fallback to keyword matching
-        keyword_result = self._classify_by_keywords(message_lower)
+        keyword_result = self._classify_by_keywords(message_lower, scan.hits)
         if keyword_result[0] != "fallback":
+            self._count('keyword')
             return keyword_result[0], max(keyword_result[1], 0.4)
         
+        self._count('unclassified')
         return "fallback", 0.0
     
+    def _get_intent_model(self) -> Optional[IntentEmbeddingModel]:
+        """Load the trained intent model and its encoder (disables the stage if either is missing)"""
+        if self.intent_model is None and self.embedding_mode:
+            with self._intent_model_lock:
+                if self.intent_model is None and self.embedding_mode:
+                    try:
+                        from database.resources import get_embedding_model
+                        model = IntentEmbeddingModel.load(self.embedding_model_path, self.embedding_method)
+                        if model.model_name != self.embedding_model_name:
+                            raise ValueError(f"{self.embedding_model_path} was trained with {model.model_name}, "
+                                             f"expected {self.embedding_model_name}; "
+                                             f"retrain with src/pipeline/train_intent_model.py")
+                        self._encoder = get_embedding_model(model.model_name)
+                        self.intent_model = model
+                    except FileNotFoundError:
+                        self.embedding_mode = None
+                    except Exception as e:
+                        print(f"⚠️ Intent model disabled: {e}")
+                        self.embedding_mode = None
+        return self.intent_model
+    
+    def _classify_by_embedding(self, message: str) -> Optional[Tuple[str, float]]:
+        """
+        Nearest-centroid classification with the trained embedding model
+        
+        Args:
+            message (str): User message
+            
+        Returns:
+            Optional[Tuple[str, float]]: (intent, similarity) when similar and distinct enough
+        """
+        model = self._get_intent_model()
+        if model is None:
+            return None
+        try:
+            vector = self._encoder.encode([message], show_progress_bar=False)
+        except Exception as e:
+            print(f"❌ Intent embedding error: {e}")
+            return None
+        
+        intent, similarity, margin = model.classify_vector(vector)
+        if similarity >= self.embedding_min_similarity and margin >= self.embedding_min_margin:
+            return intent, round(similarity, 3)
+        return None
+    
     def _classify_by_ai(self, message: str, context: str = "") -> Tuple[str, float]:
         """
         Advanced AI-based intent classification
@@ -204,24 +505,53 @@ class IntentClassifier:
             Tuple[str, float]: (intent, confidence)
         """
         try:
-            # Try OpenAI first
-            if HAS_OPENAI and openai_client:
-                return self._classify_with_openai(message, context)
+            outcome = self.llm.complete(self._build_ai_prompts(message, context), max_tokens=50, temperature=0.1)
+            if outcome:
+                return self._parse_ai_result(*outcome)
+        except Exception as e:
+            print(f"❌ AI classification error: {e}")
             
-            # Fallback to Gemini
-            if HAS_GEMINI:
-                return self._classify_with_gemini(message, context)
-                
+        return "fallback", 0.0
+    
+    async def _aclassify_by_ai(self, message: str, context: str = "") -> Tuple[str, float]:
+        """Async version of _classify_by_ai"""
+        try:
+            outcome = await self.llm.acomplete(self._build_ai_prompts(message, context), max_tokens=50, temperature=0.1)
+            if outcome:
+                return self._parse_ai_result(*outcome)
         except Exception as e:
             print(f"❌ AI classification error: {e}")
             
         return "fallback", 0.0
     
-    def _classify_with_openai(self, message: str, context: str = "") -> Tuple[str, float]:
-        """Enhanced OpenAI classification with context"""
+    def _build_ai_prompts(self, message: str, context: str = "") -> Dict[str, str]:
+        """Classification prompt for each provider"""
+        return {
+            'openai': self._openai_prompt(message, context),
+            'gemini': self._gemini_prompt(message, context)
+        }
+    
+    def _parse_ai_result(self, provider: str, result: str) -> Tuple[str, float]:
+        """Parse an 'intent_name:confidence' answer"""
+        if ':' in result:
+            intent, confidence_str = result.split(':', 1)
+            intent = intent.strip()
+            try:
+                confidence = float(confidence_str.strip())
+                if intent in self.intents:
+                    return intent, confidence
+            except ValueError:
+                pass
+        
+        # Fallback parsing
+        if result in self.intents:
+            return result, 0.8 if provider == 'openai' else 0.7
         
-        # Create comprehensive prompt with context
-        prompt = f"""
+        return "fallback", 0.0
+    
+    def _openai_prompt(self, message: str, context: str = "") -> str:
+        """Enhanced OpenAI classification prompt with context"""
+        return f"""
         You are an expert intent classifier for XOFlowers, a premium flower shop in Moldova.
         
         CONVERSATION CONTEXT:
@@ -257,94 +587,37 @@ class IntentClassifier:
         Respond with ONLY the intent name and confidence (0.0-1.0):
         Format: intent_name:confidence
         """
-        
-        try:
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=50,
-                temperature=0.1
-            )
-            
-            result = response.choices[0].message.content.strip()
-            
-            # Parse response
-            if ':' in result:
-                intent, confidence_str = result.split(':', 1)
-                intent = intent.strip()
-                try:
-                    confidence = float(confidence_str.strip())
-                    if intent in self.intents:
-                        return intent, confidence
-                except ValueError:
-                    pass
-            
-            # Fallback parsing
-            if result in self.intents:
-                return result, 0.8
-                
-        except Exception as e:
-            print(f"❌ OpenAI classification error: {e}")
-            
-        return "fallback", 0.0
     
-    def _classify_with_gemini(self, message: str, context: str = "") -> Tuple[str, float]:
-        """Enhanced Gemini classification with context"""
+    def _gemini_prompt(self, message: str, context: str = "") -> str:
+        """Enhanced Gemini classification prompt with context"""
+        return f"""
+        Classify this Romanian message for XOFlowers flower shop.
         
-        try:
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
-            prompt = f"""
-            Classify this Romanian message for XOFlowers flower shop.
-            
-            Context: {context if context else "No context"}
-            Message: "{message}"
-            
-            Available intents: find_product, ask_question, subscribe, pay_for_product, greeting, order_status, complaint, recommendation, availability, delivery_info, cancel_order, price_inquiry, seasonal_offers, gift_suggestions, care_instructions, bulk_orders, farewell
-            
-            Respond with: intent_name:confidence_score
-            """
-            
-            response = model.generate_content(prompt)
-            result = response.text.strip()
-            
-            # Parse response
-            if ':' in result:
-                intent, confidence_str = result.split(':', 1)
-                intent = intent.strip()
-                try:
-                    confidence = float(confidence_str.strip())
-                    if intent in self.intents:
-                        return intent, confidence
-                except ValueError:
-                    pass
-            
-            # Fallback parsing
-            if result in self.intents:
-                return result, 0.7
-                
-        except Exception as e:
-            print(f"❌ Gemini classification error: {e}")
-            
-        return "fallback", 0.0
+        Context: {context if context else "No context"}
+        Message: "{message}"
+        
+        Available intents: find_product, ask_question, subscribe, pay_for_product, greeting, order_status, complaint, recommendation, availability, delivery_info, cancel_order, price_inquiry, seasonal_offers, gift_suggestions, care_instructions, bulk_orders, farewell
+        
+        Respond with: intent_name:confidence_score
+        """
     
-    def _classify_hybrid(self, message: str, context: str = "") -> Tuple[str, float]:
+    def _classify_hybrid(self, message: str, context: str = "",
+                         scan: Optional[KeywordScan] = None) -> Tuple[str, float]:
         """
         Hybrid classification combining keywords and context
         
         Args:
             message (str): Lowercase message
             context (str): Conversation context
+            scan (KeywordScan): Keyword hits of the message, if already scanned
             
         Returns:
             Tuple[str, float]: (intent, confidence)
         """
-        # Get keyword scores
-        keyword_scores = self._get_keyword_scores(message)
+        scan = scan or self.scan_keywords(message, context)
         
-        # Apply context boosting
-        if context:
-            keyword_scores = self._apply_context_boosting(keyword_scores, context)
+        # Get keyword scores and apply context boosting
+        keyword_scores = self._boost_scores(self._score_keyword_hits(scan.hits), scan.boosts)
         
         # Find best intent
         if keyword_scores:
@@ -360,62 +633,55 @@ class IntentClassifier:
     
     def _get_keyword_scores(self, message: str) -> Dict[str, float]:
         """Calculate keyword-based scores for all intents"""
-        scores = {}
+        return self._score_keyword_hits(self.keyword_matcher.scan(message))
+    
+    def _score_keyword_hits(self, hits: Dict[str, bool]) -> Dict[str, float]:
+        """
+        Score intents from one keyword scan
         
-        for intent, config in self.intents.items():
-            score = 0
-            keywords = config['keywords']
-            priority = config['priority']
-            
-            for keyword in keywords:
-                if keyword in message:
-                    # Exact match gets higher score
-                    if f" {keyword} " in f" {message} ":
-                        score += 2.0
-                    else:
-                        score += 1.0
+        Args:
+            hits (Dict[str, bool]): Keyword -> whole-word flag, from KeywordMatcher.scan
             
-            if score > 0:
-                # Apply priority weighting
-                scores[intent] = score * (priority / 10.0)
-        
-        return scores
+        Returns:
+            Dict[str, float]: Priority-weighted scores, in intent definition order
+        """
+        raw_scores = {}
+        for intent, _, whole_word in self.keyword_matcher.tag_hits(hits, 'intent'):
+            # Exact match gets higher score
+            raw_scores[intent] = raw_scores.get(intent, 0.0) + (2.0 if whole_word else 1.0)
+        
+        # Apply priority weighting (definition order keeps max() tie-breaking stable)
+        return {
+            intent: raw_scores[intent] * (config['priority'] / 10.0)
+            for intent, config in self.intents.items() if intent in raw_scores
+        }
     
     def _apply_context_boosting(self, scores: Dict[str, float], context: str) -> Dict[str, float]:
         """Apply context-based boosting to intent scores"""
-        context_lower = context.lower()
-        
-        # Boost related intents based on context
-        context_boosts = {
-            'find_product': ['product', 'flori', 'buchet', 'cadou'],
-            'pay_for_product': ['plată', 'cumpăr', 'comanda'],
-            'order_status': ['comandă', 'status', 'livrat'],
-            'complaint': ['problemă', 'reclamație', 'nemulțumit'],
-            'delivery_info': ['livrare', 'transport']
-        }
-        
+        return self._boost_scores(scores, self.keyword_matcher.labels(context.lower(), 'context_boost'))
+    
+    def _boost_scores(self, scores: Dict[str, float], boosted_intents: set) -> Dict[str, float]:
+        """Boost the scores of intents mentioned in the conversation context"""
         boosted_scores = scores.copy()
         
-        for intent, boost_words in context_boosts.items():
-            if intent in boosted_scores:
-                for word in boost_words:
-                    if word in context_lower:
-                        boosted_scores[intent] *= 1.3  # 30% boost
-                        break
+        for intent in CONTEXT_BOOSTS:
+            if intent in boosted_scores and intent in boosted_intents:
+                boosted_scores[intent] *= 1.3  # 30% boost
         
         return boosted_scores
     
-    def _classify_by_keywords(self, message: str) -> Tuple[str, float]:
+    def _classify_by_keywords(self, message: str, hits: Optional[Dict[str, bool]] = None) -> Tuple[str, float]:
         """
         Fast keyword-based intent classification
         
         Args:
             message (str): Lowercase message
+            hits: scan_message() result, if the message was already scanned
             
         Returns:
             Tuple[str, float]: (intent, confidence)
         """
-        scores = self._get_keyword_scores(message)
+        scores = self._score_keyword_hits(hits if hits is not None else self.scan_message(message))
         
         if scores:
             best_intent = max(scores, key=scores.get)
@@ -438,30 +704,7 @@ class IntentClassifier:
         Returns:
             bool: True if jailbreak attempt detected
         """
-        jailbreak_patterns = [
-            r'ignore\s+previous\s+instructions',
-            r'forget\s+everything',
-            r'you\s+are\s+now',
-            r'pretend\s+to\s+be',
-            r'act\s+as\s+if',
-            r'sistem\s+prompt',
-            r'uită\s+tot',
-            r'instrucțiuni\s+anterioare',
-            r'roleplay\s+as',
-            r'imagine\s+you\s+are',
-            r'override\s+your',
-            r'switch\s+to',
-            r'new\s+instructions',
-            r'ai\s+behavior',
-            r'system\s+message'
-        ]
-        
-        message_lower = message.lower()
-        for pattern in jailbreak_patterns:
-            if re.search(pattern, message_lower):
-                return True
-        
-        return False
+        return get_jailbreak_detector().is_jailbreak(message)
     
     def get_intent_confidence(self, message: str, user_id: str = None) -> Dict[str, float]:
         """
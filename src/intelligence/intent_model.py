@@ -0,0 +1,252 @@
+"""
+Embedding Intent Model for XOFlowers AI Agent
+Local intent classifier trained offline from labelled example utterances:
+examples are embedded with the shared SentenceTransformer, reduced to
+per-intent centroid and prototype matrices stored as a NumPy artifact, and
+messages are classified by vectorized cosine similarity
+
+Producing and deploying the artifact:
+    1. Edit the labelled utterances in data/intent_examples.json
+    2. Run `python src/pipeline/train_intent_model.py --evaluate` where the
+       SentenceTransformer is installed; it embeds the examples with
+       DATABASE['embedding_model'] and writes data/intent_model.npz
+    3. Ship the .npz next to the bot (data/ or the absolute path in
+       INTENT_CLASSIFIER['embedding_model']['path']); it is not committed
+The classifier loads it on first use and disables the stage when the file is
+missing or was trained with a different embedding model
+"""
+
+import os
+import json
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Any
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+ARTIFACT_VERSION = 1
+METHODS = ('centroid', 'prototype')
+
+
+def data_path(name: str) -> str:
+    """Absolute path of a file name in data/ (absolute paths are kept)"""
+    return os.path.abspath(name if os.path.isabs(name) else os.path.join(DATA_DIR, name))
+
+
+def load_examples(filename: str = 'intent_examples.json') -> Dict[str, List[str]]:
+    """Labelled example utterances: intent -> list of messages"""
+    with open(data_path(filename), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _normalize(vectors) -> np.ndarray:
+    """Unit-length float32 rows (zero rows stay zero)"""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class IntentEmbeddingModel:
+    """
+    Centroid / nearest-prototype intent classifier over sentence embeddings
+
+    - 'centroid': cosine similarity to the normalized mean of each intent's examples
+    - 'prototype': best cosine similarity to any single example of the intent
+    """
+
+    def __init__(self, intents: Sequence[str], centroids: np.ndarray, prototypes: np.ndarray,
+                 prototype_labels: np.ndarray, model_name: str, method: str = 'centroid'):
+        """
+        Initialize from trained matrices (use train() or load())
+
+        Args:
+            intents: Intent names, one per centroid row
+            centroids: (intents, dim) unit-length centroid matrix
+            prototypes: (examples, dim) unit-length example matrix, grouped by intent
+            prototype_labels: Intent index of every prototype row
+            model_name: Embedding model the vectors came from
+            method: 'centroid' or 'prototype'
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+        self.intents = list(intents)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.prototypes = np.asarray(prototypes, dtype=np.float32)
+        self.prototype_labels = np.asarray(prototype_labels, dtype=np.int32)
+        self.model_name = model_name
+        self.method = method
+        # Prototype rows are grouped by intent, so per-intent maxima are one reduceat
+        self._offsets = np.searchsorted(self.prototype_labels, np.arange(len(self.intents)))
+
+    @classmethod
+    def train(cls, examples: Dict[str, List[str]], encode: Callable[[List[str]], Any],
+              model_name: str, method: str = 'centroid') -> 'IntentEmbeddingModel':
+        """
+        Embed labelled examples and build the centroid and prototype matrices
+
+        Args:
+            examples: Intent -> example utterances
+            encode: Function embedding a list of texts
+            model_name: Embedding model name recorded in the artifact
+            method: Default classification method
+
+        Returns:
+            IntentEmbeddingModel: Trained model
+        """
+        intents = [intent for intent, texts in examples.items() if texts]
+        texts = [text for intent in intents for text in examples[intent]]
+        labels = np.repeat(np.arange(len(intents)), [len(examples[intent]) for intent in intents])
+
+        prototypes = _normalize(encode(texts))
+        centroids = np.stack([prototypes[labels == index].mean(axis=0) for index in range(len(intents))])
+        return cls(intents, _normalize(centroids), prototypes, labels, model_name, method)
+
+    def save(self, path: str):
+        """Write the model as an .npz artifact"""
+        np.savez(
+            path,
+            version=np.array(ARTIFACT_VERSION),
+            intents=np.array(self.intents),
+            centroids=self.centroids,
+            prototypes=self.prototypes,
+            prototype_labels=self.prototype_labels,
+            model_name=np.array(self.model_name)
+        )
+
+    @classmethod
+    def load(cls, path: str, method: str = 'centroid') -> 'IntentEmbeddingModel':
+        """
+        Load an .npz artifact written by save()
+
+        Raises:
+            ValueError: If the artifact version is not supported
+        """
+        with np.load(path, allow_pickle=False) as artifact:
+            version = int(artifact['version'])
+            if version != ARTIFACT_VERSION:
+                raise ValueError(f"Unsupported intent model version {version} in {path}")
+            return cls(
+                [str(intent) for intent in artifact['intents']],
+                artifact['centroids'],
+                artifact['prototypes'],
+                artifact['prototype_labels'],
+                str(artifact['model_name']),
+                method
+            )
+
+    def similarities(self, vectors) -> np.ndarray:
+        """
+        Cosine similarity of each vector to each intent
+
+        Args:
+            vectors: (n, dim) or (dim,) embeddings
+
+        Returns:
+            np.ndarray: (n, intents) similarity matrix
+        """
+        queries = _normalize(vectors)
+        if self.method == 'centroid':
+            return queries @ self.centroids.T
+        return np.maximum.reduceat(queries @ self.prototypes.T, self._offsets, axis=1)
+
+    def classify_vectors(self, vectors) -> List[Tuple[str, float, float]]:
+        """
+        Classify a batch of embeddings
+
+        Returns:
+            List[Tuple[str, float, float]]: (intent, similarity, margin over the runner-up) per vector
+        """
+        scores = self.similarities(vectors)
+        if scores.shape[1] == 1:
+            return [(self.intents[0], float(row[0]), float(row[0])) for row in scores]
+
+        top_two = np.argpartition(-scores, 1, axis=1)[:, :2]
+        results = []
+        for row, (first, second) in zip(scores, top_two):
+            if row[second] > row[first]:
+                first, second = second, first
+            results.append((self.intents[first], float(row[first]), float(row[first] - row[second])))
+        return results
+
+    def classify_vector(self, vector) -> Tuple[str, float, float]:
+        """Classify one embedding; returns (intent, similarity, margin)"""
+        return self.classify_vectors(vector)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Model shape"""
+        return {
+            'intents': len(self.intents),
+            'prototypes': int(self.prototypes.shape[0]),
+            'dim': int(self.centroids.shape[1]) if self.centroids.ndim == 2 else 0,
+            'method': self.method,
+            'model_name': self.model_name
+        }
+
+
+def cross_validate(examples: Dict[str, List[str]], encode: Callable[[List[str]], Any], model_name: str,
+                   folds: int = 5, method: str = 'centroid') -> Dict[str, Any]:
+    """
+    Stratified k-fold accuracy of the embedding model on the labelled examples
+
+    Every example is embedded once; each fold trains on the other folds' vectors.
+
+    Returns:
+        Dict: accuracy, per-intent accuracy, misclassified examples and classification latency
+    """
+    intents = [intent for intent, texts in examples.items() if texts]
+    texts = [text for intent in intents for text in examples[intent]]
+    labels = np.array([index for index, intent in enumerate(intents) for _ in examples[intent]])
+    vectors = _normalize(encode(texts))
+
+    # Round-robin fold assignment within each intent keeps folds stratified
+    fold_of = np.zeros(len(texts), dtype=np.int32)
+    for index in range(len(intents)):
+        members = np.flatnonzero(labels == index)
+        fold_of[members] = np.arange(len(members)) % folds
+
+    predictions: List[Optional[str]] = [None] * len(texts)
+    seconds = 0.0
+    for fold in range(folds):
+        train_rows = fold_of != fold
+        test_rows = np.flatnonzero(~train_rows)
+        if not len(test_rows):
+            continue
+        train_examples = {}
+        for row in np.flatnonzero(train_rows):
+            train_examples.setdefault(intents[labels[row]], []).append(row)
+        fold_intents = list(train_examples)
+        fold_labels = np.repeat(np.arange(len(fold_intents)), [len(rows) for rows in train_examples.values()])
+        prototypes = vectors[[row for rows in train_examples.values() for row in rows]]
+        centroids = _normalize(np.stack([prototypes[fold_labels == i].mean(axis=0) for i in range(len(fold_intents))]))
+        model = IntentEmbeddingModel(fold_intents, centroids, prototypes, fold_labels, model_name, method)
+
+        started = time.perf_counter()
+        for row in test_rows:
+            predictions[row] = model.classify_vector(vectors[row])[0]
+        seconds += time.perf_counter() - started
+
+    expected = [intents[label] for label in labels]
+    return summarize_predictions(texts, expected, predictions, seconds)
+
+
+def summarize_predictions(texts: List[str], expected: List[str], predicted: List[str],
+                          seconds: float = 0.0) -> Dict[str, Any]:
+    """Accuracy report for a list of predictions"""
+    per_intent: Dict[str, List[int]] = {}
+    errors = []
+    for text, truth, guess in zip(texts, expected, predicted):
+        hits = per_intent.setdefault(truth, [0, 0])
+        hits[1] += 1
+        if guess == truth:
+            hits[0] += 1
+        else:
+            errors.append({'text': text, 'expected': truth, 'predicted': guess})
+    total = len(texts)
+    return {
+        'examples': total,
+        'accuracy': round(sum(hits for hits, _ in per_intent.values()) / total, 3) if total else 0.0,
+        'per_intent': {intent: round(hits / count, 3) for intent, (hits, count) in per_intent.items()},
+        'errors': errors,
+        'avg_ms': round(seconds * 1000 / total, 4) if total else 0.0
+    }
@@ -0,0 +1,197 @@
+"""
+Keyword Matcher Module
+Aho–Corasick automaton over every keyword table (intents, context boosts,
+occasions, FAQ topics) so a message is scanned once for all of them
+"""
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    start: int
+    end: int
+    whole_word: bool
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern substring matcher
+
+    Keywords are tagged with (group, label) pairs, e.g. ('intent', 'greeting')
+    or ('occasion', 'birthday'); one keyword may carry several tags, and a
+    keyword listed twice under the same label keeps both tags so weighted
+    scores add up the same way the per-keyword loops did.
+
+    A hit is whole-word when it is delimited by spaces or the ends of the text,
+    i.e. f" {keyword} " in f" {text} ".
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Tuple[str, Hashable]]] = ()):
+        """
+        Initialize the matcher
+
+        Args:
+            patterns: (keyword, (group, label)) pairs; more can be added before build()
+        """
+        self.keywords: List[str] = []
+        self.tags: List[List[Tuple[str, Hashable]]] = []
+        self.groups: set = set()
+        self._keyword_ids: Dict[str, int] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._complete_output: List[List[int]] = [[]]
+        self._built = False
+
+        for keyword, tag in patterns:
+            self.add(keyword, tag)
+
+    def add(self, keyword: str, tag: Tuple[str, Hashable]):
+        """Add a keyword under a (group, label) tag"""
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        keyword_id = self._keyword_ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = self._keyword_ids[keyword] = len(self.keywords)
+            self.keywords.append(keyword)
+            self.tags.append([])
+            self._insert(keyword, keyword_id)
+            self._built = False
+        self.tags[keyword_id].append(tag)
+        self.groups.add(tag[0])
+
+    def has_group(self, group: str) -> bool:
+        """Check if any keyword is tagged with the group"""
+        return group in self.groups
+
+    def add_group(self, group: str, table: Dict[Hashable, Iterable[str]]):
+        """Add a whole table: label -> keywords"""
+        for label, keywords in table.items():
+            for keyword in keywords:
+                self.add(keyword, (group, label))
+
+    def _insert(self, keyword: str, keyword_id: int):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(keyword_id)
+
+    def build(self) -> 'KeywordMatcher':
+        """Compute failure links (called automatically on first scan)"""
+        self._fail = [0] * len(self._goto)
+        complete = [list(output) for output in self._output]
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Breadth-first order: the fail target's output list is already complete
+                complete[next_state] += complete[self._fail[next_state]]
+        self._complete_output = complete
+        self._built = True
+        return self
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """
+        Every keyword occurrence in the text, overlapping ones included
+
+        Args:
+            text: Text to scan (already lowercased by the caller)
+
+        Returns:
+            List[KeywordMatch]: Matches in order of their end position
+        """
+        if not self._built:
+            self.build()
+        goto, fail, output, keywords = self._goto, self._fail, self._complete_output, self.keywords
+        length = len(text)
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                keyword = keywords[keyword_id]
+                end = position + 1
+                start = end - len(keyword)
+                whole = (start == 0 or text[start - 1] == ' ') and (end == length or text[end] == ' ')
+                matches.append(KeywordMatch(keyword, start, end, whole))
+        return matches
+
+    def scan(self, text: str) -> Dict[str, bool]:
+        """
+        Keywords present in the text
+
+        Returns:
+            Dict[str, bool]: Keyword -> True if any occurrence is a whole word
+        """
+        if not self._built:
+            self.build()
+        # Same walk as find_all, without building match objects (this is the hot path)
+        goto, fail, output, keywords = self._goto, self._fail, self._complete_output, self.keywords
+        length = len(text)
+        hits: Dict[str, bool] = {}
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                keyword = keywords[keyword_id]
+                if hits.get(keyword):
+                    continue
+                end = position + 1
+                start = end - len(keyword)
+                hits[keyword] = (start == 0 or text[start - 1] == ' ') and (end == length or text[end] == ' ')
+        return hits
+
+    def tag_hits(self, hits: Dict[str, bool], group: str) -> List[Tuple[Hashable, str, bool]]:
+        """
+        Tagged hits of one group
+
+        Args:
+            hits: Result of scan()
+            group: Tag group to keep
+
+        Returns:
+            List[Tuple[label, keyword, whole_word]]: One entry per tag of every hit keyword
+        """
+        result = []
+        for keyword, whole in hits.items():
+            for tag_group, label in self.tags[self._keyword_ids[keyword]]:
+                if tag_group == group:
+                    result.append((label, keyword, whole))
+        return result
+
+    def labels(self, text: str, group: str, hits: Optional[Dict[str, bool]] = None) -> set:
+        """Labels of a group with at least one keyword in the text (hits: a scan() of it already made)"""
+        return {label for label, _, _ in self.tag_hits(self.scan(text) if hits is None else hits, group)}
+
+    def first_label(self, text: str, group: str, order: Sequence[Hashable],
+                    hits: Optional[Dict[str, bool]] = None) -> Optional[Hashable]:
+        """First label in the given order with a keyword in the text (mirrors an if/elif chain)"""
+        found = self.labels(text, group, hits)
+        for label in order:
+            if label in found:
+                return label
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Automaton size"""
+        return {'keywords': len(self.keywords), 'states': len(self._goto)}
@@ -0,0 +1,364 @@
+"""
+LLM Client Layer for XOFlowers AI Agent
+Process-wide OpenAI and Gemini clients with keep-alive connection pooling,
+per-call timeouts and latency histograms, in sync and async flavours
+"""
+
+import os
+import sys
+import time
+import bisect
+import asyncio
+import threading
+from typing import Dict, List, Optional, Any
+
+# Add config to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+
+from settings import AI_MODEL
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+try:
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+    HAS_OPENAI_SDK = True
+except ImportError:
+    httpx = None
+    OpenAI = AsyncOpenAI = None
+    HAS_OPENAI_SDK = False
+
+try:
+    import google.generativeai as genai
+    HAS_GEMINI_SDK = True
+except ImportError:
+    genai = None
+    HAS_GEMINI_SDK = False
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, safe to update from several threads"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.errors = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False, timeout: bool = False):
+        """Record one call"""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.errors += error
+            self.timeouts += timeout
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile (None if empty or open-ended)"""
+        total = self.count
+        if not total:
+            return None
+        rank = fraction * total
+        seen = 0
+        for bound, count in zip(self.buckets + (None,), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and bucket counts"""
+        with self._lock:
+            total = sum(self.counts)
+            labels = [f"<={bound}s" for bound in self.buckets] + [f">{self.buckets[-1]}s"]
+            return {
+                'calls': total,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'avg_seconds': round(self.total_seconds / total, 3) if total else 0.0,
+                'max_seconds': round(self.max_seconds, 3),
+                'p50': self.percentile(0.5),
+                'p95': self.percentile(0.95),
+                'buckets': dict(zip(labels, self.counts))
+            }
+
+
+def _is_timeout(error: Exception) -> bool:
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError)) or 'timeout' in type(error).__name__.lower()
+
+
+class LLMClient:
+    """
+    Shared entry point for chat completions
+
+    - one OpenAI client per flavour, each on a pooled keep-alive HTTP client
+    - one Gemini model object, reused by every call
+    - providers are tried in the AI_MODEL primary/fallback order
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, openai_api_key: str = None, gemini_api_key: str = None):
+        """
+        Initialize the client layer (connections are opened lazily)
+
+        Args:
+            config: AI model settings (defaults to AI_MODEL)
+            openai_api_key: OpenAI key (defaults to OPENAI_API_KEY)
+            gemini_api_key: Gemini key (defaults to GEMINI_API_KEY)
+        """
+        self.config = dict(AI_MODEL, **(config or {}))
+        self.openai_model = self.config.get('openai_model', 'gpt-3.5-turbo')
+        self.gemini_model_name = self.config.get('gemini_model', 'gemini-1.5-flash')
+        self.timeout = self.config.get('request_timeout', 10.0)
+        self.connect_timeout = self.config.get('connect_timeout', 5.0)
+        self.max_connections = self.config.get('max_connections', 20)
+        self.max_keepalive = self.config.get('max_keepalive_connections', 10)
+        self.keepalive_expiry = self.config.get('keepalive_expiry', 30.0)
+
+        self._openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
+        self._gemini_api_key = gemini_api_key or os.getenv('GEMINI_API_KEY')
+
+        self._openai = None
+        self._async_openai = None
+        self._async_loop = None
+        self._gemini = None
+        self._lock = threading.Lock()
+        self.latency: Dict[str, LatencyHistogram] = {'openai': LatencyHistogram(), 'gemini': LatencyHistogram()}
+
+    @property
+    def has_openai(self) -> bool:
+        return bool(HAS_OPENAI_SDK and self._openai_api_key) or self._openai is not None
+
+    @property
+    def has_gemini(self) -> bool:
+        return bool(HAS_GEMINI_SDK and self._gemini_api_key) or self._gemini is not None
+
+    @property
+    def available(self) -> bool:
+        return self.has_openai or self.has_gemini
+
+    def providers(self) -> List[str]:
+        """Usable providers in primary/fallback order"""
+        order = [self.config.get('primary', 'openai'), self.config.get('fallback', 'gemini'), 'openai', 'gemini']
+        usable = {'openai': self.has_openai, 'gemini': self.has_gemini}
+        result = []
+        for name in order:
+            if usable.get(name) and name not in result:
+                result.append(name)
+        return result
+
+    def _limits(self):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def _http_timeout(self):
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def get_openai(self):
+        """Shared synchronous OpenAI client (thread-safe, pooled)"""
+        if self._openai is None:
+            with self._lock:
+                if self._openai is None:
+                    http_client = httpx.Client(limits=self._limits(), timeout=self._http_timeout())
+                    self._openai = OpenAI(api_key=self._openai_api_key, http_client=http_client, max_retries=1)
+        return self._openai
+
+    async def get_async_openai(self):
+        """Shared asynchronous OpenAI client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        stale = None
+        with self._lock:
+            # Pooled connections belong to one event loop, so a new loop gets a new client
+            if self._async_openai is None or self._async_loop is not loop:
+                stale = self._async_openai
+                http_client = httpx.AsyncClient(limits=self._limits(), timeout=self._http_timeout())
+                self._async_openai = AsyncOpenAI(api_key=self._openai_api_key, http_client=http_client, max_retries=1)
+                self._async_loop = loop
+            client = self._async_openai
+        if stale is not None:
+            await self._close_async_client(stale)
+        return client
+
+    @staticmethod
+    async def _close_async_client(client):
+        """Close a replaced async client (its connections may belong to a closed loop)"""
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"⚠️ Could not close the previous async OpenAI client: {e}")
+
+    def get_gemini(self):
+        """Shared Gemini model object"""
+        if self._gemini is None:
+            with self._lock:
+                if self._gemini is None:
+                    genai.configure(api_key=self._gemini_api_key)
+                    self._gemini = genai.GenerativeModel(self.gemini_model_name)
+        return self._gemini
+
+    def _openai_kwargs(self, prompt: str, max_tokens: int, temperature: float, timeout: Optional[float]) -> Dict[str, Any]:
+        return {
+            'model': self.openai_model,
+            'messages': [{"role": "user", "content": prompt}],
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'timeout': timeout or self.timeout
+        }
+
+    def _observe(self, provider: str, started: float, error: Exception = None):
+        self.latency[provider].observe(
+            time.perf_counter() - started,
+            error=error is not None,
+            timeout=error is not None and _is_timeout(error)
+        )
+
+    def complete_openai(self, prompt: str, max_tokens: int = 50, temperature: float = 0.1,
+                        timeout: float = None) -> str:
+        """Blocking OpenAI chat completion"""
+        started = time.perf_counter()
+        try:
+            response = self.get_openai().chat.completions.create(
+                **self._openai_kwargs(prompt, max_tokens, temperature, timeout)
+            )
+        except Exception as e:
+            self._observe('openai', started, e)
+            raise
+        self._observe('openai', started)
+        return response.choices[0].message.content.strip()
+
+    async def acomplete_openai(self, prompt: str, max_tokens: int = 50, temperature: float = 0.1,
+                               timeout: float = None) -> str:
+        """Async OpenAI chat completion"""
+        started = time.perf_counter()
+        try:
+            client = await self.get_async_openai()
+            response = await client.chat.completions.create(
+                **self._openai_kwargs(prompt, max_tokens, temperature, timeout)
+            )
+        except Exception as e:
+            self._observe('openai', started, e)
+            raise
+        self._observe('openai', started)
+        return response.choices[0].message.content.strip()
+
+    def _gemini_kwargs(self, max_tokens: int, temperature: float, timeout: Optional[float]) -> Dict[str, Any]:
+        return {
+            'generation_config': {'max_output_tokens': max_tokens, 'temperature': temperature},
+            'request_options': {'timeout': timeout or self.timeout}
+        }
+
+    def complete_gemini(self, prompt: str, max_tokens: int = 50, temperature: float = 0.1,
+                        timeout: float = None) -> str:
+        """Blocking Gemini completion"""
+        started = time.perf_counter()
+        try:
+            response = self.get_gemini().generate_content(prompt, **self._gemini_kwargs(max_tokens, temperature, timeout))
+        except Exception as e:
+            self._observe('gemini', started, e)
+            raise
+        self._observe('gemini', started)
+        return response.text.strip()
+
+    async def acomplete_gemini(self, prompt: str, max_tokens: int = 50, temperature: float = 0.1,
+                               timeout: float = None) -> str:
+        """Async Gemini completion"""
+        started = time.perf_counter()
+        try:
+            response = await self.get_gemini().generate_content_async(
+                prompt, **self._gemini_kwargs(max_tokens, temperature, timeout)
+            )
+        except Exception as e:
+            self._observe('gemini', started, e)
+            raise
+        self._observe('gemini', started)
+        return response.text.strip()
+
+    def complete(self, prompts: Dict[str, str], max_tokens: int = 50, temperature: float = 0.1,
+                 timeout: float = None) -> Optional[tuple]:
+        """
+        Run a completion on the first provider that answers
+
+        Args:
+            prompts: Provider name -> prompt for that provider
+            max_tokens: Completion length limit
+            temperature: Sampling temperature
+            timeout: Per-call timeout in seconds (defaults to request_timeout)
+
+        Returns:
+            Optional[tuple]: (provider, text), or None if every provider failed
+        """
+        for provider in self.providers():
+            if provider not in prompts:
+                continue
+            call = self.complete_openai if provider == 'openai' else self.complete_gemini
+            try:
+                return provider, call(prompts[provider], max_tokens, temperature, timeout)
+            except Exception as e:
+                print(f"❌ {provider} completion error: {e}")
+        return None
+
+    async def acomplete(self, prompts: Dict[str, str], max_tokens: int = 50, temperature: float = 0.1,
+                        timeout: float = None) -> Optional[tuple]:
+        """Async version of complete()"""
+        for provider in self.providers():
+            if provider not in prompts:
+                continue
+            call = self.acomplete_openai if provider == 'openai' else self.acomplete_gemini
+            try:
+                return provider, await call(prompts[provider], max_tokens, temperature, timeout)
+            except Exception as e:
+                print(f"❌ {provider} completion error: {e}")
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Provider availability and latency histograms"""
+        return {
+            'providers': self.providers(),
+            'openai_model': self.openai_model,
+            'gemini_model': self.gemini_model_name,
+            'latency': {name: histogram.snapshot() for name, histogram in self.latency.items()}
+        }
+
+    def close(self):
+        """Close the pooled synchronous connections"""
+        if self._openai is not None:
+            self._openai.close()
+            self._openai = None
+
+    async def aclose(self):
+        """Close the pooled async connections"""
+        with self._lock:
+            client, self._async_openai, self._async_loop = self._async_openai, None, None
+        if client is not None:
+            await self._close_async_client(client)
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide LLM client shared by the classifiers and both bots"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
@@ -0,0 +1,152 @@
+"""
+Product Keyword Index Module
+Inverted index over catalog products used by ProductSearchEngine.search_products
+"""
+
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Set, Iterable, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.text import fold_text
+
+# Scoring weights (one hit per field, keywords and translations count per match)
+NAME_WEIGHT = 10
+DESCRIPTION_WEIGHT = 5
+FLOWER_TYPE_WEIGHT = 8
+KEYWORD_WEIGHT = 7
+TRANSLATION_WEIGHT = 6
+
+INDEXED_FIELDS = (('name', NAME_WEIGHT), ('description', DESCRIPTION_WEIGHT), ('flower_type', FLOWER_TYPE_WEIGHT))
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class ProductKeywordIndex:
+    """
+    Token -> product postings for name, description and flower type, plus
+    precomputed postings for catalog keywords and Romanian/English translations
+
+    A query word matches a field when it is a substring of the field text.
+    Query words contain no whitespace, so that is the same as being a
+    substring of one of the field's whitespace-separated tokens; those tokens
+    are found through a trigram index over the vocabulary.
+    """
+
+    def __init__(self, products: Iterable, keyword_terms: Iterable[str],
+                 translations: Dict[str, List[str]], cache_size: int = 4096):
+        """
+        Build the index
+
+        Args:
+            products: Catalog records (dict-like, with name/description/flower_type)
+            keyword_terms: Terms a product is tagged with when its description contains them
+            translations: Romanian query term -> English terms looked up in descriptions
+            cache_size: Number of query words whose matching tokens are memoized
+        """
+        self.products = list(products)
+        self.cache_size = cache_size
+        self._postings: Dict[str, Dict[str, List[int]]] = {field: defaultdict(list) for field, _ in INDEXED_FIELDS}
+        self._trigram_tokens: Dict[str, Set[str]] = defaultdict(set)
+        self._vocabulary: Set[str] = set()
+        self._token_cache: Dict[str, Tuple[str, ...]] = {}
+
+        folded_descriptions = []
+        for position, product in enumerate(self.products):
+            for field, _ in INDEXED_FIELDS:
+                text = fold_text(product.get(field, '') or '')
+                if field == 'description':
+                    folded_descriptions.append(text)
+                for token in set(text.split()):
+                    self._postings[field][token].append(position)
+                    self._vocabulary.add(token)
+
+        for token in self._vocabulary:
+            for trigram in _trigrams(token):
+                self._trigram_tokens[trigram].add(token)
+
+        # Keyword tags: every (term, postings) pair scores separately, like the product keyword list
+        self._keyword_postings: List[Tuple[str, List[int]]] = []
+        for term in keyword_terms:
+            folded = fold_text(term)
+            self._keyword_postings.append((folded, [
+                position for position, text in enumerate(folded_descriptions) if folded in text
+            ]))
+
+        # Translations may span several words, so their postings are precomputed too
+        english_terms = {fold_text(term) for terms in translations.values() for term in terms}
+        english_postings = {
+            term: [position for position, text in enumerate(folded_descriptions) if term in text]
+            for term in english_terms
+        }
+        self._translation_postings: List[Tuple[str, List[List[int]]]] = [
+            (fold_text(romanian), [english_postings[fold_text(term)] for term in terms])
+            for romanian, terms in translations.items()
+        ]
+
+    def _tokens_containing(self, word: str) -> Tuple[str, ...]:
+        """Vocabulary tokens that contain a query word (memoized)"""
+        tokens = self._token_cache.get(word)
+        if tokens is not None:
+            return tokens
+
+        if len(word) >= 3:
+            trigram_sets = sorted((self._trigram_tokens.get(t, set()) for t in _trigrams(word)), key=len)
+            candidates = set.intersection(*trigram_sets) if trigram_sets[0] else set()
+        else:
+            candidates = self._vocabulary
+        tokens = tuple(token for token in candidates if word in token)
+
+        if len(self._token_cache) >= self.cache_size:
+            self._token_cache.clear()
+        self._token_cache[word] = tokens
+        return tokens
+
+    def scores(self, query: str) -> Dict[int, int]:
+        """
+        Relevance score for every product the query touches
+
+        Args:
+            query: Raw search query
+
+        Returns:
+            Dict[int, int]: Product position -> score (products scoring 0 are omitted)
+        """
+        folded_query = fold_text(query)
+        words = set(folded_query.split())
+        scores: Dict[int, int] = defaultdict(int)
+
+        for field, weight in INDEXED_FIELDS:
+            postings = self._postings[field]
+            hits = set()
+            for word in words:
+                for token in self._tokens_containing(word):
+                    hits.update(postings.get(token, ()))
+            for position in hits:
+                scores[position] += weight
+
+        for term, positions in self._keyword_postings:
+            if term in folded_query:
+                for position in positions:
+                    scores[position] += KEYWORD_WEIGHT
+
+        for romanian, english_postings in self._translation_postings:
+            if romanian in folded_query:
+                for positions in english_postings:
+                    for position in positions:
+                        scores[position] += TRANSLATION_WEIGHT
+
+        return dict(scores)
+
+    def stats(self) -> Dict[str, int]:
+        """Index size"""
+        return {
+            'products': len(self.products),
+            'vocabulary': len(self._vocabulary),
+            'trigrams': len(self._trigram_tokens),
+            'cached_words': len(self._token_cache)
+        }
@@ -1,133 +1,115 @@
 """
 Product Search Engine Module
-Handles product search using real CSV data from chunks_data.csv
+Handles keyword product search over the shared product catalog
 """
 
 import os
 import sys
-import csv
-import re
 from typing import List, Dict, Optional, Tuple
 
-# Add config to path
+# Add config and src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from settings import DATABASE, RESPONSE_CONFIG
+from database.catalog import get_catalog, extract_product_name, extract_keywords, KEYWORD_TERMS
+from .product_index import ProductKeywordIndex
+
+# Non-flower products are never recommended (compared case-insensitively,
+# the catalog uses case-standardized names such as "Greeting Card")
+EXCLUDED_CATEGORIES = {'additional accessories / vases', 'greeting card'}
+EXCLUDED_KEYWORDS = ['fertilizer', 'card', 'vase', 'aquabox', 'diffuser']
+PREMIUM_CATEGORIES = {'premium', 'luxury', 'peonies', "bride's bouquet", "author's bouquets"}
+
+# Special matching for common Romanian terms (Romanian query term -> English description terms)
+ROMANIAN_MATCHES = {
+    'trandafir': ['rose', 'roses'],
+    'bujor': ['peony', 'peonies'],
+    'flori': ['flower', 'flowers', 'bouquet'],
+    'buchet': ['bouquet'],
+    'cutie': ['box'],
+    'coș': ['basket'],
+    'nuntă': ['bride', 'wedding', 'bridal'],
+    'aniversare': ['birthday', 'anniversary'],
+    'roșu': ['red', 'scarlet'],
+    'roz': ['pink'],
+    'alb': ['white'],
+    'galben': ['yellow'],
+    'violet': ['purple', 'violet'],
+    'luxury': ['luxurious', 'premium'],
+    'elegant': ['elegant', 'stylish'],
+    'lăcrimioare': ['lily of the valley', 'gypsophila']
+}
+
+
+def _is_excluded(product) -> bool:
+    """Check if a product is a non-flower item"""
+    if product['category'].lower() in EXCLUDED_CATEGORIES:
+        return True
+    name = product['name'].lower()
+    return any(keyword in name for keyword in EXCLUDED_KEYWORDS)
 
 
 class ProductSearchEngine:
     """
-    Handles product search using real CSV data from chunks_data.csv
+    Handles keyword product search over the shared product catalog
     """
     
     def __init__(self):
         """Initialize the product search engine"""
         self.db_config = DATABASE
         self.response_config = RESPONSE_CONFIG
+        self.catalog = None
         self.products = []
         self.categories = {}
+        self.index = None
+        self._excluded = set()
+        self._positions = {}
+        self._name_positions = {}
+        self._prices = None
         self._load_products()
         
     def _load_products(self):
-        """Load products from chunks_data.csv"""
+        """Attach to the shared catalog (loaded once per process)"""
         try:
-            csv_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'chunks_data.csv')
+            self.catalog = get_catalog()
+            # Only products that exist and have a price can be recommended
+            self.products = self.catalog.valid_records()
+            
+            # Group by category
+            self.categories = {}
+            for product in self.products:
+                self.categories.setdefault(product['category'], []).append(product)
+            
+            # Inverted index and exclusion flags are built once, queries only touch matching products
+            self.index = ProductKeywordIndex(self.products, KEYWORD_TERMS, ROMANIAN_MATCHES)
+            self._excluded = {position for position, product in enumerate(self.products) if _is_excluded(product)}
+            self._positions = {}
+            self._name_positions = {}
+            for position, product in enumerate(self.products):
+                self._positions.setdefault(product['id'], position)
+                self._name_positions.setdefault(product['name'], []).append(position)
+            
+            # Parsed prices aligned with self.products (and with catalog.price_index positions)
+            self._prices = self.catalog.prices[self.catalog.valid_indices]
             
-            with open(csv_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row.get('chunk_type') == 'product':
-                        product = {
-                            'id': row.get('chunk_id', ''),
-                            'name': self._extract_product_name(row.get('primary_text', '')),
-                            'description': row.get('primary_text', ''),
-                            'price': row.get('price', ''),
-                            'category': row.get('category', ''),
-                            'collection_id': row.get('collection_id', ''),
-                            'flower_type': row.get('flower_type', ''),
-                            'url': row.get('url', ''),
-                            'keywords': self._extract_keywords(row.get('primary_text', ''))
-                        }
-                        self.products.append(product)
-                        
-                        # Group by category
-                        category = product['category']
-                        if category not in self.categories:
-                            self.categories[category] = []
-                        self.categories[category].append(product)
-                        
             print(f"✅ Loaded {len(self.products)} products from {len(self.categories)} categories")
             
         except Exception as e:
             print(f"❌ Error loading products: {e}")
+            self.catalog = None
             self.products = []
             self.categories = {}
+            self.index = None
+            self._excluded = set()
     
     def _extract_product_name(self, description: str) -> str:
         """Extract product name from description"""
-        # Look for quoted names or capitalize first part
-        if '"' in description:
-            match = re.search(r'"([^"]+)"', description)
-            if match:
-                return match.group(1)
-        
-        # Extract name before first dash or description
-        parts = description.split(' - ')
-        if len(parts) > 1:
-            return parts[0].strip()
-        
-        # Take first meaningful part
-        words = description.split()
-        if len(words) > 3:
-            return ' '.join(words[:3])
-        
-        return description[:50] + '...' if len(description) > 50 else description
+        return extract_product_name(description)
     
     def _extract_keywords(self, description: str) -> List[str]:
         """Extract keywords from product description"""
-        # Convert to lowercase and split
-        text = description.lower()
-        
-        # Common flower terms
-        flower_terms = [
-            'trandafir', 'bujor', 'peony', 'rose', 'hydrangea', 'gerbera', 'crizantema',
-            'lalea', 'narcisă', 'zambile', 'frezii', 'cala', 'orhidee', 'garoafă',
-            'lăcrimioare', 'eucalipt', 'viburnum', 'delphinium', 'scabiosa', 'eustoma',
-            'anthurium', 'mattiola', 'spray', 'alstroemeria', 'solidago', 'lisianthus',
-            'dianthus', 'wax flower', 'gypsophila', 'chrysanthemum', 'freesia', 'tulip'
-        ]
-        
-        # Color terms
-        color_terms = [
-            'roșu', 'roz', 'alb', 'galben', 'violet', 'albastru', 'portocaliu',
-            'verde', 'negru', 'cremă', 'pastel', 'coral', 'liliac', 'lavanda'
-        ]
-        
-        # Occasion terms
-        occasion_terms = [
-            'nuntă', 'aniversare', 'ziua nașterii', 'valentine', 'mama', 'dragoste',
-            'romantic', 'elegant', 'luxury', 'premium', 'corporate', 'funeral',
-            'primăvară', 'vară', 'toamnă', 'iarnă', 'cadou', 'surpriză'
-        ]
-        
-        keywords = []
-        
-        # Find flower terms
-        for term in flower_terms:
-            if term in text:
-                keywords.append(term)
-        
-        # Find color terms
-        for term in color_terms:
-            if term in text:
-                keywords.append(term)
-        
-        # Find occasion terms
-        for term in occasion_terms:
-            if term in text:
-                keywords.append(term)
-        
-        return keywords
+        return extract_keywords(description)
     
     def search_products(self, query: str, category: Optional[str] = None, context: Optional[Dict] = None) -> List[Dict]:
         """
@@ -144,78 +126,29 @@ class ProductSearchEngine:
         if not self.products:
             return []
         
-        query_lower = query.lower()
         results = []
         seen_names = set()  # Track seen product names to avoid duplicates
         
-        # Filter out non-flower products
-        excluded_categories = ['Additional accessories / Vases', 'Greeting card']
-        excluded_keywords = ['fertilizer', 'card', 'vase', 'aquabox', 'diffuser']
-        
-        # Search through all products
-        for product in self.products:
+        # Only products sharing a term with the query have a non-zero score;
+        # they are visited in catalog order so duplicate names resolve as before
+        scores = self.index.scores(query)
+        for position in sorted(scores):
             # Skip non-flower products
-            if product['category'] in excluded_categories:
+            if position in self._excluded:
                 continue
             
-            # Skip products with excluded keywords
-            if any(keyword in product['name'].lower() for keyword in excluded_keywords):
-                continue
+            product = self.products[position]
             
             # Skip duplicates based on name
             if product['name'] in seen_names:
                 continue
             
-            score = 0
-            
-            # Check name match
-            if any(word in product['name'].lower() for word in query_lower.split()):
-                score += 10
-            
-            # Check description match
-            if any(word in product['description'].lower() for word in query_lower.split()):
-                score += 5
-            
-            # Check flower type match
-            if any(word in product['flower_type'].lower() for word in query_lower.split()):
-                score += 8
-            
-            # Check keywords match
-            for keyword in product['keywords']:
-                if keyword in query_lower:
-                    score += 7
-            
-            # Special matching for common Romanian terms
-            romanian_matches = {
-                'trandafir': ['rose', 'roses'],
-                'bujor': ['peony', 'peonies'],
-                'flori': ['flower', 'flowers', 'bouquet'],
-                'buchet': ['bouquet'],
-                'cutie': ['box'],
-                'coș': ['basket'],
-                'nuntă': ['bride', 'wedding', 'bridal'],
-                'aniversare': ['birthday', 'anniversary'],
-                'roșu': ['red', 'scarlet'],
-                'roz': ['pink'],
-                'alb': ['white'],
-                'galben': ['yellow'],
-                'violet': ['purple', 'violet'],
-                'luxury': ['luxurious', 'premium'],
-                'elegant': ['elegant', 'stylish'],
-                'lăcrimioare': ['lily of the valley', 'gypsophila']
-            }
-            
-            for romanian_term, english_terms in romanian_matches.items():
-                if romanian_term in query_lower:
-                    for eng_term in english_terms:
-                        if eng_term in product['description'].lower():
-                            score += 6
-            
             # Category filter
             if category and product['category'].lower() != category.lower():
-                score = 0
+                continue
             
             # Add to results if score is high enough
+            score = scores[position]
             if score >= 5:
                 product_copy = product.copy()
                 product_copy['relevance_score'] = score
@@ -238,10 +171,11 @@ class ProductSearchEngine:
         Returns:
             Optional[Dict]: Product data or None if not found
         """
-        for product in self.products:
-            if product['id'] == product_id:
-                return product
-        return None
+        if self.catalog is None:
+            return None
+        product = self.catalog.get(product_id)
+        # Catalog records are shared read-only views, callers get their own dict
+        return None if product is None else product.copy()
     
     def get_popular_products(self, limit: int = 5) -> List[Dict]:
         """
@@ -253,19 +187,13 @@ class ProductSearchEngine:
         Returns:
             List[Dict]: List of popular products
         """
-        excluded_categories = ['Additional accessories / Vases', 'Greeting card']
-        excluded_keywords = ['fertilizer', 'card', 'vase', 'aquabox', 'diffuser']
         seen_names = set()  # Track seen product names to avoid duplicates
         
         # Filter for premium and luxury products
         premium_products = []
         for p in self.products:
             # Skip non-flower products
-            if p['category'] in excluded_categories:
-                continue
-            
-            # Skip products with excluded keywords
-            if any(keyword in p['name'].lower() for keyword in excluded_keywords):
+            if _is_excluded(p):
                 continue
             
             # Skip duplicates
@@ -273,14 +201,14 @@ class ProductSearchEngine:
                 continue
             
             # Include premium categories
-            if p['category'] in ['Premium', 'Luxury', 'Peonies', 'Bride\'s bouquet', 'Author\'s bouquets']:
+            if p['category'].lower() in PREMIUM_CATEGORIES:
                 premium_products.append(p)
                 seen_names.add(p['name'])
         
         # Sort by price (higher price = more premium)
         premium_products.sort(key=lambda x: int(x['price']) if x['price'].isdigit() else 0, reverse=True)
         
-        return premium_products[:limit]
+        return [product.copy() for product in premium_products[:limit]]
     
     def get_products_by_category(self, category: str, limit: int = 10) -> List[Dict]:
         """
@@ -293,9 +221,9 @@ class ProductSearchEngine:
         Returns:
             List[Dict]: List of products in category
         """
-        if category in self.categories:
-            return self.categories[category][:limit]
-        return []
+        if self.catalog is None:
+            return []
+        return [product.copy() for product in self.catalog.by_category(category)[:limit]]
     
     def get_budget_recommendations(self, max_price: int, query: str = "") -> List[Dict]:
         """
@@ -308,8 +236,6 @@ class ProductSearchEngine:
         Returns:
             List[Dict]: List of products within budget
         """
-        excluded_categories = ['Additional accessories / Vases', 'Greeting card']
-        excluded_keywords = ['fertilizer', 'card', 'vase', 'aquabox', 'diffuser']
         seen_names = set()  # Track seen product names to avoid duplicates
         
         if query:
@@ -333,109 +259,59 @@ class ProductSearchEngine:
             
             # If no results within budget, find closest matches under budget
             budget_products = []
-            for product in self.products:
-                # Skip non-flower products
-                if product['category'] in excluded_categories:
+            scores = self.index.scores(query)
+            for position in sorted(scores):
+                # Skip non-flower products and products over budget
+                if position in self._excluded or self._prices[position] > max_price:
                     continue
                 
-                # Skip products with excluded keywords
-                if any(keyword in product['name'].lower() for keyword in excluded_keywords):
-                    continue
+                product = self.products[position]
                 
                 # Skip duplicates
                 if product['name'] in seen_names:
                     continue
                 
-                try:
-                    price = int(product['price'])
-                    if price <= max_price:
-                        # Calculate relevance score for this product
-                        score = self._calculate_relevance_score(product, query.lower())
-                        if score >= 5:  # Only include relevant products
-                            product_copy = product.copy()
-                            product_copy['relevance_score'] = score
-                            budget_products.append(product_copy)
-                            seen_names.add(product['name'])
-                except (ValueError, TypeError):
-                    continue
+                # Only include relevant products
+                score = scores[position]
+                if score >= 5:
+                    product_copy = product.copy()
+                    product_copy['relevance_score'] = score
+                    budget_products.append(product_copy)
+                    seen_names.add(product['name'])
             
             # Sort by relevance, then by price
             budget_products.sort(key=lambda x: (x['relevance_score'], -int(x['price']) if x['price'].isdigit() else 0), reverse=True)
             return budget_products[:5]
         
         else:
-            # No specific query, just return products within budget
+            # No specific query: walk the price index from the cheapest product up
             budget_products = []
-            for product in self.products:
+            for position in self.catalog.price_index.range(price_max=max_price):
                 # Skip non-flower products
-                if product['category'] in excluded_categories:
+                if position in self._excluded:
                     continue
                 
-                # Skip products with excluded keywords
-                if any(keyword in product['name'].lower() for keyword in excluded_keywords):
-                    continue
-                
-                # Skip duplicates
-                if product['name'] in seen_names:
+                # Duplicated names are represented by their first in-budget occurrence in the catalog
+                product = self.products[position]
+                if self._first_in_budget(product['name'], max_price) != position:
                     continue
                 
-                try:
-                    price = int(product['price'])
-                    if price <= max_price:
-                        budget_products.append(product)
-                        seen_names.add(product['name'])
-                except (ValueError, TypeError):
-                    continue
+                budget_products.append(product.copy())
+                if len(budget_products) == 5:
+                    break
             
-            # Sort by price (ascending)
-            budget_products.sort(key=lambda x: int(x['price']) if x['price'].isdigit() else 0)
-            return budget_products[:5]
+            return budget_products
+    
+    def _first_in_budget(self, name: str, max_price: float) -> Optional[int]:
+        """Catalog position of the first product with this name within budget"""
+        for position in self._name_positions.get(name, ()):
+            if position not in self._excluded and self._prices[position] <= max_price:
+                return position
+        return None
     
     def _calculate_relevance_score(self, product: Dict, query_lower: str) -> int:
         """Calculate relevance score for a product based on query"""
-        score = 0
-        
-        # Check name match
-        if any(word in product['name'].lower() for word in query_lower.split()):
-            score += 10
-        
-        # Check description match
-        if any(word in product['description'].lower() for word in query_lower.split()):
-            score += 5
-        
-        # Check flower type match
-        if any(word in product['flower_type'].lower() for word in query_lower.split()):
-            score += 8
-        
-        # Check keywords match
-        for keyword in product['keywords']:
-            if keyword in query_lower:
-                score += 7
-        
-        # Special matching for common Romanian terms
-        romanian_matches = {
-            'trandafir': ['rose', 'roses'],
-            'bujor': ['peony', 'peonies'],
-            'flori': ['flower', 'flowers', 'bouquet'],
-            'buchet': ['bouquet'],
-            'cutie': ['box'],
-            'coș': ['basket'],
-            'nuntă': ['bride', 'wedding', 'bridal'],
-            'aniversare': ['birthday', 'anniversary'],
-            'roșu': ['red', 'scarlet'],
-            'roz': ['pink'],
-            'alb': ['white'],
-            'galben': ['yellow'],
-            'violet': ['purple', 'violet'],
-            'luxury': ['luxurious', 'premium'],
-            'elegant': ['elegant', 'stylish'],
-            'lăcrimioare': ['lily of the valley', 'gypsophila']
-        }
-        
-        for romanian_term, english_terms in romanian_matches.items():
-            if romanian_term in query_lower:
-                for eng_term in english_terms:
-                    if eng_term in product['description'].lower():
-                        score += 6
-        
-        return score
+        if self.index is None:
+            return 0
+        position = self._positions.get(product['id'])
+        return self.index.scores(query_lower).get(position, 0)
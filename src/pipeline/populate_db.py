@@ -12,14 +12,23 @@ import os
 import time
 import logging
 import re
+import sys
 from typing import List, Dict, Optional, Any
-import chromadb
-from chromadb.config import Settings
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 import numpy as np
 
+# Adaugă calea către modulele noastre
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.resources import get_chroma_client, get_embedding_model, get_or_create_collection
+from database.catalog_sync import CatalogSync, SyncReport
+
+# Add config to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+
+from settings import DATABASE
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -33,24 +42,34 @@ class ChromaDBPopulator:
     Permite filtrări rapide: preț, categorie, culori
     """
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, embedding_model_name: str = None, batch_size: int = None):
         # Configurează calea bazei de date
         self.db_path = db_path or os.getenv('CHROMADB_PATH', './chroma_db_flowers')
         
-        # Inițializează ChromaDB
-        self.client = chromadb.PersistentClient(path=self.db_path)
+        # Clientul ChromaDB partajat în proces
+        self.client = get_chroma_client(self.db_path)
         
-        # Modelul de embeddings (multilingv pentru RO/EN/RU)
-        self.embedding_model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        # Modelul de embeddings din registrul comun (același model la indexare și la căutare)
+        self.embedding_model_name = embedding_model_name or DATABASE.get('embedding_model', 'paraphrase-multilingual-MiniLM-L12-v2')
+        self.embedding_model = get_embedding_model(self.embedding_model_name)
         
         # Colecția principală
         self.collection_name = "xoflowers_products"
         self.collection = None
         
+        # Mărimea lotului pentru encode + upsert
+        self.batch_size = batch_size or DATABASE.get('ingest_batch_size', 64)
+        
         # Statistici
         self.processed_count = 0
         self.success_count = 0
         self.error_count = 0
+        # Defalcarea lui success_count; doar produsele recalculate intră în viteză
+        self.embedded_count = 0
+        self.metadata_updated_count = 0
+        self.unchanged_count = 0
+        self.batch_times: List[float] = []
+        self.total_seconds = 0.0
         
         # Dicționare pentru extragerea metadatelor
         self.color_keywords = {
@@ -68,25 +87,30 @@ class ChromaDBPopulator:
         
         logger.info(f"ChromaDB Populator inițializat. Baza de date: {self.db_path}")
     
-    def setup_collection(self) -> bool:
+    def setup_collection(self, reset: bool = False) -> bool:
         """
         Configurează colecția ChromaDB
+        
+        Args:
+            reset: Șterge colecția existentă înainte (reconstrucție completă)
         """
         try:
-            # Șterge colecția existentă dacă există
-            try:
-                self.client.delete_collection(name=self.collection_name)
-                logger.info(f"Colecția existentă '{self.collection_name}' a fost ștearsă")
-            except:
-                pass  # Colecția nu există
+            if reset:
+                try:
+                    self.client.delete_collection(name=self.collection_name)
+                    logger.info(f"Colecția existentă '{self.collection_name}' a fost ștearsă")
+                except Exception:
+                    pass  # Colecția nu există
             
-            # Creează colecția nouă
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
+            # Refolosește colecția existentă (legată de același model) sau o creează
+            self.collection = get_or_create_collection(
+                self.client,
+                self.collection_name,
+                self.embedding_model_name,
                 metadata={"description": "XOFlowers products with enriched descriptions and structured metadata"}
             )
             
-            logger.info(f"✅ Colecția '{self.collection_name}' a fost creată cu succes")
+            logger.info(f"✅ Colecția '{self.collection_name}' este pregătită ({self.collection.count()} produse existente)")
             return True
             
         except Exception as e:
@@ -232,40 +256,29 @@ class ChromaDBPopulator:
         if category:
             parts.append(f"Categorie: {category}")
         
-        # Prețul în text pentru căutări de tipul "ieftin", "scump"
+        # Doar nivelul de preț intră în text, pentru căutări de tipul "ieftin", "scump";
+        # prețul exact stă în metadata, ca o schimbare de preț să nu ceară re-embedding
         price = product.get('price', 0)
-        if price > 0:
-            price_text = f"Preț {price} lei"
-            if price < 500:
-                price_text += " ieftin economic accesibil"
-            elif price > 2000:
-                price_text += " premium scump luxury de lux"
-            parts.append(price_text)
+        if 0 < price < 500:
+            parts.append("ieftin economic accesibil")
+        elif price > 2000:
+            parts.append("premium scump luxury de lux")
         
         return " ".join(parts)
     
     def add_product_to_db(self, product: Dict) -> bool:
         """
-        Adaugă un produs în ChromaDB
+        Adaugă sau actualizează un singur produs în ChromaDB
         """
         try:
-            # Creează textul pentru căutare
-            searchable_text = self.create_searchable_text(product)
-            
-            # Creează embedding-ul
-            embedding = self.embedding_model.encode([searchable_text])[0].tolist()
-            
-            # Creează metadata-ul structurat
-            metadata = self.create_metadata(product)
-            
-            # Adaugă în colecție
             product_id = product.get('id', f"product_{self.processed_count}")
+            searchable_text = self.create_searchable_text(product)
             
-            self.collection.add(
-                embeddings=[embedding],
+            self.collection.upsert(
+                ids=[product_id],
+                embeddings=self._embed([searchable_text]),
                 documents=[searchable_text],
-                metadatas=[metadata],
-                ids=[product_id]
+                metadatas=[self.create_metadata(product)]
             )
             
             self.success_count += 1
@@ -276,11 +289,19 @@ class ChromaDBPopulator:
             self.error_count += 1
             return False
     
-    def populate_database(self, input_file: str = "data/products_enriched.json") -> bool:
+    def populate_database(self, input_file: str = "data/products_enriched.json", batch_size: int = None,
+                          full_rebuild: bool = False) -> bool:
         """
-        Populează întreaga bază de date ChromaDB
+        Sincronizează baza de date ChromaDB cu fișierul de produse
+        
+        Doar produsele noi sau cu text schimbat primesc embeddings noi (în loturi de
+        batch_size), schimbările doar de metadata se actualizează pe loc, iar produsele
+        dispărute din fișier sunt șterse. Colecția nu este recreată decât cu full_rebuild.
         """
-        logger.info("🗄️  Începând popularea ChromaDB cu produse îmbunătățite...")
+        logger.info("🗄️  Începând sincronizarea ChromaDB cu produse îmbunătățite...")
+        
+        if batch_size:
+            self.batch_size = batch_size
         
         try:
             # Verifică dacă fișierul există
@@ -290,7 +311,7 @@ class ChromaDBPopulator:
                 return False
             
             # Configurează colecția
-            if not self.setup_collection():
+            if not self.setup_collection(reset=full_rebuild):
                 return False
             
             # Încarcă produsele
@@ -301,27 +322,37 @@ class ChromaDBPopulator:
                 logger.error("❌ Nu s-au găsit produse în fișierul de intrare")
                 return False
             
-            logger.info(f"📦 Găsite {len(products)} produse de procesat")
+            logger.info(f"📦 Găsite {len(products)} produse de procesat (loturi de {self.batch_size})")
             
-            # Procesează fiecare produs
-            for i, product in enumerate(products):
+            # Afișează detalii despre metadata pentru primele produse
+            for product in products[:3]:
+                metadata = self.create_metadata(product)
+                logger.info(f"   📊 Metadata: preț={metadata['price']}, "
+                          f"culori={metadata['main_colors']}, "
+                          f"categorie={metadata['category']}")
+            
+            # Pregătește înregistrările (id, text, metadata)
+            records = []
+            for index, product in enumerate(products):
                 self.processed_count += 1
-                
-                logger.info(f"📥 Procesând {self.processed_count}/{len(products)}: {product.get('title', 'Fără nume')}")
-                
-                success = self.add_product_to_db(product)
-                
-                if success:
-                    # Afișează detalii despre metadata pentru primele produse
-                    if i < 3:
-                        metadata = self.create_metadata(product)
-                        logger.info(f"   📊 Metadata: preț={metadata['price']}, "
-                                  f"culori={metadata['main_colors']}, "
-                                  f"categorie={metadata['category']}")
-                
-                # Progres la fiecare 50 de produse
-                if (i + 1) % 50 == 0:
-                    self._show_progress_stats(i + 1, len(products))
+                try:
+                    product_id = product.get('id', f"product_{index + 1}")
+                    records.append((product_id, self.create_searchable_text(product), self.create_metadata(product)))
+                except Exception as e:
+                    logger.error(f"❌ Eroare la pregătirea produsului {product.get('id', 'unknown')}: {e}")
+                    self.error_count += 1
+            
+            report = CatalogSync(
+                self.collection, self._embed, self.batch_size, on_batch=self._show_progress_stats
+            ).sync(records)
+            
+            self.success_count += report.embedded + report.metadata_updated + report.unchanged
+            self.embedded_count += report.embedded
+            self.metadata_updated_count += report.metadata_updated
+            self.unchanged_count += report.unchanged
+            self.batch_times.extend(report.batch_times)
+            self.total_seconds = report.seconds
+            logger.info(f"🔄 Sincronizare: {report.summary()}")
             
             # Statistici finale
             self._show_final_stats(len(products))
@@ -332,11 +363,41 @@ class ChromaDBPopulator:
             logger.error(f"❌ Eroare la popularea bazei de date: {e}")
             return False
     
-    def _show_progress_stats(self, current: int, total: int):
-        """Afișează progresul"""
+    def _embed(self, documents: List[str]) -> List[List[float]]:
+        """Embeddings pentru un lot de texte (modelul face batching nativ pe listă)"""
+        return self.embedding_model.encode(
+            documents, batch_size=self.batch_size, show_progress_bar=False
+        ).tolist()
+    
+    def get_throughput(self) -> Dict[str, float]:
+        """
+        Raport de performanță pentru ultima populare
+        
+        Viteza măsoară doar produsele recalculate (encode + upsert) pe durata
+        loturilor; cele neschimbate sau cu metadata actualizată sunt raportate
+        separat, altfel o sincronizare fără modificări ar avea o viteză uriașă.
+        """
+        batches = len(self.batch_times)
+        batch_seconds = sum(self.batch_times)
+        return {
+            'products_per_second': round(self.embedded_count / batch_seconds, 1) if batch_seconds else 0.0,
+            'ms_per_batch': round(batch_seconds / batches * 1000, 1) if batches else 0.0,
+            'embedded': self.embedded_count,
+            'metadata_updated': self.metadata_updated_count,
+            'unchanged': self.unchanged_count,
+            'batches': batches,
+            'batch_size': self.batch_size,
+            'total_seconds': round(self.total_seconds, 2)
+        }
+    
+    def _show_progress_stats(self, current: int, total: int, report: SyncReport):
+        """Afișează progresul după fiecare lot scris de CatalogSync"""
         percentage = (current / total) * 100
+        elapsed = sum(report.batch_times)
+        speed = current / elapsed if elapsed else 0.0
         logger.info(f"📈 Progres: {current}/{total} ({percentage:.1f}%) - "
-                   f"Succese: {self.success_count}, Erori: {self.error_count}")
+                   f"ultimul lot {report.batch_times[-1] * 1000:.0f} ms, {speed:.1f} produse/sec, "
+                   f"Erori: {self.error_count}")
     
     def _show_final_stats(self, total_products: int):
         """Afișează statisticile finale"""
@@ -344,9 +405,15 @@ class ChromaDBPopulator:
         
         print(f"\\n📊 STATISTICI POPULARE CHROMADB:")
         print(f"   🗄️  Total produse procesate: {self.processed_count}")
-        print(f"   ✅ Adăugate cu succes: {self.success_count}")
+        print(f"   ✅ Sincronizate cu succes: {self.success_count} "
+              f"({self.embedded_count} recalculate, {self.metadata_updated_count} doar metadata, "
+              f"{self.unchanged_count} neschimbate)")
         print(f"   ❌ Erori: {self.error_count}")
         print(f"   📈 Rata de succes: {success_rate:.1f}%")
+        
+        throughput = self.get_throughput()
+        print(f"   ⚡ Viteză: {throughput['products_per_second']} produse/sec, "
+              f"{throughput['ms_per_batch']} ms/lot ({throughput['batches']} loturi x {throughput['batch_size']})")
         print(f"   🏠 Locația bazei de date: {self.db_path}")
         
         if self.success_count > 0:
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+XOFlowers Intent Model Trainer
+Trains the embedding intent model from data/intent_examples.json and reports
+its accuracy against the keyword/hybrid classifier
+
+Usage:
+    python src/pipeline/train_intent_model.py              # train and save
+    python src/pipeline/train_intent_model.py --evaluate   # cross-validate, compare, then save
+    python src/pipeline/train_intent_model.py --fast-path  # precision of the keyword fast path only
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+
+from settings import DATABASE, INTENT_CLASSIFIER
+from database.resources import get_embedding_model
+from intelligence.intent_model import (
+    IntentEmbeddingModel, cross_validate, data_path, load_examples, summarize_predictions
+)
+
+
+def evaluate_hybrid(examples):
+    """Accuracy of the existing keyword/hybrid path (no LLM) on the labelled examples"""
+    from intelligence.intent_classifier import IntentClassifier
+
+    classifier = IntentClassifier()
+    classifier.embedding_mode = None
+
+    texts, expected, predicted = [], [], []
+    started = time.perf_counter()
+    for intent, messages in examples.items():
+        for message in messages:
+            texts.append(message)
+            expected.append(intent)
+            predicted.append(classifier._classify_locally(message.lower().strip())[0])
+    return summarize_predictions(texts, expected, predicted, time.perf_counter() - started)
+
+
+def evaluate_fast_path(examples):
+    """Coverage and precision of the keyword fast path (the thresholds in INTENT_CLASSIFIER['fast_path'])"""
+    from intelligence.intent_classifier import IntentClassifier
+
+    classifier = IntentClassifier()
+    total, answered, errors = 0, 0, []
+    for intent, messages in examples.items():
+        for message in messages:
+            total += 1
+            result = classifier._classify_fast_path(message.lower().strip())
+            if result is None:
+                continue
+            answered += 1
+            if result[0] != intent:
+                errors.append({'text': message, 'expected': intent, 'predicted': result[0]})
+    return {
+        'examples': total,
+        'answered': answered,
+        'precision': (answered - len(errors)) / answered if answered else 0.0,
+        'errors': errors
+    }
+
+
+def print_report(title, report, show_errors=10):
+    print(f"\n📊 {title}: {report['accuracy']:.1%} of {report['examples']} examples "
+          f"({report['avg_ms']} ms/message)")
+    weakest = sorted(report['per_intent'].items(), key=lambda item: item[1])[:5]
+    print("   Weakest intents: " + ", ".join(f"{intent} {accuracy:.0%}" for intent, accuracy in weakest))
+    for error in report['errors'][:show_errors]:
+        print(f"   ❌ '{error['text']}' -> {error['predicted']} (expected {error['expected']})")
+
+
+def main():
+    model_config = INTENT_CLASSIFIER.get('embedding_model', {})
+    parser = argparse.ArgumentParser(description="Train the embedding intent model")
+    parser.add_argument("--examples", default=model_config.get('examples', 'intent_examples.json'),
+                        help="Labelled examples JSON (in data/ or an absolute path)")
+    parser.add_argument("--output", default=model_config.get('path', 'intent_model.npz'),
+                        help="Artifact path (in data/ or an absolute path)")
+    parser.add_argument("--model", default=DATABASE.get('embedding_model', 'paraphrase-multilingual-MiniLM-L12-v2'),
+                        help="SentenceTransformer model name")
+    parser.add_argument("--method", choices=['centroid', 'prototype'], default=model_config.get('method', 'centroid'))
+    parser.add_argument("--evaluate", action="store_true", help="Cross-validate and compare with the hybrid path")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--no-save", action="store_true", help="Only evaluate")
+    parser.add_argument("--fast-path", action="store_true",
+                        help="Only report the keyword fast path precision (no embedding model needed)")
+    args = parser.parse_args()
+
+    examples = load_examples(args.examples)
+    total = sum(len(messages) for messages in examples.values())
+    if args.fast_path:
+        report = evaluate_fast_path(examples)
+        print(f"\n📊 Fast path: answered {report['answered']} of {report['examples']} examples, "
+              f"precision {report['precision']:.1%}")
+        for error in report['errors']:
+            print(f"   ❌ '{error['text']}' -> {error['predicted']} (expected {error['expected']})")
+        return
+
+    print(f"🧠 Intent model: {total} examples, {len(examples)} intents, model {args.model}")
+
+    encoder = get_embedding_model(args.model)
+
+    def encode(texts):
+        return encoder.encode(texts, batch_size=64, show_progress_bar=False)
+
+    if args.evaluate:
+        print_report(f"Embedding model ({args.method}, {args.folds}-fold)",
+                     cross_validate(examples, encode, args.model, folds=args.folds, method=args.method))
+        print_report("Hybrid keyword path", evaluate_hybrid(examples))
+
+    if not args.no_save:
+        started = time.perf_counter()
+        model = IntentEmbeddingModel.train(examples, encode, args.model, method=args.method)
+        output = data_path(args.output)
+        model.save(output)
+        print(f"\n✅ Saved {output} in {time.perf_counter() - started:.2f}s: {model.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,14 @@ Handles censorship, jailbreak protection, and rate limiting
 
 import os
 import sys
-import re
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
 
 # Add config to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
 
 from settings import SECURITY
+from .jailbreak import JAILBREAK_PATTERNS, get_jailbreak_detector
+from .rate_limit import RateLimiter, RateLimitGate
 
 
 class SecurityFilter:
@@ -24,6 +24,7 @@ class SecurityFilter:
         """Initialize security filter"""
         self.security_config = SECURITY
         self.censorship_keywords = self._load_censorship_keywords()
+        self.jailbreak_detector = get_jailbreak_detector()
         self.jailbreak_patterns = self._load_jailbreak_patterns()
         self.rate_limiter = RateLimiter()
         
@@ -36,16 +37,8 @@ class SecurityFilter:
         ]
     
     def _load_jailbreak_patterns(self) -> List[str]:
-        """Load jailbreak detection patterns"""
-        return [
-            r"ignore\s+previous\s+instructions",
-            r"ignore\s+all\s+previous",
-            r"forget\s+everything",
-            r"you\s+are\s+now",
-            r"new\s+role",
-            r"pretend\s+to\s+be",
-            r"act\s+as\s+if",
-        ]
+        """Load jailbreak detection patterns (shared with IntentClassifier)"""
+        return list(JAILBREAK_PATTERNS)
     
     def is_safe_message(self, message: str) -> bool:
         """
@@ -106,8 +99,7 @@ class SecurityFilter:
         Returns:
             bool: True if jailbreak attempt detected
         """
-        message_lower = message.lower()
-        return any(re.search(pattern, message_lower) for pattern in self.jailbreak_patterns)
+        return self.jailbreak_detector.is_jailbreak(message)
     
     def check_rate_limit(self, user_id: str) -> bool:
         """
@@ -121,6 +113,18 @@ class SecurityFilter:
         """
         return self.rate_limiter.is_allowed(user_id)
     
+    def rate_limit_gate(self, platform: str) -> RateLimitGate:
+        """
+        Front-of-pipeline rate limit check for one bot platform
+        
+        Args:
+            platform (str): Platform name used for counters and limiter keys
+            
+        Returns:
+            RateLimitGate: Gate sharing this filter's limiter, with the rejection reply pre-rendered
+        """
+        return RateLimitGate(platform, self.rate_limiter, self.get_violation_response('rate_limit'))
+    
     def get_violation_response(self, violation_type: str) -> str:
         """
         Get appropriate response for security violations
@@ -138,53 +142,3 @@ class SecurityFilter:
         }
         return responses.get(violation_type, "Vă rugăm să respectați regulile de utilizare.")
 
-
-class RateLimiter:
-    """
-    Simple rate limiting implementation
-    """
-    
-    def __init__(self):
-        """Initialize rate limiter"""
-        self.user_requests = {}
-        self.config = SECURITY['rate_limiting']
-    
-    def is_allowed(self, user_id: str) -> bool:
-        """
-        Check if user is within rate limits
-        
-        Args:
-            user_id (str): User identifier
-            
-        Returns:
-            bool: True if allowed
-        """
-        now = datetime.now()
-        
-        if user_id not in self.user_requests:
-            self.user_requests[user_id] = []
-        
-        # Clean old requests
-        self.user_requests[user_id] = [
-            req_time for req_time in self.user_requests[user_id]
-            if now - req_time < timedelta(hours=1)
-        ]
-        
-        # Check limits
-        minute_ago = now - timedelta(minutes=1)
-        recent_requests = [
-            req_time for req_time in self.user_requests[user_id]
-            if req_time > minute_ago
-        ]
-        
-        # Check minute limit
-        if len(recent_requests) >= self.config['max_requests_per_minute']:
-            return False
-            
-        # Check hour limit
-        if len(self.user_requests[user_id]) >= self.config['max_requests_per_hour']:
-            return False
-        
-        # Add current request
-        self.user_requests[user_id].append(now)
-        return True
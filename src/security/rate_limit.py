@@ -0,0 +1,325 @@
+"""
+Rate Limiting Module
+Sliding-window limits kept in memory for one process, or fixed-window
+counters in a shared SQLite file so limits hold across bot worker processes
+"""
+
+import os
+import sys
+import math
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+# Add config to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+
+from settings import SECURITY
+
+# (window seconds, max requests in the window)
+Limits = Sequence[Tuple[int, int]]
+
+
+def limits_from_config(config: Dict) -> List[Tuple[int, int]]:
+    """Minute and hour limits from SECURITY['rate_limiting']"""
+    return [(60, config['max_requests_per_minute']), (3600, config['max_requests_per_hour'])]
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for rate limit state
+
+    hit() records a request and returns True if every limit still allows it;
+    rejected requests are not counted. Backends must implement hit(); idle
+    eviction, stats and close are optional.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limits: Limits) -> bool:
+        """Record a request for the key if every (window, max) limit allows it"""
+
+    def evict_idle(self) -> int:
+        """Drop state for keys with no requests inside any window; returns how many were dropped"""
+        return 0
+
+    def stats(self) -> Dict:
+        return {}
+
+    def close(self):
+        pass
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-key sliding windows: one deque of monotonic timestamps per limit
+
+    A deque never holds more entries than its limit allows, and expired
+    entries are popped from the left, so each check is amortized O(1).
+    Idle keys are evicted every evict_interval seconds.
+    """
+
+    def __init__(self, evict_interval: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the backend
+
+        Args:
+            evict_interval: Seconds between idle-key sweeps
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.evict_interval = evict_interval
+        self._clock = clock
+        self._windows: Dict[str, Dict[int, Deque[float]]] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._max_window: Dict[str, int] = {}
+        self._next_eviction = clock() + evict_interval
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def hit(self, key: str, limits: Limits) -> bool:
+        now = self._clock()
+        with self._lock:
+            if now >= self._next_eviction:
+                self._evict(now)
+
+            windows = self._windows.get(key)
+            if windows is None:
+                windows = self._windows[key] = {}
+            self._max_window[key] = max(window for window, _ in limits)
+            self._last_seen[key] = now
+
+            for window, max_requests in limits:
+                timestamps = windows.get(window)
+                if timestamps is None:
+                    timestamps = windows[window] = deque()
+                cutoff = now - window
+                while timestamps and timestamps[0] <= cutoff:
+                    timestamps.popleft()
+                if len(timestamps) >= max_requests:
+                    return False
+
+            for window, _ in limits:
+                windows[window].append(now)
+            return True
+
+    def _evict(self, now: float) -> int:
+        idle = [key for key, seen in self._last_seen.items() if now - seen >= self._max_window[key]]
+        for key in idle:
+            del self._windows[key]
+            del self._last_seen[key]
+            del self._max_window[key]
+        self.evicted += len(idle)
+        self._next_eviction = now + self.evict_interval
+        return len(idle)
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            return self._evict(self._clock())
+
+    def stats(self) -> Dict:
+        return {'backend': 'memory', 'tracked_keys': len(self._windows), 'evicted': self.evicted}
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Fixed-window counters in a SQLite file shared by every worker process
+
+    Each (key, window) row holds the current window start and its count; a
+    check-and-increment runs in one IMMEDIATE transaction, so concurrent
+    processes cannot both take the last slot. Wall-clock time is used
+    because monotonic clocks are not comparable across processes.
+    """
+
+    def __init__(self, path: str, evict_interval: float = 300.0, clock: Callable[[], float] = time.time):
+        """
+        Open (or create) the shared store
+
+        Args:
+            path: SQLite database file
+            evict_interval: Seconds between sweeps of expired rows
+            clock: Wall-clock time source (injectable for tests)
+        """
+        self.path = path
+        self.evict_interval = evict_interval
+        self._clock = clock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " key TEXT NOT NULL, window INTEGER NOT NULL, start INTEGER NOT NULL, count INTEGER NOT NULL,"
+            " PRIMARY KEY (key, window))"
+        )
+        self._lock = threading.Lock()
+        self._next_eviction = clock() + evict_interval
+        self.evicted = 0
+
+    def hit(self, key: str, limits: Limits) -> bool:
+        now = self._clock()
+        with self._lock:
+            if now >= self._next_eviction:
+                self._evict(now)
+
+            starts = {window: int(math.floor(now / window) * window) for window, _ in limits}
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = dict(
+                    ((window, start), count) for window, start, count in self._conn.execute(
+                        "SELECT window, start, count FROM rate_limits WHERE key = ?", (key,)
+                    )
+                )
+                for window, max_requests in limits:
+                    if rows.get((window, starts[window]), 0) >= max_requests:
+                        self._conn.execute("COMMIT")
+                        return False
+
+                self._conn.executemany(
+                    "INSERT INTO rate_limits (key, window, start, count) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (key, window) DO UPDATE SET "
+                    " count = CASE WHEN start = excluded.start THEN count + 1 ELSE 1 END,"
+                    " start = excluded.start",
+                    [(key, window, starts[window]) for window, _ in limits]
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float) -> int:
+        deleted = self._conn.execute("DELETE FROM rate_limits WHERE start + window <= ?", (int(now),)).rowcount
+        self.evicted += deleted
+        self._next_eviction = now + self.evict_interval
+        return deleted
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            return self._evict(self._clock())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            keys = self._conn.execute("SELECT COUNT(DISTINCT key) FROM rate_limits").fetchone()[0]
+        return {'backend': 'sqlite', 'path': self.path, 'tracked_keys': keys, 'evicted': self.evicted}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend(config: Optional[Dict] = None) -> RateLimitBackend:
+    """
+    Build the backend selected in SECURITY['rate_limiting']
+
+    Args:
+        config: Rate limiting settings (defaults to SECURITY['rate_limiting'])
+
+    Returns:
+        RateLimitBackend: 'memory' (default) or 'sqlite'
+    """
+    config = config or SECURITY['rate_limiting']
+    backend = config.get('backend', 'memory')
+    evict_interval = config.get('evict_interval', 300.0)
+    if backend == 'sqlite':
+        return SQLiteRateLimitBackend(config.get('sqlite_path', './data/rate_limits.db'), evict_interval)
+    if backend != 'memory':
+        print(f"⚠️ Unknown rate limit backend '{backend}', using memory")
+    return InMemoryRateLimitBackend(evict_interval)
+
+
+class RateLimiter:
+    """
+    Per-user request limits (per minute and per hour)
+    """
+
+    def __init__(self, config: Optional[Dict] = None, backend: Optional[RateLimitBackend] = None):
+        """
+        Initialize rate limiter
+
+        Args:
+            config: Rate limiting settings (defaults to SECURITY['rate_limiting'])
+            backend: Storage backend (defaults to the one selected in config)
+        """
+        self.config = config or SECURITY['rate_limiting']
+        self.limits = limits_from_config(self.config)
+        self.backend = backend or create_backend(self.config)
+
+    def is_allowed(self, user_id: str) -> bool:
+        """
+        Check if user is within rate limits (and count the request if so)
+
+        Args:
+            user_id (str): User identifier
+
+        Returns:
+            bool: True if allowed
+        """
+        return self.backend.hit(str(user_id), self.limits)
+
+    def get_stats(self) -> Dict:
+        """Backend state"""
+        return self.backend.stats()
+
+
+class RateLimitGate:
+    """
+    Rate limit check at the front of one bot's message pipeline
+
+    Runs before security filtering and intent classification, so a rejected
+    message costs one backend hit and no LLM call. The rejection reply is
+    rendered once; admitted and rejected messages are counted per platform.
+    """
+
+    def __init__(self, platform: str, limiter: RateLimiter, rejection: str):
+        """
+        Initialize the gate
+
+        Args:
+            platform: Bot platform name ('telegram', 'instagram'); also scopes
+                the limiter keys so ids from different platforms never share a budget
+            limiter: Shared rate limiter
+            rejection: Reply sent to rejected messages
+        """
+        self.platform = platform
+        self.limiter = limiter
+        self.rejection = rejection
+        self._prefix = f"{platform}:"
+        # A shared backend (SQLite) does file I/O per hit; async callers should offload it
+        self.blocking = not isinstance(limiter.backend, InMemoryRateLimitBackend)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+
+    def admit(self, user_id: str) -> bool:
+        """
+        Count a message against the user's limits
+
+        Args:
+            user_id: Platform user identifier
+
+        Returns:
+            bool: True if the message may be processed, False if it should get self.rejection
+        """
+        allowed = self.limiter.is_allowed(self._prefix + str(user_id))
+        with self._lock:
+            if allowed:
+                self.admitted += 1
+            else:
+                self.rejected += 1
+        return allowed
+
+    def stats(self) -> Dict:
+        """Admitted/rejected counters for this platform"""
+        with self._lock:
+            admitted, rejected = self.admitted, self.rejected
+        total = admitted + rejected
+        return {
+            'platform': self.platform,
+            'admitted': admitted,
+            'rejected': rejected,
+            'rejected_rate': round(rejected / total, 3) if total else 0.0
+        }
@@ -0,0 +1,9 @@
+"""
+XOFlowers Utilities Module
+Small helpers shared by the search, intelligence, security and bot modules
+"""
+
+from .text import fold_text, fold_diacritics
+from .session_cache import SessionCache, memory_report
+
+__all__ = ['fold_text', 'fold_diacritics', 'SessionCache', 'memory_report']
@@ -0,0 +1,194 @@
+"""
+Bounded per-user session state
+LRU mapping with an idle TTL used for everything the bots keep per user, so
+long-running processes hold only recently active users
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+
+class SessionCache:
+    """
+    Thread-safe mapping that keeps at most max_users entries
+
+    Reads and writes move an entry to the most recently used end. Entries
+    idle for idle_ttl seconds, and the least recently used ones beyond
+    max_users, are evicted by evict(): automatically on insert (when over
+    capacity, and at most every idle_ttl / 10 seconds for idle entries), or
+    only when called if auto_evict is off (for owners that must persist a
+    user before dropping it). on_evict receives every evicted (key, value).
+    """
+
+    def __init__(self, name: str, max_users: int = 10000, idle_ttl: float = 7200.0,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+                 auto_evict: bool = True, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache
+
+        Args:
+            name: Label used in memory reports
+            max_users: Maximum number of entries (0 disables the bound)
+            idle_ttl: Seconds without access after which an entry is evicted (0 disables it)
+            on_evict: Called with (key, value) for every evicted entry
+            auto_evict: Evict on insert; otherwise only when evict() is called
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.name = name
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.auto_evict = auto_evict
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._sweep_interval = idle_ttl / 10 if idle_ttl else 0
+        self._next_sweep = clock() + self._sweep_interval
+        self.evicted = 0
+        self.peak = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._entries))
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            value, _ = self._entries[key]
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self[key]
+
+    def __setitem__(self, key: Hashable, value: Any):
+        with self._lock:
+            now = self._clock()
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            self.peak = max(self.peak, len(self._entries))
+            over = self.max_users and len(self._entries) > self.max_users
+            sweep = self._sweep_interval and now >= self._next_sweep
+        if self.auto_evict and (over or sweep):
+            self.evict()
+
+    def setdefault(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                return self[key]
+        self[key] = default
+        return default
+
+    def touch(self, key: Hashable) -> bool:
+        """Mark an entry as used; returns False if it is not cached"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self[key]
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def __delitem__(self, key: Hashable):
+        with self._lock:
+            del self._entries[key]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of (key, value) pairs, least recently used first (does not touch)"""
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self.items()]
+
+    def evict(self, can_evict: Optional[Callable[[Hashable], bool]] = None) -> List[Hashable]:
+        """
+        Evict idle entries, then least recently used ones down to max_users
+
+        Args:
+            can_evict: Entries for which this returns False are kept (e.g. unsaved users)
+
+        Returns:
+            List: Evicted keys
+        """
+        victims = []
+        with self._lock:
+            now = self._clock()
+            excess = len(self._entries) - self.max_users if self.max_users else 0
+            # Oldest first, so the scan can stop at the first fresh entry once the excess is covered
+            for key, (value, last_used) in list(self._entries.items()):
+                idle = self.idle_ttl and now - last_used >= self.idle_ttl
+                if not idle and len(victims) >= excess:
+                    break
+                if can_evict is not None and not can_evict(key):
+                    continue
+                del self._entries[key]
+                victims.append((key, value))
+            self.evicted += len(victims)
+            self._next_sweep = now + self._sweep_interval
+
+        if self.on_evict is not None:
+            for key, value in victims:
+                self.on_evict(key, value)
+        return [key for key, _ in victims]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, bound and eviction counters"""
+        return {
+            'name': self.name,
+            'entries': len(self._entries),
+            'max_users': self.max_users,
+            'idle_ttl': self.idle_ttl,
+            'peak': self.peak,
+            'evicted': self.evicted
+        }
+
+
+def memory_report(caches: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process memory and the size of each per-user cache
+
+    Args:
+        caches: Name -> SessionCache, a stats dict, or any object with __len__
+
+    Returns:
+        Dict: Peak RSS in MB (where the platform reports it) and per-cache stats
+    """
+    report: Dict[str, Any] = {}
+    if HAS_RESOURCE:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        report['max_rss_mb'] = round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    report['caches'] = {}
+    for name, cache in caches.items():
+        if isinstance(cache, SessionCache):
+            report['caches'][name] = cache.stats()
+        elif isinstance(cache, dict):
+            report['caches'][name] = cache
+        else:
+            report['caches'][name] = {'entries': len(cache)}
+    return report
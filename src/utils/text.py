@@ -0,0 +1,31 @@
+"""
+Text Normalization Helpers for XOFlowers AI Agent
+Diacritic folding used wherever user text is matched against keywords
+"""
+
+import unicodedata
+from functools import lru_cache
+
+
+def fold_diacritics(text: str) -> str:
+    """
+    Remove diacritics while keeping the base letters
+
+    "roșu", "roşu" and "rosu" all become "rosu"; "ă", "â", "î", "ț" fold to "a", "a", "i", "t".
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=4096)
+def fold_text(text: str) -> str:
+    """
+    Lowercase and fold diacritics
+
+    Args:
+        text: Any user or catalog text
+
+    Returns:
+        str: Text suitable for keyword matching
+    """
+    return fold_diacritics(text.lower())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test batched, incremental ingestion in ChromaDBPopulator
+"""
+
+import os
+import sys
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from pipeline.populate_db import ChromaDBPopulator
+
+
+class _FakeArray(list):
+    def tolist(self):
+        return list(self)
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(texts))
+        return _FakeArray([[0.1, 0.2] for _ in texts])
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.upserts = []
+        self.metadatas = {}
+
+    def get(self, include=None):
+        return {'ids': list(self.metadatas), 'metadatas': list(self.metadatas.values())}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        assert len(ids) == len(set(ids)) == len(embeddings) == len(documents) == len(metadatas)
+        self.upserts.append(ids)
+        self.metadatas.update(zip(ids, metadatas))
+
+    def update(self, ids, metadatas):
+        self.metadatas.update(zip(ids, metadatas))
+
+    def delete(self, ids):
+        for product_id in ids:
+            del self.metadatas[product_id]
+
+
+def _make_populator(batch_size):
+    populator = ChromaDBPopulator.__new__(ChromaDBPopulator)
+    populator.embedding_model = _FakeModel()
+    populator.collection = _FakeCollection()
+    populator.batch_size = batch_size
+    populator.processed_count = 0
+    populator.success_count = 0
+    populator.error_count = 0
+    populator.embedded_count = 0
+    populator.metadata_updated_count = 0
+    populator.unchanged_count = 0
+    populator.batch_times = []
+    populator.total_seconds = 0.0
+    populator.db_path = 'test'
+    populator.color_keywords = {'roșu': ['roșu', 'red']}
+    populator.setup_collection = lambda reset=False: True
+    return populator
+
+
+def test_populate_in_batches():
+    print("🧪 Testing batched population...")
+    products = [
+        {'id': f'p{i}', 'title': f'Buchet {i}', 'description': 'trandafiri red', 'price': 500 + i, 'category': 'Buchete'}
+        for i in range(10)
+    ]
+    products.append({'id': 'p3', 'title': 'Buchet 3 updated', 'description': '', 'price': 900, 'category': 'Buchete'})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'products.json')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+
+        populator = _make_populator(batch_size=4)
+        progress = []
+        populator._show_progress_stats = lambda current, total, report: progress.append((current, total))
+        assert populator.populate_database(input_file)
+
+    # Progress is reported after every batch; the duplicated p3 keeps its last version
+    assert populator.embedding_model.calls == [4, 4, 2]
+    assert progress == [(4, 10), (8, 10), (10, 10)]
+    assert len(populator.collection.upserts) == 3
+    assert populator.success_count == 10
+    assert populator.collection.metadatas['p3']['title'] == 'Buchet 3 updated'
+    throughput = populator.get_throughput()
+    assert throughput['batches'] == 3 and throughput['embedded'] == 10
+    print(f"✅ Throughput: {throughput}")
+
+
+def test_second_run_is_incremental():
+    print("🧪 Testing incremental re-population...")
+    products = [
+        {'id': f'p{i}', 'title': f'Buchet {i}', 'description': 'trandafiri', 'price': 600 + i, 'category': 'Buchete'}
+        for i in range(6)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'products.json')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+
+        populator = _make_populator(batch_size=4)
+        assert populator.populate_database(input_file)
+        collection = populator.collection
+
+        # Same price tier -> metadata only; new title -> re-embedded; p5 removed
+        products[0]['price'] = 700
+        products[1]['title'] = 'Buchet nou'
+        del products[5]
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+
+        populator = _make_populator(batch_size=4)
+        populator.collection = collection
+        assert populator.populate_database(input_file)
+
+    assert populator.embedding_model.calls == [1]
+    assert collection.metadatas['p0']['price'] == 700
+    assert 'p5' not in collection.metadatas
+
+    # Speed counts only the re-embedded product, over the batch time
+    throughput = populator.get_throughput()
+    assert (throughput['embedded'], throughput['metadata_updated'], throughput['unchanged']) == (1, 1, 3)
+    assert throughput['products_per_second'] == round(1 / sum(populator.batch_times), 1)
+    print("✅ Only the changed product was re-embedded")
+
+
+def test_noop_sync_reports_no_throughput():
+    print("🧪 Testing throughput of a sync with nothing to embed...")
+    products = [{'id': f'p{i}', 'title': f'Buchet {i}', 'price': 600, 'category': 'Buchete'} for i in range(5)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'products.json')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+
+        populator = _make_populator(batch_size=4)
+        assert populator.populate_database(input_file)
+        collection = populator.collection
+        populator = _make_populator(batch_size=4)
+        populator.collection = collection
+        assert populator.populate_database(input_file)
+
+    throughput = populator.get_throughput()
+    assert populator.success_count == 5 and throughput['unchanged'] == 5
+    assert throughput['embedded'] == 0 and throughput['products_per_second'] == 0.0
+    print("✅ Hash comparisons are not counted as ingestion")
+
+
+def test_add_single_product():
+    print("🧪 Testing add_product_to_db...")
+    populator = _make_populator(batch_size=4)
+    assert populator.add_product_to_db({'id': 'p1', 'title': 'Buchet', 'price': 800, 'category': 'Buchete'})
+    assert populator.collection.upserts == [['p1']] and populator.success_count == 1
+    print("✅ Single product upsert test passed")
+
+
+if __name__ == "__main__":
+    test_populate_in_batches()
+    test_second_run_is_incremental()
+    test_noop_sync_reports_no_throughput()
+    test_add_single_product()
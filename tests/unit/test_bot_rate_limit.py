@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test rate limiting at the front of the bot pipelines
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import threading
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from security.filters import SecurityFilter
+from security.rate_limit import RateLimiter, RateLimitGate, InMemoryRateLimitBackend, SQLiteRateLimitBackend
+
+TIGHT_LIMITS = {'max_requests_per_minute': 2, 'max_requests_per_hour': 100}
+
+
+def _tight_limiter():
+    return RateLimiter(TIGHT_LIMITS, backend=InMemoryRateLimitBackend())
+
+
+def test_gate_counts_admitted_and_rejected():
+    print("🧪 Testing gate counters...")
+    gate = RateLimitGate('telegram', _tight_limiter(), "slow down")
+
+    assert [gate.admit('42') for _ in range(4)] == [True, True, False, False]
+    assert gate.admit('43')
+
+    stats = gate.stats()
+    assert stats['platform'] == 'telegram'
+    assert stats['admitted'] == 3 and stats['rejected'] == 2
+    assert stats['rejected_rate'] == 0.4
+    print("✅ Gate counters test passed")
+
+
+def test_platforms_have_separate_budgets():
+    print("🧪 Testing per-platform limiter keys...")
+    limiter = _tight_limiter()
+    telegram = RateLimitGate('telegram', limiter, "")
+    instagram = RateLimitGate('instagram', limiter, "")
+
+    assert telegram.admit('7') and telegram.admit('7')
+    assert not telegram.admit('7')
+    # Same id on another platform is another user
+    assert instagram.admit('7')
+    print("✅ Per-platform keys test passed")
+
+
+def test_filter_prerenders_rejection():
+    print("🧪 Testing pre-rendered rejection text...")
+    security_filter = SecurityFilter()
+    gate = security_filter.rate_limit_gate('telegram')
+
+    assert gate.limiter is security_filter.rate_limiter
+    assert gate.rejection == security_filter.get_violation_response('rate_limit')
+    print("✅ Rejection text test passed")
+
+
+def test_instagram_rejects_before_classification():
+    print("🧪 Testing Instagram webhook under a burst...")
+    os.environ.setdefault('INSTAGRAM_PAGE_ACCESS_TOKEN', 'test-token')
+    os.environ.setdefault('INSTAGRAM_VERIFY_TOKEN', 'test-verify')
+    os.environ.setdefault('META_APP_SECRET', 'test-secret')
+    from api.container import AppContainer
+    from api.instagram_app import XOFlowersInstagramBot
+
+    with tempfile.TemporaryDirectory() as directory:
+        bot = XOFlowersInstagramBot(container=AppContainer(storage_path=directory))
+        bot.rate_gate = RateLimitGate('instagram', _tight_limiter(), bot.rate_gate.rejection)
+
+        sent, classified = [], []
+        bot._send_message = lambda recipient, text: sent.append(text)
+        bot.intent_classifier.classify_intent = lambda message: classified.append(message) or ('greeting', 0.9)
+        bot.action_handler.handle_action = lambda intent, message: "Bună!"
+
+        client = bot.app.test_client()
+        for _ in range(5):
+            payload = {'object': 'instagram', 'entry': [
+                {'messaging': [{'sender': {'id': 'spammer'}, 'message': {'text': 'salut'}}]}
+            ]}
+            assert client.post('/webhook', json=payload).status_code == 200
+
+        assert len(classified) == 2
+        assert sent[2:] == [bot.rate_gate.rejection] * 3
+
+        stats = client.get('/stats').get_json()['rate_limit']
+        assert stats['admitted'] == 2 and stats['rejected'] == 3
+        bot.container.close()
+    print("✅ Instagram burst test passed")
+
+
+def test_telegram_offloads_shared_backend():
+    print("🧪 Testing the Telegram gate with a SQLite backend...")
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'dummy_token_for_testing')
+    from api.container import AppContainer
+    from api.telegram_app import XOFlowersTelegramBot
+
+    with tempfile.TemporaryDirectory() as directory:
+        bot = XOFlowersTelegramBot(container=AppContainer(storage_path=directory))
+        backend = SQLiteRateLimitBackend(os.path.join(directory, "rate_limits.db"))
+        gate = RateLimitGate('telegram', RateLimiter(TIGHT_LIMITS, backend=backend), bot.rate_gate.rejection)
+        assert gate.blocking and not bot.rate_gate.blocking
+
+        # Every hit must run off the event loop thread
+        hit_threads = []
+        admit = gate.admit
+        gate.admit = lambda user_id: hit_threads.append(threading.current_thread()) or admit(user_id)
+        bot.rate_gate = gate
+        replies = []
+
+        async def reply_text(text, **kwargs):
+            replies.append(text)
+
+        async def burst():
+            for _ in range(4):
+                update = SimpleNamespace(
+                    effective_user=SimpleNamespace(id=42, first_name="Ana"), effective_chat=SimpleNamespace(id=42),
+                    message=SimpleNamespace(text="salut", reply_text=reply_text)
+                )
+                await bot.handle_message(update, None)
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(burst())
+        assert len(hit_threads) == 4 and loop_thread not in hit_threads
+        assert replies[2:] == [gate.rejection] * 2
+        # Rejected messages are not counted as conversation messages
+        assert bot.user_stats['42']['messages_count'] == 2
+        assert gate.stats()['rejected'] == 2
+        backend.close()
+        bot.container.close()
+    print("✅ Shared backend hits run in the worker pool")
+
+
+if __name__ == "__main__":
+    print("🚀 Running bot rate limit tests...\n")
+    test_gate_counts_admitted_and_rejected()
+    test_platforms_have_separate_budgets()
+    test_filter_prerenders_rejection()
+    test_instagram_rejects_before_classification()
+    test_telegram_offloads_shared_backend()
+    print("\n🎉 All bot rate limit tests passed!")
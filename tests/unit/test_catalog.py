@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the columnar product catalog shared by the search engines
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.catalog import ProductCatalog, get_catalog
+
+
+def _row(product_id, text, category, price, exists='True', verified='False'):
+    return {'chunk_id': product_id, 'chunk_type': 'product', 'primary_text': text,
+            'category': category, 'price': price, 'flower_type': 'Trandafiri',
+            'url': f'https://xoflowers.md/{product_id}', 'url_fixed': '',
+            'is_verified': verified, 'url_functional': 'True', 'product_exists': exists}
+
+
+def _catalog():
+    return ProductCatalog([
+        _row('p1', 'Red Roses - buchet de trandafiri roșu', 'French Roses', '950.0', verified='True'),
+        _row('p2', 'Peony Box - bujori roz în cutie', 'Peonies', '2200.0'),
+        _row('p3', 'Pink Peonies - bujori', 'Peonies', '1500.0'),
+        _row('p4', 'Old Vase - vază', 'Additional Accessories / Vases', '300.0', exists='False'),
+        _row('p5', 'No price', 'Peonies', ''),
+    ])
+
+
+def test_records_behave_like_dicts():
+    print("🧪 Testing catalog records...")
+    catalog = _catalog()
+    record = catalog.get('p1')
+    assert record['name'] == 'Red Roses'
+    assert record['price'] == '950' and record.price_value == 950.0
+    assert record['is_verified'] == 'True'
+    assert 'trandafir' in record['keywords'] and 'roșu' in record['keywords']
+    assert record.get('missing', 'x') == 'x'
+
+    copy = record.copy()
+    copy['relevance_score'] = 10
+    assert copy['id'] == 'p1' and 'relevance_score' not in record
+    assert catalog.get('nope') is None
+    print("✅ Lookup by id and dict access work")
+
+
+def test_aggregates():
+    print("🧪 Testing precomputed aggregates...")
+    catalog = _catalog()
+    assert [r['id'] for r in catalog.valid_records()] == ['p1', 'p2', 'p3']
+    assert catalog.categories() == ['French Roses', 'Peonies']
+    assert 'Additional Accessories / Vases' in catalog.categories(valid_only=False)
+
+    peonies = catalog.category_stats()['Peonies']
+    assert peonies == {'count': 2, 'min_price': 1500.0, 'max_price': 2200.0, 'avg_price': 1850.0}
+    assert [r['id'] for r in catalog.by_category('Peonies')] == ['p2', 'p3']
+
+    summary = catalog.summary()
+    assert summary['total_products'] == 3 and summary['verified_products'] == 1
+    assert (summary['price_min'], summary['price_max']) == (950.0, 2200.0)
+    print(f"✅ Summary: {summary}")
+
+
+def test_shared_catalog_loads_once():
+    print("🧪 Testing shared catalog...")
+    catalog = get_catalog()
+    assert get_catalog() is catalog
+    assert len(catalog.valid_records()) > 0
+    print(f"✅ {len(catalog)} products loaded from {os.path.basename(catalog.source)}")
+
+
+def test_search_engine_returns_plain_dicts():
+    print("🧪 Testing ProductSearchEngine public results...")
+    import json
+    from intelligence.product_search import ProductSearchEngine
+    engine = ProductSearchEngine()
+
+    assert sum(len(products) for products in engine.categories.values()) == len(engine.products)
+    category = next(iter(engine.categories))
+    results = (engine.get_popular_products(3) + engine.get_products_by_category(category, 3)
+               + engine.get_budget_recommendations(100000))
+    results.append(engine.get_product_by_id(engine.products[0]['id']))
+    for product in results:
+        assert type(product) is dict
+        product['relevance_score'] = 1
+    json.dumps(results)
+    print("✅ Plain dict results test passed")
+
+
+if __name__ == "__main__":
+    test_records_behave_like_dicts()
+    test_aggregates()
+    test_shared_catalog_loads_once()
+    test_search_engine_returns_plain_dicts()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test incremental catalog sync against an in-memory collection
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.catalog_sync import CatalogSync, CONTENT_HASH_KEY, METADATA_HASH_KEY
+
+
+class _MemoryCollection:
+    """Implements the subset of the ChromaDB collection API used by CatalogSync"""
+
+    def __init__(self):
+        self.rows = {}
+        self.calls = []
+
+    def get(self, ids=None, include=None):
+        ids = [i for i in (ids or self.rows) if i in self.rows]
+        return {'ids': ids,
+                'embeddings': [self.rows[i]['embedding'] for i in ids],
+                'metadatas': [self.rows[i]['metadata'] for i in ids]}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.calls.append(('upsert', list(ids)))
+        for product_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.rows[product_id] = {'embedding': embedding, 'document': document, 'metadata': metadata}
+
+    def update(self, ids, metadatas):
+        self.calls.append(('update', list(ids)))
+        for product_id, metadata in zip(ids, metadatas):
+            self.rows[product_id]['metadata'] = metadata
+
+    def delete(self, ids):
+        self.calls.append(('delete', list(ids)))
+        for product_id in ids:
+            del self.rows[product_id]
+
+
+class _CountingEmbedder:
+    def __init__(self):
+        self.embedded = []
+
+    def __call__(self, documents):
+        self.embedded.extend(documents)
+        return [[float(len(document))] for document in documents]
+
+
+def _catalog(prices):
+    return [(f'p{i}', f'Buchet {i} trandafiri', {'name': f'Buchet {i}', 'price': price})
+            for i, price in enumerate(prices)]
+
+
+def test_initial_sync_embeds_everything():
+    print("🧪 Testing initial sync...")
+    collection, embed = _MemoryCollection(), _CountingEmbedder()
+    report = CatalogSync(collection, embed, batch_size=2).sync(_catalog([100, 200, 300]))
+
+    assert report.added == 3 and report.embedded == 3
+    assert len(report.batch_times) == 2
+    assert len(embed.embedded) == 3
+    assert all(CONTENT_HASH_KEY in row['metadata'] and METADATA_HASH_KEY in row['metadata']
+               for row in collection.rows.values())
+    print(f"✅ {report.summary()}")
+
+
+def test_unchanged_catalog_is_a_no_op():
+    print("🧪 Testing repeated sync...")
+    collection = _MemoryCollection()
+    CatalogSync(collection, _CountingEmbedder()).sync(_catalog([100, 200]))
+    collection.calls.clear()
+
+    embed = _CountingEmbedder()
+    report = CatalogSync(collection, embed).sync(_catalog([100, 200]))
+    assert report.unchanged == 2
+    assert embed.embedded == [] and collection.calls == []
+    print("✅ Nothing re-embedded or written")
+
+
+def test_price_change_updates_metadata_only():
+    print("🧪 Testing metadata-only change...")
+    collection = _MemoryCollection()
+    CatalogSync(collection, _CountingEmbedder()).sync(_catalog([100, 200]))
+    vector_before = collection.rows['p1']['embedding']
+
+    embed = _CountingEmbedder()
+    report = CatalogSync(collection, embed).sync(_catalog([100, 250]))
+    assert report.metadata_updated == 1 and report.embedded == 0
+    assert embed.embedded == []
+    assert collection.rows['p1']['metadata']['price'] == 250
+    assert collection.rows['p1']['embedding'] is vector_before
+    print("✅ Price updated without re-embedding")
+
+
+def test_changed_new_and_removed_products():
+    print("🧪 Testing text change, addition and removal...")
+    collection = _MemoryCollection()
+    CatalogSync(collection, _CountingEmbedder()).sync(_catalog([100, 200, 300]))
+    collection.calls.clear()
+
+    records = _catalog([100, 200])
+    records[0] = ('p0', 'Buchet 0 bujori', records[0][2])
+    records.append(('p9', 'Cutie cu flori', {'name': 'Cutie', 'price': 900}))
+
+    embed = _CountingEmbedder()
+    report = CatalogSync(collection, embed).sync(records)
+    assert (report.added, report.reembedded, report.deleted, report.unchanged) == (1, 1, 1, 1)
+    assert sorted(embed.embedded) == ['Buchet 0 bujori', 'Cutie cu flori']
+    assert set(collection.rows) == {'p0', 'p1', 'p9'}
+    # Deletions come last so the collection is never emptied mid-sync
+    assert collection.calls[-1] == ('delete', ['p2'])
+    print(f"✅ {report.summary()}")
+
+
+def test_new_version_reuses_vectors_from_source():
+    print("🧪 Testing vector reuse from the live collection...")
+    live = _MemoryCollection()
+    CatalogSync(live, _CountingEmbedder()).sync(_catalog([100, 200, 300]))
+
+    records = _catalog([100, 250, 300])
+    records[2] = ('p2', 'Buchet 2 lalele', records[2][2])
+
+    embed = _CountingEmbedder()
+    staged = _MemoryCollection()
+    report = CatalogSync(staged, embed, source=live).sync(records)
+    assert report.added == 1 and report.reused == 2 and report.embedded == 1
+    assert embed.embedded == ['Buchet 2 lalele']
+    assert staged.rows['p1']['metadata']['price'] == 250
+    print(f"✅ {report.summary()}")
+
+
+if __name__ == "__main__":
+    test_initial_sync_embeds_everything()
+    test_unchanged_catalog_is_a_no_op()
+    test_price_change_updates_metadata_only()
+    test_changed_new_and_removed_products()
+    test_new_version_reuses_vectors_from_source()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test versioned collection aliases used for blue/green reindexing
+"""
+
+import os
+import sys
+import json
+import tempfile
+from concurrent.futures import Future
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.collection_aliases import CollectionAliases, versioned_name
+
+
+class _FakeArray(list):
+    def tolist(self):
+        return list(self)
+
+
+class _FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, show_progress_bar=False):
+        self.encoded.extend(texts)
+        return _FakeArray([[float(len(text)), 1.0, 0.5] for text in texts])
+
+
+def _product(product_id, text, price=500.0):
+    return {'id': product_id, 'search_text': text, 'name': text, 'price': price, 'category': 'Premium',
+            'flowers': '', 'url': '', 'collection_id': '', 'is_verified': 'True',
+            'url_functional': 'True', 'product_exists': 'True', 'is_flower': 'True'}
+
+
+def test_versioned_names():
+    print("🧪 Testing versioned names...")
+    assert versioned_name('all_products', 0) == 'all_products'
+    assert versioned_name('all_products', 3) == 'all_products__v3'
+    print("✅ Version 0 maps to the legacy collection")
+
+
+def test_promote_and_rollback():
+    print("🧪 Testing promote and rollback...")
+    with tempfile.TemporaryDirectory() as tmp:
+        aliases = CollectionAliases(tmp)
+        assert aliases.resolve('all_products') == 'all_products'
+        assert aliases.next_version('all_products') == 1
+
+        aliases.promote({'all_products': 1, 'flowers_only': 1})
+        aliases.promote({'all_products': 2})
+        assert aliases.resolve('all_products') == 'all_products__v2'
+        assert aliases.previous('all_products') == 1
+        assert aliases.resolve('flowers_only') == 'flowers_only__v1'
+
+        assert aliases.rollback(['all_products', 'flowers_only']) == {'all_products': 1, 'flowers_only': 0}
+        assert aliases.resolve('all_products') == 'all_products__v1'
+        # A rolled-back version number is never reused for the next build
+        assert aliases.next_version('all_products') == 3
+
+        # Another process sees the pointers after reload
+        other = CollectionAliases(tmp)
+        assert other.resolve('all_products') == 'all_products__v1'
+        assert not other.reload()
+        aliases.promote({'all_products': 3})
+        assert other.reload()
+        assert other.resolve('all_products') == 'all_products__v3'
+    print("✅ Aliases promote atomically and roll back")
+
+
+def test_reader_leases():
+    print("🧪 Testing reader leases...")
+    with tempfile.TemporaryDirectory() as tmp:
+        aliases = CollectionAliases(tmp)
+        aliases.register_reader({'all_products': 2})
+        # A lease left by a process that has exited is ignored and cleaned up
+        with open(os.path.join(aliases.readers_path, '999999999.json'), 'w') as f:
+            json.dump({'all_products': 1}, f)
+
+        assert aliases.versions_in_use() == {'all_products': {2}}
+        assert os.listdir(aliases.readers_path) == [f"{os.getpid()}.json"]
+        aliases.unregister_reader()
+        assert aliases.versions_in_use() == {}
+    print("✅ Reader leases test passed")
+
+
+def test_background_rebuild_and_refresh():
+    print("🧪 Testing background rebuilds with ChromaDB...")
+    try:
+        import chromadb  # noqa: F401
+    except ImportError:
+        print("⚠️ chromadb is not installed, skipping")
+        return
+    from database.vector_search import UniversalXOFlowersSearch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        builder = UniversalXOFlowersSearch(db_path=tmp, model_name='test-model')
+        reader = UniversalXOFlowersSearch(db_path=tmp, model_name='test-model')
+        builder._model = reader._model = _FakeModel()
+
+        products = [_product('p1', 'trandafiri roșii'), _product('p2', 'bujori roz')]
+        future = builder.rebuild_collections({'all_products': products, 'flowers_only': products})
+        assert isinstance(future, Future)
+        assert future.result() == {'all_products': 1, 'flowers_only': 1}
+
+        # A direct search on another instance picks up the promoted version
+        assert reader.all_products_collection.name == 'all_products'
+        assert [p['id'] for p in reader.search_all_products("trandafiri", limit=1)] == ['p2']
+        assert reader.all_products_collection.name == 'all_products__v1'
+        assert reader.flowers_collection.name == 'flowers_only__v1'
+
+        # Unchanged documents reuse the vectors of the live version
+        builder._model.encoded.clear()
+        products.append(_product('p3', 'lalele albe'))
+        builder.rebuild_collections({'all_products': products}).result()
+        assert builder._model.encoded == ['lalele albe']
+
+        # Version 1 is neither current nor previous, but a running process is still bound to it
+        lease = os.path.join(tmp, 'collection_readers', f"{os.getppid()}.json")
+        with open(lease, 'w') as f:
+            json.dump({'all_products': 1}, f)
+        builder.rebuild_collections({'all_products': products}).result()
+        names = {collection.name for collection in builder.client.list_collections()}
+        assert {'all_products__v1', 'all_products__v2', 'all_products__v3'} <= names
+
+        os.remove(lease)
+        builder._drop_stale_versions()
+        names = {collection.name for collection in builder.client.list_collections()}
+        assert 'all_products__v1' not in names and 'all_products__v2' in names
+    print("✅ Background rebuild test passed")
+
+
+if __name__ == "__main__":
+    test_versioned_names()
+    test_promote_and_rollback()
+    test_reader_leases()
+    test_background_rebuild_and_refresh()
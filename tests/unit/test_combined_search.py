@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test that combined search embeds the query once and merges both collections without duplicates
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.vector_search import UniversalXOFlowersSearch, BoundCollections
+from database.embedding_cache import QueryEmbeddingCache
+from database.collection_aliases import CollectionAliases
+
+
+class _FakeArray(list):
+    def tolist(self):
+        return list(self)
+
+
+class _FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, show_progress_bar=False):
+        self.encoded.extend(texts)
+        return _FakeArray([[1.0, 0.0] for _ in texts])
+
+
+class _FakeCollection:
+    def __init__(self, products):
+        self.products = products
+        self.queries = []
+
+    def query(self, query_embeddings, n_results, where=None):
+        self.queries.append(query_embeddings)
+        rows = self.products[:n_results]
+        return {
+            'ids': [[p[0] for p in rows]],
+            'documents': [[p[0] for p in rows]],
+            'distances': [[p[1] for p in rows]],
+            'metadatas': [[{'name': p[0], 'price': 500.0, 'category': 'Premium',
+                            'flowers': '', 'url': ''} for p in rows]]
+        }
+
+
+def _make_search(flowers, products, directory):
+    search = UniversalXOFlowersSearch.__new__(UniversalXOFlowersSearch)
+    search.aliases = CollectionAliases(directory)
+    search.model_name = 'test-model'
+    search._model = _FakeModel()
+    search.query_cache = QueryEmbeddingCache('test-model')
+    search._query_executor = ThreadPoolExecutor(max_workers=2)
+    search._bound = BoundCollections(flowers=_FakeCollection(flowers), all_products=_FakeCollection(products))
+    search.flower_categories = {'Premium'}
+    return search
+
+
+def test_combined_search_embeds_once_and_dedupes():
+    print("🧪 Testing combined search...")
+    flowers = [('rose_box', 0.1), ('peony_bouquet', 0.2)]
+    products = [('rose_box', 0.1), ('peony_bouquet', 0.2), ('teddy_bear', 0.3), ('chocolate', 0.4), ('card', 0.5)]
+    with tempfile.TemporaryDirectory() as directory:
+        search = _make_search(flowers, products, directory)
+        results = search.combined_search("cadou frumos", limit=5)
+    ids = [product['id'] for product in results]
+
+    assert search._model.encoded == ["cadou frumos"]
+    assert search.flowers_collection.queries[0] == search.all_products_collection.queries[0]
+    assert len(ids) == len(set(ids))
+    assert ids == ['rose_box', 'peony_bouquet', 'teddy_bear', 'chocolate', 'card']
+    print(f"✅ Results: {ids}")
+
+
+if __name__ == "__main__":
+    test_combined_search_embeds_once_and_dedupes()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the shared application container
+"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from api.container import AppContainer
+from intelligence.action_handler import ActionHandler
+from intelligence.context_store import LogFileStore
+from intelligence.intent_classifier import IntentClassifier
+
+
+def test_one_context_for_every_component():
+    print("🧪 Testing that components share one conversation context...")
+    with tempfile.TemporaryDirectory() as directory:
+        container = AppContainer(storage_path=directory)
+        handler = container.action_handler
+
+        assert handler.context_manager is container.context_manager
+        assert handler.intent_classifier is container.intent_classifier
+        assert container.intent_classifier.context_manager is container.context_manager
+        assert handler.product_search is container.product_search
+        assert container.action_handler is handler
+
+        # A turn recorded by the handler is the classifier's context
+        handler.context_manager.add_turn("1", "salut", "Bună!", "greeting")
+        assert "salut" in container.intent_classifier.context_manager.get_context_string("1")
+        assert sorted(container.get_stats()['components']) == [
+            'action_handler', 'context_manager', 'intent_classifier', 'product_search'
+        ]
+        container.close()
+    print("✅ Shared context test passed")
+
+
+def test_injected_components():
+    print("🧪 Testing injected components...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = LogFileStore(directory)
+        container = AppContainer(context_store=store)
+        assert container.context_manager.store is store
+
+        classifier = IntentClassifier(context_manager=container.context_manager)
+        container = AppContainer(intent_classifier=classifier, context_manager=container.context_manager)
+        assert container.action_handler.intent_classifier is classifier
+        container.close()
+
+        try:
+            AppContainer(search_engine=object())
+            assert False, "unknown component accepted"
+        except ValueError:
+            pass
+    print("✅ Injection test passed")
+
+
+def test_handler_adds_its_keyword_groups():
+    print("🧪 Testing ActionHandler with a plain classifier...")
+    with tempfile.TemporaryDirectory() as directory:
+        container = AppContainer(storage_path=directory)
+        classifier = IntentClassifier(context_manager=container.context_manager)
+        assert not classifier.keyword_matcher.has_group('occasion')
+
+        handler = ActionHandler(intent_classifier=classifier, product_search=container.product_search)
+        assert handler.context_manager is classifier.context_manager
+        assert handler.keyword_matcher.first_label("flori pentru nuntă", 'occasion', ['wedding']) == 'wedding'
+        # Intent scores are unaffected by the extra groups
+        assert classifier._get_keyword_scores("salut")['greeting'] > 0
+        container.close()
+    print("✅ Keyword groups test passed")
+
+
+if __name__ == "__main__":
+    print("🚀 Running container tests...\n")
+    test_one_context_for_every_component()
+    test_injected_components()
+    test_handler_adds_its_keyword_groups()
+    print("\n🎉 All container tests passed!")
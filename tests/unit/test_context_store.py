@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Test write-behind persistence of conversation contexts and profiles
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import tracemalloc
+import multiprocessing
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from intelligence.conversation_context import ConversationContext, get_conversation_context
+from intelligence.context_store import (
+    ContextStore, JsonFileStore, LogFileStore, SQLiteContextStore, create_context_store
+)
+
+
+class _RecordingStore(ContextStore):
+    def __init__(self):
+        self.writes = []
+
+    def load_user(self, user_id):
+        return [], None
+
+    def write(self, contexts, profiles, turns):
+        self.writes.append((contexts, profiles, turns))
+
+
+def test_add_turn_does_not_write():
+    print("🧪 Testing that turns are buffered until a flush...")
+    store = _RecordingStore()
+    context = ConversationContext(store=store, flush_interval=3600)
+    for index in range(50):
+        context.add_turn(f"user-{index % 5}", "salut", "Bună!", "greeting")
+
+    assert store.writes == []
+    assert context.get_storage_stats()['pending_turns'] == 50
+
+    assert context.flush() == 5
+    contexts, profiles, turns = store.writes[0]
+    assert sorted(contexts) == sorted(profiles) == [f"user-{index}" for index in range(5)]
+    assert len(turns) == 50 and len(contexts['user-0']) == 10
+    assert profiles['user-0']['conversation_count'] == 10
+
+    # Nothing changed since: no write
+    assert context.flush() == 0 and len(store.writes) == 1
+
+    context.add_turn("user-3", "pa", "La revedere!", "farewell")
+    context.flush()
+    contexts, profiles, turns = store.writes[1]
+    assert list(contexts) == ["user-3"] and list(profiles) == ["user-3"] and len(turns) == 1
+    context.close()
+    print("✅ Buffered writes test passed")
+
+
+def test_json_round_trip_and_atomic_files():
+    print("🧪 Testing JSON files after flush and reload...")
+    with tempfile.TemporaryDirectory() as directory:
+        context = ConversationContext(store=JsonFileStore(directory), flush_interval=3600)
+        context.add_turn("42", "vreau trandafiri roșu", "Avem!", "find_product", 0.9)
+        context.update_user_preferences("42", {"budget": "500"})
+        assert not os.path.exists(os.path.join(directory, "contexts.json"))
+
+        context.close()
+        assert sorted(os.listdir(directory)) == ["contexts.json", "profiles.json"]
+        with open(os.path.join(directory, "contexts.json"), encoding='utf-8') as f:
+            assert json.load(f)["42"][0]["intent"] == "find_product"
+
+        reloaded = ConversationContext(store=JsonFileStore(directory), flush_interval=0)
+        profile = reloaded.get_user_profile("42")
+        assert profile.conversation_count == 1
+        assert profile.preferences["budget"] == "500"
+        assert "trandafir" in profile.favorite_products
+        assert reloaded.get_context("42")[0].confidence == 0.9
+        reloaded.close()
+    print("✅ JSON round trip test passed")
+
+
+def test_background_flusher():
+    print("🧪 Testing the background flusher...")
+    store = _RecordingStore()
+    context = ConversationContext(store=store, flush_interval=0.05)
+    context.add_turn("7", "salut", "Bună!", "greeting")
+
+    deadline = time.time() + 2
+    while not store.writes and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.writes and list(store.writes[0][0]) == ["7"]
+    context.close()
+    print("✅ Background flusher test passed")
+
+
+def test_write_through_when_interval_is_zero():
+    print("🧪 Testing flush_interval=0...")
+    store = _RecordingStore()
+    context = ConversationContext(store=store, flush_interval=0)
+    context.add_turn("7", "salut", "Bună!", "greeting")
+    assert len(store.writes) == 1
+    context.close()
+    print("✅ Write-through test passed")
+
+
+def test_json_store_rewrites_only_changed_file():
+    print("🧪 Testing JsonFileStore writes...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = JsonFileStore(directory)
+        store.write({}, {"1": {"user_id": "1"}}, [])
+        assert os.listdir(directory) == ["profiles.json"]
+        assert store.stats()['writes'] == 1
+    print("✅ JsonFileStore test passed")
+
+
+def test_json_store_serializes_only_changed_users():
+    print("🧪 Testing that JsonFileStore re-encodes only changed users...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = JsonFileStore(directory)
+        store.write({f"user-{index}": [_turn(f"user-{index}", 1)] for index in range(100)},
+                    {f"user-{index}": {"user_id": f"user-{index}", "name": "Ană"} for index in range(100)}, [])
+        assert store.stats()['serialized'] == 200
+
+        store.write({"user-7": [_turn("user-7", 1), _turn("user-7", 0, "farewell")]}, {}, [])
+        assert store.stats()['serialized'] == 201
+
+        with open(os.path.join(directory, "contexts.json"), encoding='utf-8') as f:
+            contexts = json.load(f)
+        assert len(contexts) == 100 and [turn['intent'] for turn in contexts["user-7"]] == ["greeting", "farewell"]
+
+        reopened = JsonFileStore(directory)
+        turns, profile = reopened.load_user("user-7")
+        assert len(turns) == 2 and profile["name"] == "Ană"
+        assert reopened.load_user("nobody") == ([], None)
+        assert len(reopened.load_profiles()) == 100
+    print("✅ Unchanged users are spliced in from their cached JSON")
+
+
+def _turn(user_id, minutes_ago, intent="greeting"):
+    return {
+        'user_message': "salut", 'bot_response': "Bună!", 'intent': intent,
+        'timestamp': (datetime.now() - timedelta(minutes=minutes_ago)).isoformat(),
+        'user_id': user_id, 'confidence': 0.5, 'metadata': {}
+    }
+
+
+def test_log_store_appends_and_loads_live_turns():
+    print("🧪 Testing the append-only log store...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = LogFileStore(directory)
+        store.write({}, {"1": {"user_id": "1", "conversation_count": 1}}, [_turn("1", 300), _turn("1", 5)])
+        store.write({}, {"1": {"user_id": "1", "conversation_count": 2}}, [_turn("2", 1, "farewell")])
+        store.close()
+
+        with open(os.path.join(directory, "contexts.jsonl"), encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 3 and lines[0].startswith('{"timestamp":"')
+
+        # A crash mid-append leaves a torn last line
+        with open(os.path.join(directory, "contexts.jsonl"), 'a', encoding='utf-8') as f:
+            f.write('{"timestamp":"9999')
+
+        reloaded = LogFileStore(directory)
+        contexts = reloaded.load_contexts()
+        assert len(contexts["1"]) == 1 and contexts["2"][0]['intent'] == "farewell"
+        assert reloaded.load_profiles()["1"]['conversation_count'] == 2
+        assert reloaded.stats()['skipped_on_load'] == 2
+        reloaded.close()
+    print("✅ Log store test passed")
+
+
+def test_log_store_compaction():
+    print("🧪 Testing log compaction...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = LogFileStore(directory, max_turns=3, compact_min_records=10)
+        for index in range(12):
+            store.write({}, {"1": {"user_id": "1", "conversation_count": index}}, [_turn("1", 12 - index)])
+        stats = store.stats()
+        assert stats['compactions'] >= 2
+        assert stats['log_records'] < 10 and stats['profile_records'] < 10
+
+        store.write({}, {}, [_turn("1", 0, "farewell")])
+        store.close()
+        reloaded = LogFileStore(directory, max_turns=3)
+        turns = reloaded.load_contexts()["1"]
+        assert len(turns) == 3 and turns[-1]['intent'] == "farewell"
+        assert reloaded.load_profiles()["1"]['conversation_count'] == 11
+        reloaded.close()
+    print("✅ Compaction test passed")
+
+
+def test_log_store_migrates_json_files():
+    print("🧪 Testing migration from contexts.json...")
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = JsonFileStore(directory)
+        legacy.write({"1": [_turn("1", 600)], "2": [_turn("2", 10)]}, {"1": {"user_id": "1"}}, [])
+
+        store = create_context_store(directory, {'backend': 'log'})
+        assert isinstance(store, LogFileStore)
+        assert list(store.load_contexts()) == ["2"]
+        assert list(store.load_profiles()) == ["1"]
+        store.close()
+        assert os.path.exists(os.path.join(directory, "contexts.json"))
+    print("✅ Migration test passed")
+
+
+def test_sqlite_store_loads_users_lazily():
+    print("🧪 Testing the SQLite store...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = create_context_store(directory, {'backend': 'sqlite'}, max_turns=2)
+        assert isinstance(store, SQLiteContextStore)
+        store.write({}, {"1": {"user_id": "1", "conversation_count": 3}},
+                    [_turn("1", 300), _turn("1", 3), _turn("1", 2), _turn("1", 1, "farewell")])
+        store.write({}, {"1": {"user_id": "1", "conversation_count": 4}}, [])
+
+        turns, profile = store.load_user("1")
+        assert [turn['intent'] for turn in turns] == ["greeting", "farewell"]
+        assert profile['conversation_count'] == 4
+        assert store.load_user("2") == ([], None)
+        assert store.stats()['pruned'] == 1  # Expired turn deleted by the first write
+        store.close()
+
+        # ConversationContext pulls users in on first access
+        context = ConversationContext(store=SQLiteContextStore(os.path.join(directory, "conversations.db")),
+                                      flush_interval=0)
+        assert context.contexts == {} and context.user_profiles == {}
+        assert context.get_user_profile("1").conversation_count == 4
+        assert list(context.contexts) == ["1"]
+        context.add_turn("1", "mersi", "Cu plăcere!", "farewell")
+        assert context.get_user_profile("1").conversation_count == 5
+        context.close()
+    print("✅ SQLite store test passed")
+
+
+def test_idle_users_are_evicted_and_reloaded():
+    print("🧪 Testing eviction of cold users to the store...")
+    with tempfile.TemporaryDirectory() as directory:
+        context = ConversationContext(store=LogFileStore(directory), flush_interval=3600)
+        context.sessions.max_users = 2
+        for user_id in ("1", "2", "3"):
+            context.add_turn(user_id, "vreau bujori", "Avem!", "find_product")
+        assert len(context.sessions) == 3  # Unsaved users stay in memory
+
+        context.flush()
+        assert sorted(context.contexts) == sorted(context.user_profiles) == ["2", "3"]
+        assert context.get_storage_stats()['sessions']['evicted'] == 1
+
+        # Reloaded from the store on the next access
+        assert context.get_user_profile("1").conversation_count == 1
+        assert context.get_context("1")[0].user_message == "vreau bujori"
+        context.add_turn("1", "mersi", "Cu plăcere!", "farewell")
+        context.flush()
+        assert "1" in context.contexts and "2" not in context.contexts
+        assert context.get_user_profile("1").conversation_count == 2
+        context.close()
+    print("✅ Eviction test passed")
+
+
+def test_file_stores_keep_only_offsets_of_evicted_users():
+    print("🧪 Testing that file stores do not keep evicted users in memory...")
+    for make_store in (LogFileStore, JsonFileStore):
+        with tempfile.TemporaryDirectory() as directory:
+            tracemalloc.start()
+            context = ConversationContext(store=make_store(directory), flush_interval=3600)
+            context.sessions.max_users = 10
+            base = tracemalloc.get_traced_memory()[0]
+            for index in range(500):
+                context.add_turn(f"user-{index}", "vreau un buchet de trandafiri " * 20 + str(index),
+                                 "Avem! " * 50, "find_product")
+                if index % 50 == 49:
+                    context.flush()
+            context.flush()
+            grown = tracemalloc.get_traced_memory()[0] - base
+            tracemalloc.stop()
+
+            # Holding every record took 1.3 MiB (log) and 0.8 MiB (JSON); offsets take ~200 KiB
+            assert len(context.contexts) == 10
+            assert grown < 400 * 1024, f"{make_store.__name__} grew {grown // 1024} KiB"
+            assert context.store.stats()['users'] == 500
+            assert context.get_context("user-3")[0].user_message.endswith(" 3")
+            assert context.get_user_profile("user-3").conversation_count == 1
+            context.close()
+    print("✅ File stores keep only offsets")
+
+
+class _SlowStore(_RecordingStore):
+    def __init__(self):
+        super().__init__()
+        self.loading = threading.Event()
+        self.release = threading.Event()
+
+    def load_user(self, user_id):
+        if user_id == "slow":
+            self.loading.set()
+            self.release.wait(5)
+        return [], None
+
+
+def test_loading_a_user_does_not_block_others():
+    print("🧪 Testing that a slow store load does not hold the context lock...")
+    store = _SlowStore()
+    context = ConversationContext(store=store, flush_interval=3600)
+    context.add_turn("fast", "salut", "Bună!", "greeting")
+    loader = threading.Thread(target=context.get_context, args=("slow",))
+    loader.start()
+    assert store.loading.wait(5)
+
+    # The load is in progress; other users are served meanwhile
+    done = threading.Event()
+    threading.Thread(target=lambda: (context.add_turn("fast", "mersi", "Cu plăcere!", "farewell"), done.set())).start()
+    assert done.wait(2), "add_turn waited for another user's load"
+    store.release.set()
+    loader.join(5)
+    assert "slow" in context.sessions and len(context.get_context("fast")) == 2
+    context.close()
+    print("✅ Loads run outside the lock")
+
+
+def _log_worker(directory, platform, results):
+    store = LogFileStore(directory, max_turns=5, compact_min_records=20)
+    for index in range(200):
+        user_id = f"{platform}-{index % 4}"
+        turn = _turn(user_id, 0, "farewell" if index >= 196 else "greeting")
+        store.write({}, {user_id: {"user_id": user_id, "conversation_count": index // 4 + 1}}, [turn])
+    results.put((platform, store.stats()['compactions']))
+    store.close()
+
+
+def test_log_store_shared_by_processes():
+    print("🧪 Testing two processes appending to and compacting one log store...")
+    with tempfile.TemporaryDirectory() as directory:
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_log_worker, args=(directory, platform, results))
+                   for platform in ("telegram", "instagram")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+        outcomes = sorted(results.get(timeout=5) for _ in workers)
+        assert [platform for platform, _ in outcomes] == ["instagram", "telegram"]
+        assert all(compactions > 0 for _, compactions in outcomes)
+
+        store = LogFileStore(directory, max_turns=5)
+        for platform in ("telegram", "instagram"):
+            for index in range(4):
+                turns, profile = store.load_user(f"{platform}-{index}")
+                assert len(turns) == 5 and turns[-1]['intent'] == "farewell", (platform, index, len(turns))
+                assert profile['conversation_count'] == 50
+        store.close()
+    print("✅ No turn or profile lost to a concurrent compaction")
+
+
+def test_log_stores_see_each_others_appends():
+    print("🧪 Testing two log stores appending to one directory...")
+    with tempfile.TemporaryDirectory() as directory:
+        # Two instances stand in for the Telegram and Instagram processes
+        first, second = LogFileStore(directory), LogFileStore(directory)
+        second.write({}, {"u1": {"user_id": "u1", "conversation_count": 2}}, [_turn("u1", 2), _turn("u1", 1)])
+        turns, profile = first.load_user("u1")
+        assert len(turns) == 2 and profile['conversation_count'] == 2
+
+        first.write({}, {"u1": {"user_id": "u1", "conversation_count": 3}}, [_turn("u1", 0, "farewell")])
+        turns, profile = second.load_user("u1")
+        assert [turn['intent'] for turn in turns] == ["greeting", "greeting", "farewell"]
+        assert profile['conversation_count'] == 3
+        first.close()
+        second.close()
+
+        # Both update one profile without reloading it: the counts add up
+        telegram = ConversationContext(store=LogFileStore(directory), flush_interval=3600)
+        instagram = ConversationContext(store=LogFileStore(directory), flush_interval=3600)
+        for _ in range(3):
+            telegram.add_turn("shared", "flori de aniversare", "Avem!", "gift_suggestions")
+            instagram.add_turn("shared", "un cadou pentru mama", "Desigur!", "gift_suggestions")
+        telegram.flush()
+        instagram.flush()
+        telegram.add_turn("shared", "mulțumesc", "Cu plăcere!", "farewell")
+        telegram.flush()
+        assert instagram.store.stats()['merged'] == 1 and telegram.store.stats()['merged'] == 1
+        telegram.close()
+        instagram.close()
+
+        store = LogFileStore(directory)
+        turns, profile = store.load_user("shared")
+        assert len(turns) == 7 and profile['conversation_count'] == 7
+        assert sorted(profile['special_occasions']) == ["aniversare", "mama"]
+        store.close()
+    print("✅ Each store reads the other's turns and profiles")
+
+
+def _sqlite_worker(path, platform, results):
+    context = ConversationContext(store=SQLiteContextStore(path), flush_interval=3600)
+    for index in range(20):
+        context.add_turn(f"{platform}-{index % 4}", "salut", "Bună!", "greeting")
+    context.close()
+    results.put(platform)
+
+
+def test_sqlite_store_shared_by_processes():
+    print("🧪 Testing two processes writing one SQLite store...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "conversations.db")
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_sqlite_worker, args=(path, platform, results))
+                   for platform in ("telegram", "instagram")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+        assert sorted(results.get(timeout=5) for _ in workers) == ["instagram", "telegram"]
+
+        store = SQLiteContextStore(path)
+        stats = store.stats()
+        assert stats['turns'] == 40 and stats['profiles'] == 8
+        assert store.load_user("instagram-0")[1]['conversation_count'] == 5
+        store.close()
+    print("✅ Shared SQLite store test passed")
+
+
+def test_sqlite_profiles_merge_concurrent_updates():
+    print("🧪 Testing profile updates from two processes on one SQLite store...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "conversations.db")
+        # Two contexts with their own connections stand in for the Telegram and Instagram processes
+        telegram = ConversationContext(store=SQLiteContextStore(path), flush_interval=3600)
+        instagram = ConversationContext(store=SQLiteContextStore(path), flush_interval=3600)
+        for _ in range(3):
+            telegram.add_turn("shared", "flori de aniversare", "Avem!", "gift_suggestions")
+            instagram.add_turn("shared", "un cadou pentru mama", "Desigur!", "gift_suggestions")
+        telegram.update_user_preferences("shared", {"budget": "500"})
+        instagram.update_user_preferences("shared", {"color": "roșu"})
+        telegram.flush()
+        instagram.flush()
+
+        telegram.add_turn("shared", "mulțumesc", "Cu plăcere!", "farewell")
+        telegram.flush()
+        assert instagram.store.stats()['merged'] == 1 and telegram.store.stats()['merged'] == 1
+        telegram.close()
+        instagram.close()
+
+        store = SQLiteContextStore(path)
+        profile = store.load_user("shared")[1]
+        assert profile['conversation_count'] == 7
+        assert profile['preferences'] == {"budget": "500", "color": "roșu"}
+        assert sorted(profile['special_occasions']) == ["aniversare", "mama"]
+        store.close()
+    print("✅ Neither process overwrote the other's counts, preferences or occasions")
+
+
+def test_one_context_per_storage_path():
+    print("🧪 Testing the process-wide conversation context...")
+    with tempfile.TemporaryDirectory() as directory:
+        shared = get_conversation_context(directory)
+        assert get_conversation_context(directory) is shared
+
+        # Worker threads writing through the shared instance lose nothing
+        def worker(index):
+            for turn in range(25):
+                shared.add_turn(f"user-{index}", f"mesaj {turn}", "Bună!", "greeting")
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        shared.close()
+
+        reopened = get_conversation_context(directory)
+        assert reopened is not shared
+        for index in range(8):
+            assert reopened.get_user_profile(f"user-{index}").conversation_count == 25
+        reopened.close()
+    print("✅ Shared context test passed")
+
+
+def test_store_must_implement_load_and_write():
+    print("🧪 Testing an incomplete store...")
+
+    class _WriteOnly(ContextStore):
+        def write(self, contexts, profiles, turns):
+            pass
+
+    class _ReadOnly(ContextStore):
+        def load_user(self, user_id):
+            return [], None
+
+    for incomplete in (_WriteOnly, _ReadOnly):
+        try:
+            incomplete()
+            assert False, f"{incomplete.__name__} instantiated"
+        except TypeError:
+            pass
+
+    store = _RecordingStore()
+    assert store.load_contexts() == {} and store.load_profiles() == {} and store.stats() == {}
+    store.close()
+    print("✅ load_user() and write() are required; the rest have defaults")
+
+
+if __name__ == "__main__":
+    print("🚀 Running context store tests...\n")
+    test_add_turn_does_not_write()
+    test_json_round_trip_and_atomic_files()
+    test_background_flusher()
+    test_write_through_when_interval_is_zero()
+    test_json_store_rewrites_only_changed_file()
+    test_json_store_serializes_only_changed_users()
+    test_log_store_appends_and_loads_live_turns()
+    test_log_store_compaction()
+    test_log_store_migrates_json_files()
+    test_sqlite_store_loads_users_lazily()
+    test_idle_users_are_evicted_and_reloaded()
+    test_file_stores_keep_only_offsets_of_evicted_users()
+    test_loading_a_user_does_not_block_others()
+    test_log_store_shared_by_processes()
+    test_log_stores_see_each_others_appends()
+    test_sqlite_store_shared_by_processes()
+    test_sqlite_profiles_merge_concurrent_updates()
+    test_one_context_per_storage_path()
+    test_store_must_implement_load_and_write()
+    print("\n🎉 All context store tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the query embedding cache used by the vector search
+"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.embedding_cache import MemmapEmbeddingStore, QueryEmbeddingCache, normalize_query
+
+
+def _fake_embed(text):
+    return [float(len(text)), float(text.count(' ')), 1.0]
+
+
+def test_normalized_queries_share_an_entry():
+    print("🧪 Testing query normalization...")
+    cache = QueryEmbeddingCache('test-model', max_entries=4)
+    computed = []
+
+    def compute(text):
+        computed.append(text)
+        return _fake_embed(text)
+
+    cache.get_or_compute("Trandafiri  Roșii ", compute)
+    cache.get_or_compute("trandafiri roșii", compute)
+
+    assert normalize_query("  Buchet   MAMA ") == "buchet mama"
+    assert computed == ["trandafiri roșii"]
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    print(f"✅ Stats: {cache.stats()}")
+
+
+def test_lru_eviction():
+    print("🧪 Testing LRU eviction...")
+    cache = QueryEmbeddingCache('test-model', max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+    print("✅ Least recently used entry evicted")
+
+
+def test_disk_store_survives_restart():
+    print("🧪 Testing on-disk query embedding store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'query_embeddings')
+        cache = QueryEmbeddingCache('test-model', max_entries=8, persist_path=path)
+        cache.get_or_compute("flori sub 1000 lei", _fake_embed)
+        cache.close()
+
+        restarted = QueryEmbeddingCache('test-model', max_entries=8, persist_path=path)
+        vector = restarted.get("flori sub 1000 lei")
+        assert vector == _fake_embed("flori sub 1000 lei")
+        assert restarted.stats()['disk_hits'] == 1
+        restarted.close()
+
+        other_model = QueryEmbeddingCache('another-model', max_entries=8, persist_path=path)
+        assert other_model.get("flori sub 1000 lei") is None
+        print("✅ Vectors reloaded after restart, ignored for another model")
+
+
+def test_disk_store_reuses_rows_when_full():
+    print("🧪 Testing on-disk ring capacity...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemmapEmbeddingStore(tmp, 'test-model', dim=2, capacity=3)
+        for i in range(10):
+            store.put(f"q{i}", [float(i), 0.0])
+        assert len(store) == 3
+        assert store.get("q0") is None
+        assert store.get("q9") == [9.0, 0.0]
+        store.close()
+
+        reopened = MemmapEmbeddingStore(tmp, 'test-model', dim=2, capacity=3)
+        assert sorted(reopened.rows) == ["q7", "q8", "q9"]
+        reopened.put("q10", [10.0, 0.0])
+        assert reopened.get("q7") is None
+        reopened.close()
+        print("✅ Oldest rows overwritten first, index replayed correctly")
+
+
+if __name__ == "__main__":
+    test_normalized_queries_share_an_entry()
+    test_lru_eviction()
+    test_disk_store_survives_restart()
+    test_disk_store_reuses_rows_when_full()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the shared embedding model registry and collection model checks
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.resources import (
+    EMBEDDING_MODEL_KEY, EmbeddingModelMismatchError, EmbeddingModelRegistry,
+    get_or_create_collection, stamp_collection_model
+)
+
+
+class _FakeTensor:
+    def __init__(self, count):
+        self.count = count
+
+    def numel(self):
+        return self.count
+
+    def element_size(self):
+        return 4
+
+
+class _FakeModel:
+    def parameters(self):
+        return [_FakeTensor(1000), _FakeTensor(24)]
+
+    def buffers(self):
+        return []
+
+
+class _FakeCollection:
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.metadata = metadata
+
+    def modify(self, metadata=None):
+        self.metadata = metadata
+
+
+class _FakeClient:
+    def __init__(self):
+        self.collections = {}
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def create_collection(self, name, metadata=None):
+        self.collections[name] = _FakeCollection(name, metadata)
+        return self.collections[name]
+
+
+def test_models_are_loaded_once_per_name():
+    print("🧪 Testing embedding model registry...")
+    loads = []
+    registry = EmbeddingModelRegistry(loader=lambda name: loads.append(name) or _FakeModel())
+
+    first = registry.get('model-a')
+    assert registry.get('model-a') is first
+    registry.get('model-b')
+
+    assert loads == ['model-a', 'model-b']
+    stats = registry.stats()
+    assert stats['model_count'] == 2
+    assert stats['models']['model-a']['memory_bytes'] == 1024 * 4
+    print(f"✅ Registry stats: {stats}")
+
+
+def test_collection_records_and_enforces_model():
+    print("🧪 Testing collection embedding model metadata...")
+    client = _FakeClient()
+
+    collection = get_or_create_collection(client, 'all_products', 'model-a')
+    assert collection.metadata[EMBEDDING_MODEL_KEY] == 'model-a'
+    assert get_or_create_collection(client, 'all_products', 'model-a') is collection
+
+    try:
+        get_or_create_collection(client, 'all_products', 'model-b')
+        assert False, "Querying with another model should fail"
+    except EmbeddingModelMismatchError as e:
+        print(f"✅ Mismatch detected: {e}")
+
+
+def test_legacy_collection_needs_a_stamp():
+    print("🧪 Testing collections without model metadata...")
+    client = _FakeClient()
+    client.collections['flowers_only'] = _FakeCollection('flowers_only', {'description': 'old'})
+
+    try:
+        get_or_create_collection(client, 'flowers_only', 'model-a')
+        assert False, "A collection without a recorded model should not be queried"
+    except EmbeddingModelMismatchError:
+        pass
+
+    stamp_collection_model(client.collections['flowers_only'], 'model-a')
+    collection = get_or_create_collection(client, 'flowers_only', 'model-a')
+    assert collection.metadata == {'description': 'old', EMBEDDING_MODEL_KEY: 'model-a'}
+    print("✅ Legacy collection stamp test passed")
+
+
+if __name__ == "__main__":
+    test_models_are_loaded_once_per_name()
+    test_collection_records_and_enforces_model()
+    test_legacy_collection_needs_a_stamp()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the intent classification cache
+"""
+
+import os
+import sys
+import time
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from intelligence.intent_cache import IntentCache, normalize_message, context_fingerprint
+from intelligence.intent_classifier import IntentClassifier
+
+
+class _CountingLLM:
+    available = True
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def complete(self, prompts, **kwargs):
+        self.calls += 1
+        return 'openai', self.answer
+
+
+def test_normalization():
+    print("🧪 Testing message normalization...")
+    assert normalize_message("  Salut!! ") == normalize_message("salut") == "salut"
+    assert normalize_message("Cât  costă livrarea?") == "cât costă livrarea"
+    assert context_fingerprint(['greeting', 'find_product']) == "greeting>find_product"
+    print("✅ Spelling variants share a key")
+
+
+def test_ttl_and_lru():
+    print("🧪 Testing TTL and LRU eviction...")
+    cache = IntentCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("salut", "", "greeting", 0.9)
+    cache.put("pa", "", "farewell", 0.9)
+    assert cache.get("Salut!") == ("greeting", 0.9)
+    cache.put("mulțumesc", "", "farewell", 0.8)
+    assert cache.get("pa") is None  # Least recently used
+    assert cache.get("salut", "find_product") is None  # Different context
+    time.sleep(0.06)
+    assert cache.get("salut") is None
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['expired'] == 1 and stats['hits'] == 1
+    print(f"✅ Stats: {stats}")
+
+
+def test_persistence():
+    print("🧪 Testing persistence...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'intent_cache.json')
+        cache = IntentCache(persist_path=path, save_every=1)
+        cache.put("cât costă livrarea", "greeting", "delivery_info", 0.92)
+        reloaded = IntentCache(persist_path=path)
+        assert reloaded.get("Cât costă livrarea?", "greeting") == ("delivery_info", 0.92)
+    print("✅ Entries survive a restart")
+
+
+def test_classifier_skips_repeated_llm_calls():
+    print("🧪 Testing classifier cache integration...")
+    classifier = IntentClassifier()
+    classifier.llm = _CountingLLM('greeting:0.95')
+    classifier.cache = IntentCache()
+
+    for message in ("salut", "Salut!", "salut "):
+        assert classifier.classify_intent(message) == ('greeting', 0.95)
+    assert classifier.llm.calls == 1
+    assert classifier.get_cache_stats()['hits'] == 2
+    print("✅ One LLM call for three identical greetings")
+
+
+if __name__ == "__main__":
+    test_normalization()
+    test_ttl_and_lru()
+    test_persistence()
+    test_classifier_skips_repeated_llm_calls()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the local fast path that answers decisive keyword matches without the LLM
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from intelligence.intent_classifier import IntentClassifier
+
+
+class _CountingLLM:
+    available = True
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def complete(self, prompts, **kwargs):
+        self.calls += 1
+        return 'openai', self.answer
+
+    def get_stats(self):
+        return {'calls': self.calls}
+
+
+def _make_classifier(answer='price_inquiry:0.9'):
+    classifier = IntentClassifier()
+    classifier.llm = _CountingLLM(answer)
+    classifier.cache = None
+    return classifier
+
+
+def test_decisive_messages_skip_llm():
+    print("🧪 Testing decisive keyword matches...")
+    classifier = _make_classifier()
+    expected = {
+        "Bună ziua!": 'greeting',
+        "mulțumesc, la revedere": 'farewell',
+        "mulțumesc, o zi bună!": 'farewell',
+        "vreau un buchet de trandafiri": 'find_product',
+    }
+    for message, intent in expected.items():
+        assert classifier.classify_intent(message) == (intent, classifier.fast_path_confidence), message
+    assert classifier.llm.calls == 0
+    print("✅ No LLM calls for greetings, farewells and clear requests")
+
+
+def test_ambiguous_messages_use_llm():
+    print("🧪 Testing ambiguous messages...")
+    classifier = _make_classifier()
+    # Tied (delivery vs price), close (find vs bulk) and substring-only matches
+    for message in ("cât costă livrarea?", "vreau să comand 50 de buchete pentru firmă", "un pachet cadou"):
+        assert classifier.classify_intent(message) == ('price_inquiry', 0.9), message
+    assert classifier.llm.calls == 3
+    print("✅ Ambiguous messages still go to the LLM")
+
+
+def test_single_keyword_uses_llm():
+    print("🧪 Testing single-keyword messages...")
+    classifier = _make_classifier()
+    # One whole-word hit is not enough: 'flori' alone also starts complaints
+    for message in ("Salut!", "la revedere", "livrare în chișinău", "florile nu arată ca în poză"):
+        assert classifier.classify_intent(message) == ('price_inquiry', 0.9), message
+    assert classifier.llm.calls == 4
+    print("✅ Single keyword hits go to the LLM")
+
+
+def test_precision_on_labelled_examples():
+    print("🧪 Testing fast path precision on data/intent_examples.json...")
+    from intelligence.intent_model import load_examples
+
+    classifier = _make_classifier()
+    answered, correct = 0, 0
+    for intent, messages in load_examples('intent_examples.json').items():
+        for message in messages:
+            result = classifier._classify_fast_path(message.lower().strip())
+            if result:
+                answered += 1
+                correct += result[0] == intent
+    assert answered >= 8
+    assert correct / answered >= 0.85, f"{correct}/{answered}"
+    print(f"✅ Fast path precision {correct}/{answered}")
+
+
+def test_stats_report_avoided_share():
+    print("🧪 Testing fast path counters...")
+    classifier = _make_classifier()
+    classifier.classify_intent("bună ziua")
+    classifier.classify_intent("cât costă livrarea?")
+    stats = classifier.get_stats()
+    assert stats['fast_path'] == 1 and stats['llm_calls'] == 1
+    assert stats['llm_avoided_rate'] == 0.5
+    print(f"✅ Stats: {stats}")
+
+
+def test_fast_path_can_be_disabled():
+    print("🧪 Testing disabled fast path...")
+    classifier = _make_classifier(answer='greeting:0.99')
+    classifier.fast_path_enabled = False
+    assert classifier.classify_intent("salut") == ('greeting', 0.99)
+    assert classifier.llm.calls == 1
+    print("✅ Disabled fast path defers to the LLM")
+
+
+if __name__ == "__main__":
+    test_decisive_messages_skip_llm()
+    test_ambiguous_messages_use_llm()
+    test_single_keyword_uses_llm()
+    test_precision_on_labelled_examples()
+    test_stats_report_avoided_share()
+    test_fast_path_can_be_disabled()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the embedding intent model (training, artifact round trip, classification)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import zlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+import numpy as np
+
+from intelligence.intent_model import IntentEmbeddingModel, cross_validate, load_examples
+from intelligence.intent_classifier import IntentClassifier
+
+EXAMPLES = {
+    'greeting': ["salut", "bună ziua", "bună seara prieteni"],
+    'delivery_info': ["cât costă livrarea", "livrare în chișinău", "livrați mâine livrare"],
+    'complaint': ["florile au venit ofilite", "buchet stricat ofilite", "am o reclamație ofilite"],
+}
+
+
+class _BagOfWordsEncoder:
+    """Deterministic stand-in for SentenceTransformer: hashed bag of words"""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode('utf-8')) % self.dim] += 1.0
+        return vectors
+
+
+def test_train_and_classify():
+    print("🧪 Testing training and classification...")
+    encoder = _BagOfWordsEncoder()
+    model = IntentEmbeddingModel.train(EXAMPLES, encoder.encode, 'fake-model')
+    assert model.centroids.shape == (3, 64)
+    assert model.prototypes.shape == (9, 64)
+
+    vectors = encoder.encode(["livrare azi", "ofilite", "salut"])
+    assert [intent for intent, _, _ in model.classify_vectors(vectors)] == ['delivery_info', 'complaint', 'greeting']
+
+    model.method = 'prototype'
+    intent, similarity, margin = model.classify_vector(encoder.encode(["bună seara"])[0])
+    assert intent == 'greeting' and similarity > 0.8 and margin > 0
+    print("✅ Centroid and prototype classification agree")
+
+
+def test_artifact_round_trip():
+    print("🧪 Testing the .npz artifact...")
+    encoder = _BagOfWordsEncoder()
+    model = IntentEmbeddingModel.train(EXAMPLES, encoder.encode, 'fake-model')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'intent_model.npz')
+        model.save(path)
+        loaded = IntentEmbeddingModel.load(path)
+    assert loaded.intents == model.intents and loaded.model_name == 'fake-model'
+    assert np.allclose(loaded.centroids, model.centroids)
+
+    vectors = encoder.encode(["livrare"] * 1000)
+    started = time.perf_counter()
+    loaded.classify_vectors(vectors)
+    per_message_ms = (time.perf_counter() - started) * 1000 / len(vectors)
+    print(f"✅ Artifact reloads; {per_message_ms:.4f} ms per message")
+
+
+def test_cross_validation_and_shipped_examples():
+    print("🧪 Testing cross-validation on the shipped examples...")
+    examples = load_examples()
+    assert len(examples) == 17 and all(len(messages) >= 5 for messages in examples.values())
+    report = cross_validate(examples, _BagOfWordsEncoder(dim=512).encode, 'fake-model', folds=3)
+    assert report['examples'] == sum(len(messages) for messages in examples.values())
+    assert 0.0 < report['accuracy'] <= 1.0
+    print(f"✅ Bag-of-words accuracy: {report['accuracy']}")
+
+
+def test_classifier_primary_mode():
+    print("🧪 Testing classifier integration...")
+    encoder = _BagOfWordsEncoder()
+
+    class _NoLLM:
+        available = True
+
+        def complete(self, prompts, **kwargs):
+            raise AssertionError("LLM should not be called")
+
+    classifier = IntentClassifier()
+    classifier.llm = _NoLLM()
+    classifier.cache = None
+    classifier.embedding_mode = 'primary'
+    classifier.intent_model = IntentEmbeddingModel.train(EXAMPLES, encoder.encode, 'fake-model')
+    classifier._encoder = encoder
+
+    intent, confidence = classifier.classify_intent("florile sunt ofilite")
+    assert intent == 'complaint' and confidence >= classifier.embedding_min_similarity
+    assert classifier.get_stats()['embedding'] == 1
+    print("✅ Confident embedding answers skip the LLM")
+
+
+def test_fallback_mode_counts_embedding_hits():
+    print("🧪 Testing fallback mode counters...")
+    encoder = _BagOfWordsEncoder()
+
+    class _UnsureLLM:
+        available = True
+
+        def complete(self, prompts, **kwargs):
+            return 'openai', 'fallback:0.1'
+
+    classifier = IntentClassifier()
+    classifier.llm = _UnsureLLM()
+    classifier.cache = None
+    classifier.embedding_mode = 'fallback'
+    classifier.intent_model = IntentEmbeddingModel.train(EXAMPLES, encoder.encode, 'fake-model')
+    classifier._encoder = encoder
+
+    assert classifier.classify_intent("florile sunt ofilite")[0] == 'complaint'
+    classifier.embedding_mode = None
+    classifier.classify_intent("qwerty")
+    stats = classifier.get_stats()
+    assert stats['llm_calls'] == 2 and stats['local_fallback'] == 2
+    assert stats['embedding_fallback'] == 1 and stats['unclassified'] == 1
+    assert stats['llm_avoided_rate'] == 0.0
+    print(f"✅ Fallback stages counted: {stats}")
+
+
+def test_artifact_from_other_model_is_refused():
+    print("🧪 Testing an artifact trained with another embedding model...")
+    model = IntentEmbeddingModel.train(EXAMPLES, _BagOfWordsEncoder().encode, 'all-MiniLM-L6-v2')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'intent_model.npz')
+        model.save(path)
+        classifier = IntentClassifier()
+        classifier.embedding_model_path = path
+        classifier.embedding_mode = 'fallback'
+        assert classifier._get_intent_model() is None
+    assert classifier.embedding_mode is None
+    print("✅ Stale artifact disables the stage instead of mixing embedding spaces")
+
+
+if __name__ == "__main__":
+    test_train_and_classify()
+    test_artifact_round_trip()
+    test_cross_validation_and_shipped_examples()
+    test_classifier_primary_mode()
+    test_fallback_mode_counts_embedding_hits()
+    test_artifact_from_other_model_is_refused()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test the Aho–Corasick keyword matcher against the per-keyword substring loops it replaces
+"""
+
+import os
+import sys
+import time
+import random
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from intelligence.keyword_matcher import KeywordMatcher
+from intelligence.intent_classifier import IntentClassifier, CONTEXT_BOOSTS
+from intelligence.action_handler import OCCASION_KEYWORDS, FAQ_KEYWORDS, HANDLER_KEYWORDS
+
+MESSAGES = [
+    "salut", "bună ziua, vreau un buchet de trandafiri", "cât costă livrarea",
+    "am o problemă cu comanda", "pa, mulțumesc", "unde este comanda mea? când ajunge",
+    "vreau să comand 50 de buchete pentru firmă", "cost livrare cost", "aveți în stoc bujori",
+    "flori pentru ziua mamei de 8 martie", "condoleanțe, o coroană", "", "pa pa pa",
+]
+
+
+def _legacy_keyword_scores(intents, message):
+    scores = {}
+    for intent, config in intents.items():
+        score = 0
+        for keyword in config['keywords']:
+            if keyword in message:
+                score += 2.0 if f" {keyword} " in f" {message} " else 1.0
+        if score > 0:
+            scores[intent] = score * (config['priority'] / 10.0)
+    return scores
+
+
+def _random_messages(intents, count=300, seed=7):
+    rng = random.Random(seed)
+    vocabulary = [keyword for config in intents.values() for keyword in config['keywords']]
+    vocabulary += ['și', 'de', 'un', 'x', 'pentru', 'azi', 'ma', 'ul', 'ă']
+    messages = []
+    for _ in range(count):
+        words = rng.sample(vocabulary, rng.randint(1, 6))
+        joiner = rng.choice([' ', '', ', '])
+        messages.append(joiner.join(words))
+    return messages
+
+
+def test_overlapping_matches_and_boundaries():
+    print("🧪 Testing overlapping matches...")
+    matcher = KeywordMatcher([('cost', ('g', 'a')), ('cost livrare', ('g', 'b')), ('livrare', ('g', 'c'))])
+    matches = matcher.find_all("cost livrare")
+    assert [(m.keyword, m.start, m.whole_word) for m in matches] == [
+        ('cost', 0, True), ('cost livrare', 0, True), ('livrare', 5, True)
+    ]
+    assert matcher.scan("costuri livrare") == {'cost': False, 'livrare': True}
+    assert matcher.first_label("livrare cost", 'g', ['c', 'a']) == 'c'
+    print("✅ All overlapping keywords found with word-boundary flags")
+
+
+def test_intent_scores_match_legacy_loops():
+    print("🧪 Testing intent scores against the substring loops...")
+    classifier = IntentClassifier()
+    for message in MESSAGES + _random_messages(classifier.intents):
+        legacy = _legacy_keyword_scores(classifier.intents, message)
+        scores = classifier._get_keyword_scores(message)
+        assert scores == legacy, message
+        # Same winner, including ties
+        if legacy:
+            assert max(scores, key=scores.get) == max(legacy, key=legacy.get)
+    print("✅ Identical scores on fixed and random messages")
+
+
+def test_context_occasion_and_faq_tables():
+    print("🧪 Testing context, occasion and FAQ lookups...")
+    classifier = IntentClassifier(extra_keywords={'occasion': OCCASION_KEYWORDS, 'faq': FAQ_KEYWORDS})
+    matcher = classifier.keyword_matcher
+
+    context = "User: vreau flori\nBot: ...\nIntent: find_product\nUser: livrare?"
+    boosted = classifier._apply_context_boosting({'find_product': 1.0, 'delivery_info': 1.0, 'complaint': 1.0}, context)
+    expected = {
+        intent: score * (1.3 if any(word in context.lower() for word in CONTEXT_BOOSTS.get(intent, [])) else 1.0)
+        for intent, score in {'find_product': 1.0, 'delivery_info': 1.0, 'complaint': 1.0}.items()
+    }
+    assert boosted == expected
+
+    assert matcher.first_label("flori pentru ziua mamei", 'occasion', OCCASION_KEYWORDS) == 'birthday'
+    assert matcher.first_label("buchet de nuntă", 'occasion', OCCASION_KEYWORDS) == 'wedding'
+    assert matcher.first_label("ceva simplu", 'occasion', OCCASION_KEYWORDS) is None
+    assert matcher.first_label("care este programul?", 'faq', FAQ_KEYWORDS) == 'working_hours'
+    assert matcher.first_label("unde vă aflați", 'faq', FAQ_KEYWORDS) == 'location'
+    print("✅ Boosts, occasions and FAQ topics resolved from the same automaton")
+
+
+def test_scan_speed():
+    print("🧪 Benchmarking one scan vs the substring loops...")
+    classifier = IntentClassifier()
+    messages = _random_messages(classifier.intents, count=2000, seed=3)
+
+    started = time.perf_counter()
+    for message in messages:
+        _legacy_keyword_scores(classifier.intents, message)
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for message in messages:
+        classifier._get_keyword_scores(message)
+    matcher_seconds = time.perf_counter() - started
+    print(f"✅ Loops: {legacy_seconds * 1e6 / len(messages):.1f} µs/msg, "
+          f"matcher: {matcher_seconds * 1e6 / len(messages):.1f} µs/msg, {classifier.keyword_matcher.stats()}")
+
+
+def test_one_scan_per_message():
+    print("🧪 Benchmarking one shared scan per message vs a scan per stage...")
+    classifier = IntentClassifier(extra_keywords=HANDLER_KEYWORDS)
+    classifier.embedding_mode = None
+    matcher = classifier.keyword_matcher
+    messages = _random_messages(classifier.intents, count=2000, seed=3)
+    context = "User: vreau un buchet de flori\nBot: Desigur!\nUser: cât costă livrarea?"
+
+    scans = []
+    scan = matcher.scan
+    matcher.scan = lambda text: scans.append(text) or scan(text)
+
+    def per_stage(message):
+        # Fast path, local fallback, FAQ and occasion lookups each scanning on their own
+        return (classifier._classify_fast_path(message, context), classifier._classify_locally(message, context),
+                matcher.first_label(message, 'faq', FAQ_KEYWORDS),
+                matcher.first_label(message, 'occasion', OCCASION_KEYWORDS))
+
+    def shared(message):
+        keywords = classifier.scan_keywords(message, context)
+        return (classifier._classify_fast_path(message, context, keywords),
+                classifier._classify_locally(message, context, keywords),
+                matcher.first_label(message, 'faq', FAQ_KEYWORDS, keywords.hits),
+                matcher.first_label(message, 'occasion', OCCASION_KEYWORDS, keywords.hits))
+
+    timings = {}
+    for name, pipeline in (('per_stage', per_stage), ('shared', shared)):
+        scans.clear()
+        started = time.perf_counter()
+        results = [pipeline(message) for message in messages]
+        timings[name] = (time.perf_counter() - started) * 1e6 / len(messages), len(scans) / len(messages), results
+    matcher.scan = scan
+
+    assert timings['shared'][2] == timings['per_stage'][2]
+    assert timings['shared'][1] == 2  # the message and its context
+    assert timings['shared'][0] < timings['per_stage'][0]
+    print(f"✅ Per stage: {timings['per_stage'][0]:.1f} µs/msg ({timings['per_stage'][1]:.1f} scans), "
+          f"shared: {timings['shared'][0]:.1f} µs/msg ({timings['shared'][1]:.0f} scans)")
+
+
+if __name__ == "__main__":
+    test_overlapping_matches_and_boundaries()
+    test_intent_scores_match_legacy_loops()
+    test_context_occasion_and_faq_tables()
+    test_scan_speed()
+    test_one_scan_per_message()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test that the vector search service is created lazily and only once per process
+"""
+
+import os
+import sys
+import subprocess
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+import database.vector_search as vector_search
+
+
+class _CountingSearch:
+    """Stand-in for UniversalXOFlowersSearch that counts constructions"""
+    created = 0
+
+    def __init__(self):
+        _CountingSearch.created += 1
+
+
+def test_import_does_not_build_search():
+    print("🧪 Testing lazy vector search import...")
+    src_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "import database.vector_search as vs\n"
+        "from database.resources import loaded_resources\n"
+        "assert vs._universal_search is None\n"
+        "assert loaded_resources() == {'chroma_clients': [], 'embedding_models': []}\n"
+        "assert 'chromadb' not in sys.modules and 'sentence_transformers' not in sys.modules\n"
+    ) % src_path
+    subprocess.run([sys.executable, '-c', code], check=True)
+    print("✅ Import did not construct the search service")
+
+
+def test_shared_instance_is_built_once():
+    print("🧪 Testing shared vector search instance...")
+    original_class = vector_search.UniversalXOFlowersSearch
+    original_instance = vector_search._universal_search
+    vector_search.UniversalXOFlowersSearch = _CountingSearch
+    vector_search._universal_search = None
+    _CountingSearch.created = 0
+
+    try:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(vector_search.get_universal_search()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert _CountingSearch.created == 1
+        assert all(result is results[0] for result in results)
+        assert vector_search.universal_search is results[0]
+        assert vector_search.vector_search is results[0]
+        print("✅ One instance shared by all callers")
+    finally:
+        vector_search.UniversalXOFlowersSearch = original_class
+        vector_search._universal_search = original_instance
+
+
+if __name__ == "__main__":
+    test_import_does_not_build_search()
+    test_shared_instance_is_built_once()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test the shared LLM client layer and the async intent classification path
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from intelligence.llm_client import LLMClient, LatencyHistogram
+from intelligence.intent_classifier import IntentClassifier
+
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _response(text):
+    return _Namespace(choices=[_Namespace(message=_Namespace(content=text))])
+
+
+class _FakeCompletions:
+    def __init__(self, text, fail=False):
+        self.text = text
+        self.fail = fail
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.fail:
+            raise TimeoutError("read timeout")
+        return _response(self.text)
+
+
+class _FakeAsyncCompletions(_FakeCompletions):
+    async def create(self, **kwargs):
+        return _FakeCompletions.create(self, **kwargs)
+
+
+class _FakeGemini:
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        return _Namespace(text=self.text)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return self.generate_content(prompt, **kwargs)
+
+
+def _make_client(openai_text='greeting:0.9', gemini_text='farewell:0.9', openai_fails=False):
+    client = LLMClient(config={'primary': 'openai', 'fallback': 'gemini', 'request_timeout': 3.0},
+                       openai_api_key='', gemini_api_key='')
+    completions = _FakeCompletions(openai_text, fail=openai_fails)
+    async_completions = _FakeAsyncCompletions(openai_text, fail=openai_fails)
+    client._openai = _Namespace(chat=_Namespace(completions=completions))
+
+    async def get_async_openai():
+        return _Namespace(chat=_Namespace(completions=async_completions))
+    client.get_async_openai = get_async_openai
+    client._gemini = _FakeGemini(gemini_text)
+    return client, completions, async_completions
+
+
+def test_clients_are_reused_with_timeouts():
+    print("🧪 Testing client reuse and per-call timeouts...")
+    client, completions, _ = _make_client()
+
+    for _ in range(3):
+        assert client.complete({'openai': 'hi', 'gemini': 'hi'}) == ('openai', 'greeting:0.9')
+    assert len(completions.calls) == 3
+    assert all(call['timeout'] == 3.0 for call in completions.calls)
+
+    client.complete_gemini('hi', timeout=1.5)
+    client.complete_gemini('hi')
+    assert [call['request_options']['timeout'] for call in client._gemini.calls] == [1.5, 3.0]
+    assert client.get_stats()['latency']['openai']['calls'] == 3
+    print("✅ One client per provider, timeouts passed on every call")
+
+
+def test_fallback_and_error_histogram():
+    print("🧪 Testing provider fallback...")
+    client, _, _ = _make_client(openai_fails=True)
+
+    assert client.complete({'openai': 'hi', 'gemini': 'hi'}) == ('gemini', 'farewell:0.9')
+    latency = client.get_stats()['latency']
+    assert latency['openai']['errors'] == 1 and latency['openai']['timeouts'] == 1
+    assert latency['gemini']['calls'] == 1
+    print("✅ Failed OpenAI call fell back to Gemini and was recorded")
+
+
+def test_async_classification():
+    print("🧪 Testing async intent classification...")
+    client, completions, async_completions = _make_client(openai_text='price_inquiry:0.95')
+    classifier = IntentClassifier()
+    classifier.llm = client
+
+    result = asyncio.run(classifier.aclassify_intent("cât costă un buchet?"))
+    assert result == ('price_inquiry', 0.95)
+    assert len(async_completions.calls) == 1 and not completions.calls
+    assert classifier.classify_intent("cât costă un buchet?") == ('price_inquiry', 0.95)
+    print("✅ Async and sync paths agree")
+
+
+def test_async_client_replaced_per_loop_is_closed():
+    print("🧪 Testing the async client across event loops...")
+    client = LLMClient(openai_api_key='test-key', gemini_api_key='')
+
+    async def get_twice():
+        first, second = await asyncio.gather(client.get_async_openai(), client.get_async_openai())
+        assert first is second
+        return first
+
+    first = asyncio.run(get_twice())
+    second = asyncio.run(get_twice())
+    assert second is not first
+    # The client of the finished loop was closed when it was replaced
+    assert first.is_closed() and not second.is_closed()
+    asyncio.run(client.aclose())
+    assert second.is_closed() and client._async_openai is None
+    print("✅ Replaced async clients are closed")
+
+
+def test_telegram_pipeline_awaits_classification():
+    print("🧪 Testing the Telegram pipeline with async classification...")
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:test-token')
+    from api.container import AppContainer
+    from api.telegram_app import XOFlowersTelegramBot
+
+    with tempfile.TemporaryDirectory() as directory:
+        bot = XOFlowersTelegramBot(container=AppContainer(storage_path=directory))
+        client, completions, async_completions = _make_client(openai_text='delivery_info:0.95')
+        bot.intent_classifier.llm = client
+        bot.intent_classifier.fast_path_enabled = False
+
+        response, intent, confidence = asyncio.run(
+            bot.dispatcher.run('chat-1', bot._aprocess_message, "când ajunge comanda mea acasă?", "42")
+        )
+        assert (intent, confidence) == ('delivery_info', 0.95) and response
+        assert len(async_completions.calls) == 1 and not completions.calls
+        assert bot.context_manager.get_user_intent_history("42") == ['delivery_info']
+        assert bot.dispatcher.get_stats()['processed'] == 1
+        bot.dispatcher.shutdown()
+        bot.container.close()
+    print("✅ Telegram pipeline used the async LLM client")
+
+
+def test_latency_histogram():
+    print("🧪 Testing latency histogram...")
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.05, 0.5, 2.0):
+        histogram.observe(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {'<=0.1s': 2, '<=1.0s': 1, '>1.0s': 1}
+    assert snapshot['p50'] == 0.1
+    assert snapshot['p95'] is None
+    print(f"✅ Histogram: {snapshot}")
+
+
+if __name__ == "__main__":
+    test_clients_are_reused_with_timeouts()
+    test_fallback_and_error_histogram()
+    test_async_classification()
+    test_async_client_replaced_per_loop_is_closed()
+    test_telegram_pipeline_awaits_classification()
+    test_latency_histogram()
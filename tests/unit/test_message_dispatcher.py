@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test that the message dispatcher keeps chats in order and runs different chats concurrently
+"""
+
+import os
+import sys
+import time
+import asyncio
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from api.dispatcher import MessageDispatcher
+
+
+def _slow_echo(log, chat_id, index, seconds):
+    time.sleep(seconds)
+    log.append((chat_id, index))
+    return index
+
+
+def test_same_chat_keeps_order():
+    print("🧪 Testing per-chat ordering...")
+    dispatcher = MessageDispatcher(max_concurrent=8, worker_threads=8)
+    log = []
+
+    async def scenario():
+        # Earlier messages are slower; they must still finish first
+        tasks = [dispatcher.run('chat-1', _slow_echo, log, 'chat-1', i, 0.05 - i * 0.01) for i in range(5)]
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+    assert log == [('chat-1', i) for i in range(5)]
+    assert dispatcher.get_stats()['active_chats'] == 0
+    dispatcher.shutdown()
+    print("✅ Replies follow message order")
+
+
+def test_different_chats_run_concurrently():
+    print("🧪 Testing concurrency across chats...")
+    dispatcher = MessageDispatcher(max_concurrent=4, worker_threads=8)
+    log = []
+
+    async def scenario():
+        tasks = [dispatcher.run(f'chat-{i}', _slow_echo, log, f'chat-{i}', 0, 0.2) for i in range(8)]
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(scenario())
+    stats = dispatcher.get_stats()
+    # 8 chats x 0.2s with 4 at a time -> about 0.4s instead of 1.6s
+    assert elapsed < 1.0
+    assert stats['peak_in_flight'] == 4
+    assert stats['processed'] == 8
+    dispatcher.shutdown()
+    print(f"✅ 8 chats in {elapsed:.2f}s, {stats}")
+
+
+def test_event_loop_stays_responsive():
+    print("🧪 Testing that blocking work leaves the event loop free...")
+    dispatcher = MessageDispatcher(max_concurrent=2, worker_threads=2)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        await dispatcher.run('chat-1', time.sleep, 0.3)
+        ticker_task.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 10
+    dispatcher.shutdown()
+    print("✅ Event loop kept running during a blocking call")
+
+
+def test_errors_propagate():
+    print("🧪 Testing error propagation...")
+    dispatcher = MessageDispatcher()
+
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        try:
+            await dispatcher.run('chat-1', fail)
+        except ValueError:
+            return True
+        return False
+
+    assert asyncio.run(scenario())
+    assert dispatcher.get_stats()['failed'] == 1
+    dispatcher.shutdown()
+    print("✅ Exceptions reach the handler")
+
+
+def test_coroutine_work_keeps_order():
+    print("🧪 Testing coroutine functions...")
+    dispatcher = MessageDispatcher(max_concurrent=8, worker_threads=2)
+    log = []
+
+    async def pipeline(index):
+        # Waiting on the network holds no worker thread; blocking steps are offloaded
+        await asyncio.sleep(0.05 - index * 0.01)
+        return await dispatcher.offload(_slow_echo, log, 'chat-1', index, 0)
+
+    async def scenario():
+        return await asyncio.gather(*(dispatcher.run('chat-1', pipeline, i) for i in range(5)))
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+    assert log == [('chat-1', i) for i in range(5)]
+    assert dispatcher.get_stats()['processed'] == 5
+    dispatcher.shutdown()
+    print("✅ Coroutine pipelines follow message order")
+
+
+if __name__ == "__main__":
+    test_same_chat_keeps_order()
+    test_different_chats_run_concurrently()
+    test_event_loop_stays_responsive()
+    test_errors_propagate()
+    test_coroutine_work_keeps_order()
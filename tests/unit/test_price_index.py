@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the price index and budget recommendations built on it
+"""
+
+import os
+import csv
+import sys
+import tempfile
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.catalog import PriceIndex, get_catalog
+from intelligence.product_search import ProductSearchEngine, _is_excluded
+
+
+def test_range_queries():
+    print("🧪 Testing price ranges...")
+    prices = np.array([500.0, 120.0, 800.0, 500.0, 2500.0])
+    codes = np.array([0, 1, 0, 1, 0])
+    index = PriceIndex(prices, codes)
+
+    assert index.range(price_max=500).tolist() == [1, 0, 3]
+    assert index.range(500, 800).tolist() == [0, 3, 2]
+    assert index.range(price_min=3000).tolist() == []
+    assert index.range(price_max=1000, category_code=0).tolist() == [0, 2]
+    assert index.range(price_max=1000, category_code=7).tolist() == []
+    assert index.count(500, 500) == 2
+    assert index.count(price_max=900, category_codes=[0, 1]) == 4
+    assert index.count(900, 100) == 0
+    print("✅ Bounds are inclusive and ties keep their order")
+
+
+def _legacy_budget(products, max_price):
+    """Budget recommendations without a query, scanning every product"""
+    seen_names, budget_products = set(), []
+    for product in products:
+        if _is_excluded(product) or product['name'] in seen_names:
+            continue
+        if int(product['price']) <= max_price:
+            budget_products.append(product)
+            seen_names.add(product['name'])
+    budget_products.sort(key=lambda x: int(x['price']))
+    return budget_products[:5]
+
+
+def test_budget_recommendations_match_scan():
+    print("🧪 Testing budget recommendations against a full scan...")
+    engine = ProductSearchEngine()
+    for budget in (50, 300, 800, 1500, 5000, 100000):
+        expected = [p['id'] for p in _legacy_budget(engine.products, budget)]
+        assert [p['id'] for p in engine.get_budget_recommendations(budget)] == expected, budget
+    print("✅ Same products in the same order")
+
+
+class _FakeArray(list):
+    def tolist(self):
+        return list(self)
+
+
+class _FakeModel:
+    def encode(self, texts, show_progress_bar=False):
+        return _FakeArray([[float(len(text)), 1.0] for text in texts])
+
+
+def _write_catalog(path, prices):
+    fields = ['chunk_id', 'chunk_type', 'primary_text', 'category', 'price', 'flower_type',
+              'collection_id', 'url', 'is_verified', 'url_functional', 'product_exists']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for index, price in enumerate(prices):
+            writer.writerow({'chunk_id': f'p{index}', 'chunk_type': 'product', 'category': 'Premium',
+                             'primary_text': f'Buchet {index} - trandafiri', 'price': price,
+                             'flower_type': 'Trandafiri', 'collection_id': '', 'url': '',
+                             'is_verified': 'True', 'url_functional': 'True', 'product_exists': 'True'})
+    # Rewrites within the same clock tick still change the file version
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(prices) * 1000))
+
+
+def test_prefilter_follows_reindexed_prices():
+    print("🧪 Testing the vector prefilter after a price change...")
+    try:
+        import chromadb  # noqa: F401
+    except ImportError:
+        print("⚠️ chromadb is not installed, skipping")
+        return
+    from database.vector_search import UniversalXOFlowersSearch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog_file = os.path.join(tmp, 'catalog.csv')
+        _write_catalog(catalog_file, [500.0, 900.0])
+        builder = UniversalXOFlowersSearch(db_path=tmp, model_name='test-model')
+        reader = UniversalXOFlowersSearch(db_path=tmp, model_name='test-model')
+        builder._model = reader._model = _FakeModel()
+        builder.load_products_from_csv(catalog_file)
+        reader._catalog_file = catalog_file
+
+        assert len(reader.search_all_products("buchet", limit=5, price_max=600)) == 1
+        assert reader.catalog.count_in_price_range(price_max=600) == 1
+
+        # p1 becomes cheaper and is reindexed by another instance
+        _write_catalog(catalog_file, [500.0, 550.0, 2000.0])
+        builder.load_products_from_csv(catalog_file)
+        assert len(reader.search_all_products("buchet", limit=5, price_max=600)) == 2
+        assert reader.catalog is get_catalog(catalog_file)
+
+        # The edited file no longer matches the live collections: no prefilter, Chroma decides
+        _write_catalog(catalog_file, [500.0, 550.0, 2000.0, 100.0])
+        reader._catalog = get_catalog(catalog_file)
+        assert reader._count_in_price_range(reader.all_products_collection, None, 50) is None
+    print("✅ Prefilter uses the catalog the live collections were built from")
+
+
+if __name__ == "__main__":
+    test_range_queries()
+    test_budget_recommendations_match_scan()
+    test_prefilter_follows_reindexed_prices()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test that the inverted index scores products exactly like a full scan
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.catalog import get_catalog, KEYWORD_TERMS
+from intelligence.product_index import ProductKeywordIndex
+from intelligence.product_search import ROMANIAN_MATCHES
+from utils.text import fold_text
+
+QUERIES = [
+    'trandafiri roșii', 'bujori roz', 'buchet pentru nuntă', 'rosu', 'flori albe elegant',
+    'cutie cu trandafiri', 'lăcrimioare', 'ro', 'a', 'luxury premium', 'xyzzy', 'Peony BOX',
+    'aniversare mama', 'violet violet'
+]
+
+
+def _scan_score(product, query):
+    """Scoring rules applied product by product"""
+    folded_query = fold_text(query)
+    words = folded_query.split()
+    name = fold_text(product['name'])
+    description = fold_text(product['description'])
+    flower_type = fold_text(product['flower_type'])
+
+    score = 0
+    if any(word in name for word in words):
+        score += 10
+    if any(word in description for word in words):
+        score += 5
+    if any(word in flower_type for word in words):
+        score += 8
+    for term in KEYWORD_TERMS:
+        if fold_text(term) in description and fold_text(term) in folded_query:
+            score += 7
+    for romanian, english_terms in ROMANIAN_MATCHES.items():
+        if fold_text(romanian) in folded_query:
+            for term in english_terms:
+                if fold_text(term) in description:
+                    score += 6
+    return score
+
+
+def test_index_matches_full_scan():
+    print("🧪 Testing inverted index against a full scan...")
+    products = get_catalog().valid_records()
+    index = ProductKeywordIndex(products, KEYWORD_TERMS, ROMANIAN_MATCHES)
+
+    for query in QUERIES:
+        expected = {}
+        for position, product in enumerate(products):
+            score = _scan_score(product, query)
+            if score:
+                expected[position] = score
+        assert index.scores(query) == expected, query
+    print(f"✅ {len(QUERIES)} queries scored identically; {index.stats()}")
+
+
+def test_diacritics_are_folded():
+    print("🧪 Testing diacritic folding...")
+    index = ProductKeywordIndex(
+        [{'name': 'Buchet roșu', 'description': 'trandafiri de culoare roșu', 'flower_type': 'Trandafiri'}],
+        KEYWORD_TERMS, ROMANIAN_MATCHES
+    )
+    assert index.scores('rosu') == index.scores('roșu') == index.scores('ROŞU')
+    assert index.scores('rosu')[0] == 10 + 5 + 7
+    print("✅ 'rosu', 'roșu' and 'ROŞU' score the same")
+
+
+if __name__ == "__main__":
+    test_index_matches_full_scan()
+    test_diacritics_are_folded()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test the rate limiter backends
+"""
+
+import os
+import sys
+import tempfile
+import multiprocessing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from security.rate_limit import (
+    RateLimiter, RateLimitBackend, InMemoryRateLimitBackend, SQLiteRateLimitBackend, create_backend
+)
+
+LIMITS = [(60, 3), (3600, 5)]
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _worker(path, count, results):
+    backend = SQLiteRateLimitBackend(path)
+    allowed = sum(backend.hit('shared-user', [(3600, 50)]) for _ in range(count))
+    backend.close()
+    results.put(allowed)
+
+
+def test_memory_sliding_windows():
+    print("🧪 Testing in-memory sliding windows...")
+    clock = _Clock()
+    backend = InMemoryRateLimitBackend(evict_interval=10_000, clock=clock)
+
+    assert [backend.hit('u1', LIMITS) for _ in range(4)] == [True, True, True, False]
+    assert backend.hit('u2', LIMITS)  # Other users are independent
+    clock.now += 60
+    assert [backend.hit('u1', LIMITS) for _ in range(3)] == [True, True, False]  # Hour limit (5) reached
+    clock.now += 3600
+    assert backend.hit('u1', LIMITS)
+    print("✅ Minute and hour windows enforced; rejected requests are not counted")
+
+
+def test_memory_evicts_idle_users():
+    print("🧪 Testing idle user eviction...")
+    clock = _Clock()
+    backend = InMemoryRateLimitBackend(evict_interval=300, clock=clock)
+    for user in range(1000):
+        backend.hit(f'user-{user}', LIMITS)
+    assert backend.stats()['tracked_keys'] == 1000
+
+    clock.now += 3600
+    backend.hit('active', LIMITS)  # Triggers the periodic sweep
+    stats = backend.stats()
+    assert stats['tracked_keys'] == 1 and stats['evicted'] == 1000
+    print(f"✅ Stats after sweep: {stats}")
+
+
+def test_sqlite_fixed_windows_and_eviction():
+    print("🧪 Testing SQLite fixed windows...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rate_limits.db')
+        clock = _Clock(now=120.0)
+        first = SQLiteRateLimitBackend(path, evict_interval=10_000, clock=clock)
+        second = SQLiteRateLimitBackend(path, evict_interval=10_000, clock=clock)
+
+        # Two connections share the counters
+        assert [first.hit('u1', LIMITS), second.hit('u1', LIMITS), first.hit('u1', LIMITS)] == [True] * 3
+        assert not second.hit('u1', LIMITS)
+        clock.now += 60
+        assert second.hit('u1', LIMITS)
+
+        clock.now += 7200
+        assert first.evict_idle() == 2
+        assert first.stats()['tracked_keys'] == 0
+        first.close()
+        second.close()
+    print("✅ Counters shared between connections, expired rows swept")
+
+
+def test_sqlite_across_processes():
+    print("🧪 Testing limits across worker processes...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rate_limits.db')
+        SQLiteRateLimitBackend(path).close()
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_worker, args=(path, 30, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+        allowed = sum(results.get(timeout=5) for _ in workers)
+    assert allowed == 50
+    print("✅ Exactly 50 of 120 requests allowed across 4 processes")
+
+
+def test_rate_limiter_config():
+    print("🧪 Testing RateLimiter wiring...")
+    limiter = RateLimiter({'max_requests_per_minute': 2, 'max_requests_per_hour': 10, 'backend': 'memory'})
+    assert [limiter.is_allowed(42) for _ in range(3)] == [True, True, False]
+    assert limiter.get_stats()['backend'] == 'memory'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = create_backend({'max_requests_per_minute': 1, 'max_requests_per_hour': 1,
+                                  'backend': 'sqlite', 'sqlite_path': os.path.join(tmp, 'limits.db')})
+        assert isinstance(backend, SQLiteRateLimitBackend)
+        backend.close()
+    print("✅ Backend selected from config")
+
+
+def test_backend_must_implement_hit():
+    print("🧪 Testing an incomplete backend...")
+
+    class _NoHit(RateLimitBackend):
+        def stats(self):
+            return {}
+
+    try:
+        _NoHit()
+        assert False, "backend without hit() instantiated"
+    except TypeError:
+        pass
+
+    class _AllowAll(RateLimitBackend):
+        def hit(self, key, limits):
+            return True
+
+    backend = _AllowAll()
+    assert backend.hit('1', LIMITS) and backend.evict_idle() == 0 and backend.stats() == {}
+    print("✅ hit() is required; eviction, stats and close have defaults")
+
+
+if __name__ == "__main__":
+    test_memory_sliding_windows()
+    test_memory_evicts_idle_users()
+    test_sqlite_fixed_windows_and_eviction()
+    test_sqlite_across_processes()
+    test_rate_limiter_config()
+    test_backend_must_implement_hit()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the bounded per-user session cache
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from utils.session_cache import SessionCache, memory_report
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_bound():
+    print("🧪 Testing the LRU bound...")
+    evicted = []
+    cache = SessionCache('test', max_users=3, idle_ttl=0, on_evict=lambda key, value: evicted.append(key))
+    for user in "abc":
+        cache[user] = {'messages_count': 0}
+    cache['a']['messages_count'] += 1  # 'a' becomes the most recently used
+    cache['d'] = {}
+
+    assert sorted(cache) == ['a', 'c', 'd'] and evicted == ['b']
+    assert cache['a']['messages_count'] == 1
+    assert cache.stats()['peak'] == 4 and cache.stats()['evicted'] == 1
+    print("✅ LRU bound test passed")
+
+
+def test_idle_ttl():
+    print("🧪 Testing idle expiry...")
+    clock = _Clock()
+    cache = SessionCache('test', max_users=100, idle_ttl=60, clock=clock)
+    cache['old'] = 1
+    clock.now += 30
+    cache['recent'] = 2
+    clock.now += 40  # 'old' idle for 70s, 'recent' for 40s
+
+    assert cache.get('missing') is None
+    cache['new'] = 3  # Inserts sweep idle entries
+    assert sorted(cache) == ['new', 'recent']
+
+    clock.now += 59
+    assert cache.touch('recent') and not cache.touch('old')
+    clock.now += 59
+    assert cache.evict() == ['new']
+    print("✅ Idle expiry test passed")
+
+
+def test_manual_eviction_skips_pinned_entries():
+    print("🧪 Testing auto_evict=False with can_evict...")
+    cache = SessionCache('test', max_users=2, idle_ttl=0, auto_evict=False)
+    for user in "abcd":
+        cache[user] = True
+    assert len(cache) == 4  # Nothing evicted on insert
+
+    assert cache.evict(lambda user: user != 'a') == ['b', 'c']
+    assert sorted(cache) == ['a', 'd']
+    print("✅ Manual eviction test passed")
+
+
+def test_memory_report():
+    print("🧪 Testing the memory report...")
+    cache = SessionCache('users', max_users=10)
+    cache['1'] = []
+    report = memory_report({'users': cache, 'plain': {'x': 1, 'y': 2}.keys(), 'limiter': {'tracked_keys': 3}})
+
+    assert report['caches']['users']['entries'] == 1
+    assert report['caches']['plain'] == {'entries': 2}
+    assert report['caches']['limiter'] == {'tracked_keys': 3}
+    assert 'max_rss_mb' not in report or report['max_rss_mb'] > 0
+    print("✅ Memory report test passed")
+
+
+if __name__ == "__main__":
+    print("🚀 Running session cache tests...\n")
+    test_lru_bound()
+    test_idle_ttl()
+    test_manual_eviction_skips_pinned_entries()
+    test_memory_report()
+    print("\n🎉 All session cache tests passed!")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the deque-based per-user turn history
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from intelligence.conversation_context import (
+    ConversationContext, ConversationTurn, TurnHistory, NO_CONTEXT
+)
+from intelligence.context_store import ContextStore
+
+
+class _MemoryStore(ContextStore):
+    def __init__(self, turns=None):
+        self.turns = turns or {}
+
+    def load_user(self, user_id):
+        return self.turns.get(user_id, []), None
+
+    def write(self, contexts, profiles, turns):
+        pass
+
+
+def _turn(index, intent="greeting"):
+    return ConversationTurn(f"mesaj {index}", f"răspuns {index}", intent, datetime.now(), "1")
+
+
+def test_bounded_and_expiring():
+    print("🧪 Testing bound and monotonic expiry...")
+    history = TurnHistory(max_turns=3, window_seconds=60)
+    for index in range(5):
+        history.append(_turn(index), at=100.0 + index)
+
+    assert [turn.user_message for turn in history] == ["mesaj 2", "mesaj 3", "mesaj 4"]
+    assert history.expire(now=162.5) == 1  # Turn at 102 is older than 60s
+    assert history.expire(now=162.5) == 0
+    assert len(history) == 2
+    assert history.expire(now=1000) == 2 and len(history) == 0
+    print("✅ Bound and expiry test passed")
+
+
+def test_recent_and_cached_render():
+    print("🧪 Testing recent() and the cached context string...")
+    history = TurnHistory(max_turns=20, window_seconds=3600)
+    for index in range(4):
+        history.append(_turn(index))
+
+    assert [turn.user_message for turn in history.recent(2)] == ["mesaj 2", "mesaj 3"]
+    assert len(history.recent(10)) == 4
+
+    rendered = history.render(1)
+    assert rendered == "User: mesaj 3\nBot: răspuns 3\nIntent: greeting\n---"
+    assert history.render(1) is rendered  # Served from cache
+
+    history.append(_turn(4, "farewell"))
+    assert history.render(1).startswith("User: mesaj 4") and "farewell" in history.render(1)
+    print("✅ Render cache test passed")
+
+
+def test_context_manager_uses_history():
+    print("🧪 Testing ConversationContext context strings...")
+    old = (datetime.now() - timedelta(hours=3)).isoformat()
+    fresh = (datetime.now() - timedelta(minutes=5)).isoformat()
+    stored = {"1": [
+        {'user_message': "vechi", 'bot_response': "-", 'intent': "greeting", 'timestamp': old, 'user_id': "1"},
+        {'user_message': "nou", 'bot_response': "Bună!", 'intent': "greeting", 'timestamp': fresh, 'user_id': "1"},
+    ]}
+    context = ConversationContext(store=_MemoryStore(stored), flush_interval=3600)
+
+    # Stored turns are placed on the monotonic clock by age; the expired one is dropped
+    assert [turn.user_message for turn in context.get_context("1")] == ["nou"]
+    assert context.get_context_string("2") == NO_CONTEXT
+
+    context.add_turn("1", "vreau lalele", "Avem lalele!", "find_product")
+    assert context.get_context_string("1", limit=1).startswith("User: vreau lalele")
+    assert context.get_user_intent_history("1") == ["greeting", "find_product"]
+    context.close()
+    print("✅ ConversationContext history test passed")
+
+
+if __name__ == "__main__":
+    print("🚀 Running turn history tests...\n")
+    test_bounded_and_expiring()
+    test_recent_and_cached_render()
+    test_context_manager_uses_history()
+    print("\n🎉 All turn history tests passed!")